@@ -0,0 +1,53 @@
+"""Prize sprites served from the packed atlas written by generate_prizes.py.
+
+The atlas is decoded on first use and converted to the display format once,
+so every prize blit is a plain same-format copy. Prizes are subsurfaces of
+the converted atlas; without an atlas (or a missing entry) the fallback
+renderer, by default a procedural placeholder, is used instead.
+"""
+import json
+import os
+
+import pygame
+
+PLACEHOLDER_COLORS = {'bunny': (255,200,220), 'teddy': (200,140,80), 'striped': (240,240,240), 'cat': (255,255,255)}
+
+def placeholder(ptype, size):
+    """Fallback sprite: a plain circle in the prize's main colour"""
+    surf = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.draw.circle(surf, PLACEHOLDER_COLORS.get(ptype, (200,200,200)), (size//2, size//2), size * 3 // 7)
+    return surf.convert_alpha()
+
+class PrizeAtlas:
+    def __init__(self, directory, size, name='prizes_atlas', fallback=placeholder):
+        self.png_path = os.path.join(directory, name + '.png')
+        self.index_path = os.path.join(directory, name + '.json')
+        self.size = size
+        self.fallback = fallback  # (ptype, size) -> surface, for sprites the atlas lacks
+        self.atlas = None   # Converted atlas surface, once loaded
+        self.rects = None   # ptype -> rect at self.size; empty if there is no atlas
+        self.images = {}
+
+    def load(self):
+        """Decode the atlas and convert it to the display format (needs a display mode set)"""
+        self.rects = {}
+        if not (os.path.exists(self.index_path) and os.path.exists(self.png_path)):
+            return
+        with open(self.index_path) as f:
+            sprites = json.load(f)['sprites']
+        self.atlas = pygame.image.load(self.png_path).convert_alpha()
+        for ptype, by_size in sprites.items():
+            rect = by_size.get(str(self.size))
+            if rect:
+                self.rects[ptype] = pygame.Rect(rect)
+
+    def get(self, ptype):
+        """Sprite for a prize type at the atlas size"""
+        image = self.images.get(ptype)
+        if image is None:
+            if self.rects is None:
+                self.load()
+            rect = self.rects.get(ptype)
+            image = self.atlas.subsurface(rect) if rect else self.fallback(ptype, self.size)
+            self.images[ptype] = image
+        return image
@@ -0,0 +1,60 @@
+"""
+Tetris Claw - dirty rectangle tracking
+Works out which screen regions changed between two frames.
+
+Each frame the renderer reports every drawn entity as a (key, rect) pair. The
+key identifies the entity and its appearance (e.g. the score text itself), the
+rect is where it was drawn. Anything that appeared, vanished, moved or changed
+appearance marks both its old and new rect dirty; only those regions need to
+be repainted and pushed with pygame.display.update(rects).
+
+python_game/dirty_rects.py is an identical copy of this file for the prize
+claw game, which runs from its own directory; edit the original in
+python_tetris_claw and copy it over (a test checks the two match).
+"""
+
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+import pygame
+
+FULL_SCREEN_RATIO = 0.5  # Above this dirty fraction a full update is cheaper
+
+
+class DirtyRectTracker:
+    def __init__(self, screen_rect: pygame.Rect):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.previous: Dict[Hashable, pygame.Rect] = {}
+        self.full = True
+
+    def invalidate(self):
+        """Force the next frame to repaint the whole screen (e.g. after a full flip)"""
+        self.full = True
+
+    def update(self, entries: Iterable[Tuple[Hashable, pygame.Rect]]) -> List[pygame.Rect]:
+        """Record this frame's entities and return the screen rects that changed"""
+        current = dict(entries)
+        dirty: List[pygame.Rect] = []
+        if not self.full:
+            previous = self.previous
+            for key, rect in current.items():
+                old = previous.get(key)
+                if old is None:
+                    dirty.append(rect)
+                elif old != rect:
+                    dirty.append(rect)
+                    dirty.append(old)
+            for key, rect in previous.items():
+                if key not in current:
+                    dirty.append(rect)
+
+            dirty = [rect.clip(self.screen_rect) for rect in dirty]
+            dirty = [rect for rect in dirty if rect.width and rect.height]
+            area = sum(rect.width * rect.height for rect in dirty)
+            if area > FULL_SCREEN_RATIO * self.screen_rect.width * self.screen_rect.height:
+                self.full = True
+
+        self.previous = current
+        if self.full:
+            self.full = False
+            return [self.screen_rect.copy()]
+        return dirty
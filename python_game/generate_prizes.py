@@ -1,24 +1,114 @@
+"""Render every prize template at every target size into one packed sprite atlas.
+
+Writes assets/generated/prizes_atlas.png plus prizes_atlas.json, which maps
+each prize type and size to its rect in the atlas. Sizes include HiDPI
+variants so the game can load the exact size it draws at, with no runtime
+scaling. Templates render in parallel in a process pool, and a template
+whose source is unchanged since the last run is copied from the existing
+atlas instead of being redrawn (pass --force to redraw everything).
+"""
+import hashlib
+import inspect
+import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
 import pygame
-from prize_templates import draw_bunny, draw_teddy, draw_striped_doll, draw_cat
+from prize_templates import TEMPLATES
 
 OUT_DIR = os.path.join(os.path.dirname(__file__), 'assets', 'generated')
-os.makedirs(OUT_DIR, exist_ok=True)
+ATLAS_PNG = os.path.join(OUT_DIR, 'prizes_atlas.png')
+ATLAS_INDEX = os.path.join(OUT_DIR, 'prizes_atlas.json')
 
-def make_image(draw_fn, filename, size=96):
+BASE_SIZE = 56                # Size prizes are drawn at in the game
+SCALES = (1, 2)               # 1x and HiDPI 2x
+SIZES = tuple(BASE_SIZE * s for s in SCALES)
+ATLAS_WIDTH = 512
+PADDING = 1                   # Transparent gap so sprites never bleed into each other
+
+def template_hash(ptype):
+    """Hash of a template's drawing code; the sprite is redrawn only when it changes"""
+    return hashlib.sha1(inspect.getsource(TEMPLATES[ptype]).encode()).hexdigest()
+
+def render(job):
+    """Worker: draw one (prize type, size) and return its RGBA pixels"""
+    ptype, size = job
     pygame.init()
     surf = pygame.Surface((size, size), pygame.SRCALPHA)
     surf.fill((0,0,0,0))
-    draw_fn(surf, (size//2, size//2), size)
-    path = os.path.join(OUT_DIR, filename)
-    pygame.image.save(surf, path)
-    print('Saved', path)
+    TEMPLATES[ptype](surf, (size//2, size//2), size)
+    return ptype, size, pygame.image.tobytes(surf, 'RGBA')
+
+def pack(sprites):
+    """Shelf-pack square sprites (largest first) into rows of ATLAS_WIDTH; returns rects and height"""
+    rects = {}
+    x = y = shelf = 0
+    for key in sorted(sprites, key=lambda k: -sprites[k].get_height()):
+        w, h = sprites[key].get_size()
+        if x + w > ATLAS_WIDTH:
+            x, y, shelf = 0, y + shelf + PADDING, 0
+        rects[key] = (x, y, w, h)
+        x += w + PADDING
+        shelf = max(shelf, h)
+    return rects, y + shelf
+
+def load_previous():
+    """Sprites of the existing atlas by (type, size), with the template hashes they were drawn from"""
+    if not (os.path.exists(ATLAS_INDEX) and os.path.exists(ATLAS_PNG)):
+        return {}, {}
+    with open(ATLAS_INDEX) as f:
+        index = json.load(f)
+    atlas = pygame.image.load(ATLAS_PNG)
+    sprites = {}
+    for ptype, by_size in index['sprites'].items():
+        for size, rect in by_size.items():
+            sprites[ptype, int(size)] = atlas.subsurface(rect).copy()
+    return sprites, index.get('hashes', {})
+
+def main(force=False):
+    pygame.init()
+    os.makedirs(OUT_DIR, exist_ok=True)
+    hashes = {ptype: template_hash(ptype) for ptype in TEMPLATES}
+    previous, old_hashes = ({}, {}) if force else load_previous()
+
+    sprites = {}
+    jobs = []
+    for ptype in TEMPLATES:
+        for size in SIZES:
+            if old_hashes.get(ptype) == hashes[ptype] and (ptype, size) in previous:
+                sprites[ptype, size] = previous[ptype, size]
+            else:
+                jobs.append((ptype, size))
+    if not jobs and len(sprites) == len(TEMPLATES) * len(SIZES):
+        print('Atlas up to date:', ATLAS_PNG)
+        return
+
+    with ProcessPoolExecutor() as pool:
+        for ptype, size, pixels in pool.map(render, jobs):
+            sprites[ptype, size] = pygame.image.frombuffer(pixels, (size, size), 'RGBA').copy()
+            print('Rendered', ptype, size)
+
+    rects, height = pack(sprites)
+    atlas = pygame.Surface((ATLAS_WIDTH, height), pygame.SRCALPHA)
+    atlas.fill((0,0,0,0))
+    for key, rect in rects.items():
+        atlas.blit(sprites[key], rect[:2])
+    pygame.image.save(atlas, ATLAS_PNG)
 
-def main():
-    make_image(draw_bunny, 'prize_bunny.png', 96)
-    make_image(draw_teddy, 'prize_teddy.png', 96)
-    make_image(draw_striped_doll, 'prize_striped.png', 96)
-    make_image(draw_cat, 'prize_cat.png', 96)
+    index = {
+        'version': 1,
+        'base_size': BASE_SIZE,
+        'sizes': list(SIZES),
+        'hashes': hashes,
+        'sprites': {ptype: {str(size): list(rects[ptype, size]) for size in SIZES} for ptype in TEMPLATES},
+    }
+    with open(ATLAS_INDEX, 'w') as f:
+        json.dump(index, f, indent=2)
+    print('Saved', ATLAS_PNG, f'({ATLAS_WIDTH}x{height}, {len(rects)} sprites)')
 
 if __name__ == '__main__':
-    main()
+    main(force='--force' in sys.argv[1:])
@@ -1,16 +1,36 @@
+import argparse
 import pygame
 import sys
 import random
 import os
+from enum import IntEnum
+
+from asset_manager import PrizeAtlas
+from template_cache import TemplateCache
+from prize_pile import PrizePile
+from dirty_rects import DirtyRectTracker
+from state_machine import StateMachine
 
 WIDTH, HEIGHT = 540, 800
 FPS = 60
+PRIZE_SIZE = 56  # Drawn size of a prize; generate_prizes.py renders the atlas at exactly this size
+RARE_CHANCE = 0.1  # Chance a pile prize comes in a rare colourway
+RARE_VARIANTS = ['gold', 'midnight']
+PRIZE_COUNT = 14
+PILE_BOUNDS = pygame.Rect(60, 90, WIDTH-120, 610)  # Play area walls, resting on the prize floor's bottom edge
 
 class Prize:
     def __init__(self, x, y, image, prize_type):
         self.image = image
         self.rect = self.image.get_rect(center=(x, y))
         self.prize_type = prize_type
+        # Pile physics state (see prize_pile.PrizePile)
+        self.x, self.y = float(x), float(y)
+        self.vx = self.vy = 0.0
+        self.asleep = False
+        self.still_steps = 0
+        self.touching = False
+        self.cell = None
         self.grabbed = False
         self.collected = False
 
@@ -18,91 +38,304 @@ class Prize:
         if not self.collected:
             surf.blit(self.image, self.rect)
 
+class ClawState(IntEnum):
+    IDLE = 0
+    DROPPING = 1
+    GRABBING = 2
+    LIFTING = 3
+    RETURNING = 4
+    DELIVERING = 5
+    RESETTING = 6
+
+class ClawEvent(IntEnum):
+    DROP = 0
+    STOPPED = 1  # Landed on a prize or the bottom; the grab has been tried
+    DONE = 2     # Current phase finished
+
 class Claw:
     def __init__(self, x, y):
         self.x = x
         self.y = y
         self.home_x = x
         self.home_y = y
-        self.state = 'idle'  # idle, dropping, grabbing, lifting, returning, delivering, resetting
+        self.state = ClawState.IDLE
+        self.direction = 0  # Player input while idle: -1 left, 1 right
         self.speed_h = 180
         self.speed_v = 220
         self.grabbed_prize = None
         self.target_y = 0
+        self.sprite = None  # ((x, y), image) from get_image
 
-    def draw(self, surf):
+    def draw(self, surf, dx=0, dy=0):
+        x, y = self.x + dx, self.y + dy
         # Rope
-        pygame.draw.line(surf, (80,80,80), (int(self.x), 40), (int(self.x), int(self.y)), 3)
+        pygame.draw.line(surf, (80,80,80), (int(x), 40 + dy), (int(x), int(y)), 3)
         # Claw body - simple triangle claw
         claw_size = 28
         # Outer shell (golden)
         pygame.draw.polygon(surf, (220,180,50), [
-            (self.x, self.y),
-            (self.x - claw_size, self.y + claw_size),
-            (self.x + claw_size, self.y + claw_size)
+            (x, y),
+            (x - claw_size, y + claw_size),
+            (x + claw_size, y + claw_size)
         ])
         # Inner shadow
         pygame.draw.polygon(surf, (180,140,30), [
-            (self.x, self.y + 8),
-            (self.x - claw_size*0.7, self.y + claw_size*0.8),
-            (self.x + claw_size*0.7, self.y + claw_size*0.8)
+            (x, y + 8),
+            (x - claw_size*0.7, y + claw_size*0.8),
+            (x + claw_size*0.7, y + claw_size*0.8)
         ])
         # Claw details
-        pygame.draw.line(surf, (100,80,20), (self.x - claw_size, int(self.y + claw_size)), (int(self.x), int(self.y)), 4)
-        pygame.draw.line(surf, (100,80,20), (self.x + claw_size, int(self.y + claw_size)), (int(self.x), int(self.y)), 4)
+        pygame.draw.line(surf, (100,80,20), (x - claw_size, int(y + claw_size)), (int(x), int(y)), 4)
+        pygame.draw.line(surf, (100,80,20), (x + claw_size, int(y + claw_size)), (int(x), int(y)), 4)
+
+    def get_image(self):
+        """The claw drawn into a sprite covering get_draw_rect(), redrawn only when it moves"""
+        if self.sprite is None or self.sprite[0] != (self.x, self.y):
+            rect = self.get_draw_rect()
+            image = pygame.Surface(rect.size, pygame.SRCALPHA)
+            self.draw(image, -rect.x, -rect.y)
+            self.sprite = ((self.x, self.y), image)
+        return self.sprite[1]
+    
+    def get_draw_rect(self):
+        """Screen area covered by draw(), rope included"""
+        top = 38
+        return pygame.Rect(int(self.x) - 32, top, 66, int(self.y) + 33 - top)
     
     def get_grab_rect(self):
         """Get the collision rectangle for grabbing"""
         # Wider and taller collision area
         return pygame.Rect(self.x - 35, self.y + 10, 70, 45)
 
-def main():
+class Cabinet:
+    """What the claw works on: the prize pile, the session RNG, score and message"""
+    def __init__(self, pile, rng):
+        self.pile = pile
+        self.rng = rng
+        self.score = 0
+        self.message = ""
+        self.message_timer = 0
+
+    def say(self, message, seconds):
+        self.message = message
+        self.message_timer = seconds
+
+# Claw state updates and enter actions, all taking (claw, cabinet, dt)
+
+def claw_idle(claw, cab, dt):
+    if claw.direction:
+        claw.x = min(WIDTH - 80, max(80, claw.x + claw.direction * claw.speed_h * dt))
+
+def claw_enter_dropping(claw, cab, dt):
+    claw.target_y = 680
+    cab.message = ""
+
+def claw_dropping(claw, cab, dt):
+    claw.y += claw.speed_v * dt
+    # Stop on the first prize the claw touches, or at the bottom
+    grab_rect = claw.get_grab_rect()
+    under = cab.pile.query_rect(grab_rect)
+    if not under and claw.y < claw.target_y:
+        return None
+    claw.y = min(claw.y, claw.target_y)
+    # Nearest prizes first
+    under.sort(key=lambda p: (p.x - claw.x) ** 2 + (p.y - grab_rect.centery) ** 2)
+    for prize in under:
+        # 70% success rate
+        if cab.rng.random() < 0.7:
+            claw.grabbed_prize = prize
+            prize.grabbed = True
+            cab.pile.remove(prize)
+            cab.say("Caught one!", 2.0)
+            return ClawEvent.STOPPED
+    cab.say("Missed...", 2.0)
+    return ClawEvent.STOPPED
+
+def claw_grabbing(claw, cab, dt):
+    # Brief pause
+    return ClawEvent.DONE
+
+def claw_lifting(claw, cab, dt):
+    claw.y -= claw.speed_v * dt
+    prize = claw.grabbed_prize
+    if prize:
+        prize.rect.center = (claw.x, claw.y + 40)
+        # Chance to drop mid-lift
+        if claw.y < 400 and cab.rng.random() < 0.002:  # Very small chance per frame
+            # It falls back into the pile from where it slipped
+            prize.grabbed = False
+            prize.x, prize.y = prize.rect.center
+            cab.pile.add(prize)
+            claw.grabbed_prize = None
+            cab.say("Dropped it!", 1.5)
+    if claw.y <= 100:
+        claw.y = 100
+        return ClawEvent.DONE
+
+def claw_returning(claw, cab, dt):
+    # Move to exit (top right)
+    target_x = WIDTH - 80
+    dx = target_x - claw.x
+    if abs(dx) > 2:
+        claw.x += (dx / abs(dx)) * claw.speed_h * dt
+        if claw.grabbed_prize:
+            claw.grabbed_prize.rect.center = (claw.x, claw.y + 40)
+        return None
+    claw.x = target_x
+    return ClawEvent.DONE
+
+def claw_delivering(claw, cab, dt):
+    # Drop prize at exit
+    if claw.grabbed_prize:
+        claw.grabbed_prize.collected = True
+        cab.score += 1
+        cab.say(f"Success! Score: {cab.score}", 2.0)
+        claw.grabbed_prize = None
+    return ClawEvent.DONE
+
+def claw_resetting(claw, cab, dt):
+    # Return to home position
+    dx = claw.home_x - claw.x
+    dy = claw.home_y - claw.y
+    if abs(dx) > 2:
+        claw.x += (dx / abs(dx)) * claw.speed_h * dt
+    else:
+        claw.x = claw.home_x
+    if abs(dy) > 2:
+        claw.y += (dy / abs(dy)) * claw.speed_v * dt
+        return None
+    claw.y = claw.home_y
+    return ClawEvent.DONE
+
+CLAW_MACHINE = StateMachine(
+    ClawState, ClawEvent,
+    transitions={
+        (ClawState.IDLE, ClawEvent.DROP): ClawState.DROPPING,
+        (ClawState.DROPPING, ClawEvent.STOPPED): ClawState.GRABBING,
+        (ClawState.GRABBING, ClawEvent.DONE): ClawState.LIFTING,
+        (ClawState.LIFTING, ClawEvent.DONE): ClawState.RETURNING,
+        (ClawState.RETURNING, ClawEvent.DONE): ClawState.DELIVERING,
+        (ClawState.DELIVERING, ClawEvent.DONE): ClawState.RESETTING,
+        (ClawState.RESETTING, ClawEvent.DONE): ClawState.IDLE,
+    },
+    updates={
+        ClawState.IDLE: claw_idle,
+        ClawState.DROPPING: claw_dropping,
+        ClawState.GRABBING: claw_grabbing,
+        ClawState.LIFTING: claw_lifting,
+        ClawState.RETURNING: claw_returning,
+        ClawState.DELIVERING: claw_delivering,
+        ClawState.RESETTING: claw_resetting,
+    },
+    on_enter={ClawState.DROPPING: claw_enter_dropping},
+)
+
+def pile_positions(count, radius, bounds, rng):
+    """Starting spots for a pile dropped in loose rows from the floor up.
+
+    Each row holds one prize fewer than would fit and is shifted by a random
+    amount, so the rows nestle into an irregular pile once settled instead of a
+    perfect lattice where nothing can shift.
+    """
+    spacing = radius * 2.1
+    per_row = max(1, int((bounds.width - radius * 2) // spacing))
+    slack = bounds.width - radius * 2 - (per_row - 1) * spacing
+    positions = []
+    row = 0
+    while len(positions) < count:
+        left = bounds.left + radius + rng.uniform(0, slack)
+        y = bounds.bottom - radius - row * spacing
+        for i in range(min(per_row, count - len(positions))):
+            positions.append((left + i * spacing, y))
+        row += 1
+    return positions
+
+def draw_background(surf, font_small):
+    """Static cabinet: machine frame, play area, prize floor and EXIT box"""
+    surf.fill((255, 220, 200))
+    
+    # Machine frame/background
+    pygame.draw.rect(surf, (100, 60, 40), (0, 0, WIDTH, 80))  # Top
+    pygame.draw.rect(surf, (80, 50, 30), (0, 0, 50, HEIGHT))   # Left frame
+    pygame.draw.rect(surf, (80, 50, 30), (WIDTH-50, 0, 50, HEIGHT))  # Right frame
+    pygame.draw.rect(surf, (120, 80, 50), (0, HEIGHT-100, WIDTH, 100))  # Bottom
+    
+    # Play area background
+    pygame.draw.rect(surf, (180, 230, 255), (60, 90, WIDTH-120, HEIGHT-190))
+    
+    # Prize area floor
+    pygame.draw.rect(surf, (150, 120, 80), (60, 480, WIDTH-120, 220))
+    
+    # Exit area (top right)
+    pygame.draw.rect(surf, (50, 200, 50), (WIDTH-130, 120, 70, 60))
+    exit_text = font_small.render('EXIT', True, (255,255,255))
+    surf.blit(exit_text, (WIDTH-120, 135))
+
+def draw_scene(surf, entries):
+    """Draw scene entries in order"""
+    surf.blits([(image, rect) for _, rect, image in entries], doreturn=False)
+
+def repaint(surf, background, entries, dirty):
+    """Restore and redraw each dirty rect with the screen clipped to it.
+
+    Entries reaching outside a rect would otherwise be blended again over
+    last frame's pixels there, smearing anything translucent.
+    """
+    rects = [rect for _, rect, _ in entries]
+    for dirty_rect in dirty:
+        surf.set_clip(dirty_rect)
+        surf.blit(background, dirty_rect, dirty_rect)
+        draw_scene(surf, [entries[i] for i in dirty_rect.collidelistall(rects)])
+    surf.set_clip(None)
+
+def main(dirty_rects=False, seed=None, prize_count=PRIZE_COUNT, prize_size=PRIZE_SIZE):
     pygame.init()
+    # One seeded stream for every random choice, so a session can be reproduced
+    rng = random.Random(seed)
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     clock = pygame.time.Clock()
     pygame.display.set_caption('Claw Machine Game')
 
     font = pygame.font.SysFont(None, 32)
     font_small = pygame.font.SysFont(None, 24)
+    
+    # The cabinet never changes, so it is drawn once
+    background = pygame.Surface((WIDTH, HEIGHT)).convert()
+    draw_background(background, font_small)
+    # Dirty-rect mode repaints and pushes only the regions that changed,
+    # which matters on software-rendered displays where full flips dominate
+    dirty_tracker = DirtyRectTracker(screen.get_rect())
 
-    # Load prize images
+    # Prize sprites come from the packed atlas, already at the size they are drawn at
     assets_dir = os.path.join(os.path.dirname(__file__), 'assets', 'generated')
-    prize_images = {}
     prize_types = ['bunny', 'teddy', 'striped', 'cat']
-    
-    for ptype in prize_types:
-        path = os.path.join(assets_dir, f'prize_{ptype}.png')
-        if os.path.exists(path):
-            img = pygame.image.load(path)
-            # Scale down to reasonable size
-            prize_images[ptype] = pygame.transform.scale(img, (56, 56))
-        else:
-            # Fallback placeholder if image doesn't exist
-            surf = pygame.Surface((56, 56), pygame.SRCALPHA)
-            colors = {'bunny': (255,200,220), 'teddy': (200,140,80), 'striped': (240,240,240), 'cat': (255,255,255)}
-            pygame.draw.circle(surf, colors.get(ptype, (200,200,200)), (28,28), 24)
-            prize_images[ptype] = surf
+    # Rare colourways and sizes missing from the atlas are rendered from the templates and memoized
+    template_cache = TemplateCache()
+    prize_atlas = PrizeAtlas(assets_dir, prize_size, fallback=template_cache.get)
 
-    # Create prize pile - more spread out placement
+    # Create prize pile: prizes packed from the floor up, then settled under gravity
+    pile = PrizePile(PILE_BOUNDS, prize_size * 0.38)
     prizes = []
-    grid_positions = [
-        (120, 520), (220, 520), (320, 520), (420, 520),
-        (120, 600), (220, 600), (320, 600), (420, 600),
-        (170, 560), (270, 560), (370, 560),
-        (120, 680), (270, 680), (420, 680)
-    ]
-    for pos in grid_positions:
-        ptype = random.choice(prize_types)
-        prizes.append(Prize(pos[0], pos[1], prize_images[ptype], ptype))
+    for pos in pile_positions(prize_count, pile.radius, pile.bounds, rng):
+        ptype = rng.choice(prize_types)
+        if rng.random() < RARE_CHANCE:
+            image = template_cache.get(ptype, prize_size, rng.choice(RARE_VARIANTS))
+        else:
+            image = prize_atlas.get(ptype)
+        prize = Prize(pos[0], pos[1], image, ptype)
+        prizes.append(prize)
+        pile.add(prize)
+    pile.settle()
 
     # Claw
     claw = Claw(WIDTH // 2, 80)
 
     # Game state
-    score = 0
+    cabinet = Cabinet(pile, rng)
     instructions = "Press A/D or LEFT/RIGHT to move, SPACE to drop and grab"
-    message = ""
-    message_timer = 0
+    inst_text = font_small.render(instructions, True, (255,255,255))
+    score_text = None
+    msg_surf = None
 
     running = True
     while running:
@@ -112,149 +345,75 @@ def main():
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and claw.state == 'idle':
-                    claw.state = 'dropping'
-                    claw.target_y = 680
-                    message = ""
+                if event.key == pygame.K_SPACE:
+                    CLAW_MACHINE.fire(claw, ClawEvent.DROP, cabinet, dt)
 
-        keys = pygame.key.get_pressed()
-        
         # Claw horizontal movement (only in idle state)
-        if claw.state == 'idle':
-            if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-                claw.x -= claw.speed_h * dt
-                claw.x = max(80, claw.x)
-            if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-                claw.x += claw.speed_h * dt
-                claw.x = min(WIDTH - 80, claw.x)
-
-        # Claw state machine
-        if claw.state == 'dropping':
-            claw.y += claw.speed_v * dt
-            if claw.y >= claw.target_y:
-                claw.y = claw.target_y
-                claw.state = 'grabbing'
-                # Check grab collision
-                grab_rect = claw.get_grab_rect()
-                grabbed = False
-                for prize in prizes:
-                    if not prize.collected and grab_rect.colliderect(prize.rect):
-                        # 70% success rate
-                        if random.random() < 0.7:
-                            claw.grabbed_prize = prize
-                            prize.grabbed = True
-                            grabbed = True
-                            message = "Caught one!"
-                            break
-                if not grabbed:
-                    message = "Missed..."
-                message_timer = 2.0
-
-        elif claw.state == 'grabbing':
-            # Brief pause
-            claw.state = 'lifting'
-
-        elif claw.state == 'lifting':
-            claw.y -= claw.speed_v * dt
-            if claw.grabbed_prize:
-                claw.grabbed_prize.rect.center = (claw.x, claw.y + 40)
-                # Chance to drop mid-lift
-                if claw.y < 400 and random.random() < 0.002:  # Very small chance per frame
-                    claw.grabbed_prize.grabbed = False
-                    claw.grabbed_prize = None
-                    message = "Dropped it!"
-                    message_timer = 1.5
-            if claw.y <= 100:
-                claw.y = 100
-                claw.state = 'returning'
-
-        elif claw.state == 'returning':
-            # Move to exit (top right)
-            target_x = WIDTH - 80
-            dx = target_x - claw.x
-            if abs(dx) > 2:
-                claw.x += (dx / abs(dx)) * claw.speed_h * dt
-                if claw.grabbed_prize:
-                    claw.grabbed_prize.rect.center = (claw.x, claw.y + 40)
-            else:
-                claw.x = target_x
-                claw.state = 'delivering'
-
-        elif claw.state == 'delivering':
-            # Drop prize at exit
-            if claw.grabbed_prize:
-                claw.grabbed_prize.collected = True
-                score += 1
-                message = f"Success! Score: {score}"
-                message_timer = 2.0
-                claw.grabbed_prize = None
-            # Return to home
-            claw.state = 'resetting'
-
-        elif claw.state == 'resetting':
-            # Return to home position
-            dx = claw.home_x - claw.x
-            dy = claw.home_y - claw.y
-            if abs(dx) > 2:
-                claw.x += (dx / abs(dx)) * claw.speed_h * dt
-            else:
-                claw.x = claw.home_x
-            if abs(dy) > 2:
-                claw.y += (dy / abs(dy)) * claw.speed_v * dt
-            else:
-                claw.y = claw.home_y
-                claw.state = 'idle'
+        keys = pygame.key.get_pressed()
+        claw.direction = ((keys[pygame.K_RIGHT] or keys[pygame.K_d]) -
+                          (keys[pygame.K_LEFT] or keys[pygame.K_a]))
 
-        # Message timer
-        if message_timer > 0:
-            message_timer -= dt
+        # Prizes shift and settle (large frame gaps are clamped to keep the pile stable)
+        pile.step(min(dt, 1 / 30))
 
-        # Drawing
-        screen.fill((255, 220, 200))
-        
-        # Machine frame/background
-        pygame.draw.rect(screen, (100, 60, 40), (0, 0, WIDTH, 80))  # Top
-        pygame.draw.rect(screen, (80, 50, 30), (0, 0, 50, HEIGHT))   # Left frame
-        pygame.draw.rect(screen, (80, 50, 30), (WIDTH-50, 0, 50, HEIGHT))  # Right frame
-        pygame.draw.rect(screen, (120, 80, 50), (0, HEIGHT-100, WIDTH, 100))  # Bottom
-        
-        # Play area background
-        pygame.draw.rect(screen, (180, 230, 255), (60, 90, WIDTH-120, HEIGHT-190))
-        
-        # Prize area floor
-        pygame.draw.rect(screen, (150, 120, 80), (60, 480, WIDTH-120, 220))
-        
-        # Exit area (top right)
-        pygame.draw.rect(screen, (50, 200, 50), (WIDTH-130, 120, 70, 60))
-        exit_text = font_small.render('EXIT', True, (255,255,255))
-        screen.blit(exit_text, (WIDTH-120, 135))
+        CLAW_MACHINE.step(claw, cabinet, dt)
+
+        # Message timer
+        if cabinet.message_timer > 0:
+            cabinet.message_timer -= dt
 
-        # Draw prizes
-        for prize in prizes:
-            prize.draw(screen)
+        # Drawing: the scene is a list of (key, rect, image) in drawing order
+        entries = []
+        for i, prize in enumerate(prizes):
+            if not prize.collected:
+                entries.append((('prize', i), prize.rect.copy(), prize.image))
 
-        # Draw claw
-        claw.draw(screen)
+        # Claw, between the prizes and the HUD
+        entries.append((('claw', claw.x, claw.y), claw.get_draw_rect(), claw.get_image()))
         
         # Debug: draw grab collision rect (optional - comment out in production)
-        # if claw.state == 'grabbing':
+        # if claw.state == ClawState.GRABBING:
         #     pygame.draw.rect(screen, (255,0,0), claw.get_grab_rect(), 2)
 
         # HUD
-        score_text = font.render(f'Score: {score}', True, (255,255,255))
-        screen.blit(score_text, (10, 10))
+        score = cabinet.score
+        if score_text is None or score_text[0] != score:
+            score_text = (score, font.render(f'Score: {score}', True, (255,255,255)))
+        entries.append((('score', score), score_text[1].get_rect(topleft=(10, 10)), score_text[1]))
         
-        inst_text = font_small.render(instructions, True, (255,255,255))
-        screen.blit(inst_text, (10, 45))
+        entries.append((('instructions',), inst_text.get_rect(topleft=(10, 45)), inst_text))
 
-        if message and message_timer > 0:
-            msg_surf = font.render(message, True, (255, 50, 50))
-            screen.blit(msg_surf, (WIDTH//2 - msg_surf.get_width()//2, HEIGHT//2))
+        message = cabinet.message
+        if message and cabinet.message_timer > 0:
+            if msg_surf is None or msg_surf[0] != message:
+                msg_surf = (message, font.render(message, True, (255, 50, 50)))
+            image = msg_surf[1]
+            entries.append((('message', message), image.get_rect(topleft=(WIDTH//2 - image.get_width()//2, HEIGHT//2)), image))
 
-        pygame.display.flip()
+        if dirty_rects:
+            dirty = dirty_tracker.update((key, rect) for key, rect, _ in entries)
+            repaint(screen, background, entries, dirty)
+            pygame.display.update(dirty)
+        else:
+            screen.blit(background, (0, 0))
+            draw_scene(screen, entries)
+            pygame.display.flip()
 
     pygame.quit()
     sys.exit()
 
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Claw Machine Game")
+    parser.add_argument("--dirty-rects", action="store_true", help="repaint and push only changed screen regions")
+    parser.add_argument("--seed", type=int, help="session seed (random if omitted)")
+    parser.add_argument("--prizes", type=positive_int, default=PRIZE_COUNT, help=f"prizes in the pile (default {PRIZE_COUNT})")
+    parser.add_argument("--prize-size", type=positive_int, default=PRIZE_SIZE,
+                        help=f"prize sprite size in pixels (default {PRIZE_SIZE})")
+    args = parser.parse_args()
+    main(dirty_rects=args.dirty_rects, seed=args.seed, prize_count=args.prizes, prize_size=args.prize_size)
@@ -0,0 +1,180 @@
+"""Prize-pile physics: prizes settle under gravity and shift when a neighbour is pulled out.
+
+Prizes are circles resolved with position-based dynamics. A uniform grid
+(cell = one prize diameter) is the broad phase, so collision checks and grab
+queries only look at the 3x3 cells around a point instead of every prize.
+Awake prizes are resolved bottom-up and a prize never pushes down into the
+one supporting it (shock propagation), so even tall piles come to rest in a
+few iterations. Settled prizes go to sleep and cost nothing; removing a prize
+wakes the ones resting on it, and anything that moves wakes the prizes above
+it in turn.
+
+Bodies are the game's Prize objects; the pile owns their x, y, vx, vy,
+asleep, still_steps, touching and cell attributes and keeps rect centred on
+(x, y).
+"""
+import math
+
+import pygame
+
+GRAVITY = 900          # px / s^2
+ITERATIONS = 4         # Constraint passes per step
+FRICTION = 0.5        # Horizontal velocity kept per step while touching something
+SLEEP_SPEED = 6        # px / s below which a prize counts as still
+SLEEP_STEPS = 20       # Still steps before a prize falls asleep
+
+class PrizePile:
+    def __init__(self, bounds, radius):
+        self.bounds = pygame.Rect(bounds)  # Walls and floor; the top is open
+        self.radius = radius
+        self.cell_size = radius * 2
+        self.prizes = []
+        self.cells = {}    # (cx, cy) -> list of prizes whose centre is in the cell
+        self.awake = {}    # Awake prizes in the order they woke (a dict keeps stepping deterministic)
+
+    def __len__(self):
+        return len(self.prizes)
+
+    def cell_of(self, prize):
+        return (math.floor(prize.x / self.cell_size), math.floor(prize.y / self.cell_size))
+
+    def neighbours(self, x, y):
+        """Prizes in the 3x3 cells around a point (anything that can touch a prize centred there)"""
+        cx, cy = math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+        cells = self.cells
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                yield from cells.get((gx, gy), ())
+
+    def add(self, prize):
+        """Put a prize into the pile (awake, so it falls from wherever it is)"""
+        prize.vx = prize.vy = 0.0
+        prize.cell = self.cell_of(prize)
+        self.cells.setdefault(prize.cell, []).append(prize)
+        self.prizes.append(prize)
+        self.wake(prize)
+
+    def remove(self, prize):
+        """Take a prize out of the pile, waking everything resting on it"""
+        self.prizes.remove(prize)
+        self.awake.pop(prize, None)
+        bucket = self.cells[prize.cell]
+        bucket.remove(prize)
+        if not bucket:
+            del self.cells[prize.cell]
+        self.wake_above(prize)
+
+    def wake(self, prize):
+        prize.asleep = False
+        prize.still_steps = 0
+        self.awake[prize] = None
+
+    def wake_above(self, prize):
+        reach = 2 * self.radius + 2
+        for other in self.neighbours(prize.x, prize.y):
+            if other.asleep and other.y < prize.y and math.hypot(other.x - prize.x, other.y - prize.y) < reach:
+                self.wake(other)
+
+    def query_rect(self, rect):
+        """Prizes whose sprite rect overlaps rect, found through the grid"""
+        r = self.radius
+        size = self.cell_size
+        hits = []
+        for gx in range(math.floor((rect.left - r) / size), math.floor((rect.right + r) / size) + 1):
+            for gy in range(math.floor((rect.top - r) / size), math.floor((rect.bottom + r) / size) + 1):
+                for prize in self.cells.get((gx, gy), ()):
+                    if prize.rect.colliderect(rect):
+                        hits.append(prize)
+        return hits
+
+    def step(self, dt):
+        """Advance the awake prizes by dt seconds"""
+        if not self.awake:
+            return
+        # Bottom-up, so each prize is resolved against supports that are already in place
+        awake = sorted(self.awake, key=lambda p: -p.y)
+        start = {}
+        for prize in awake:
+            start[prize] = (prize.x, prize.y)
+            prize.vy += GRAVITY * dt
+            prize.x += prize.vx * dt
+            prize.y += prize.vy * dt
+            prize.touching = False
+
+        for _ in range(ITERATIONS):
+            for prize in awake:
+                self.resolve(prize)
+
+        cells = self.cells
+        for prize in awake:
+            x0, y0 = start[prize]
+            # Velocity follows the corrected position (position-based dynamics), except
+            # that being pushed out of an overlap never launches a prize upwards
+            prize.vx = (prize.x - x0) / dt
+            prize.vy = max(0.0, (prize.y - y0) / dt)
+            if prize.touching:
+                prize.vx *= FRICTION
+            prize.rect.center = (round(prize.x), round(prize.y))
+
+            cell = self.cell_of(prize)
+            if cell != prize.cell:
+                bucket = cells[prize.cell]
+                bucket.remove(prize)
+                if not bucket:
+                    del cells[prize.cell]
+                cells.setdefault(cell, []).append(prize)
+                prize.cell = cell
+
+            if abs(prize.vx) < SLEEP_SPEED and abs(prize.vy) < SLEEP_SPEED:
+                prize.still_steps += 1
+                if prize.still_steps >= SLEEP_STEPS:
+                    prize.asleep = True
+                    prize.vx = prize.vy = 0.0
+                    del self.awake[prize]
+            else:
+                prize.still_steps = 0
+                self.wake_above(prize)
+
+    def resolve(self, prize):
+        """Push a prize out of the walls, the floor and its neighbours"""
+        r = self.radius
+        bounds = self.bounds
+        if prize.x < bounds.left + r:
+            prize.x = bounds.left + r
+        elif prize.x > bounds.right - r:
+            prize.x = bounds.right - r
+        if prize.y > bounds.bottom - r:
+            prize.y = bounds.bottom - r
+            prize.touching = True
+
+        diameter = 2 * r
+        for other in self.neighbours(prize.x, prize.y):
+            if other is prize:
+                continue
+            dx = prize.x - other.x
+            dy = prize.y - other.y
+            dist_sq = dx * dx + dy * dy
+            if dist_sq >= diameter * diameter:
+                continue
+            dist = math.sqrt(dist_sq)
+            if dist == 0:
+                dx, dy, dist = 0.0, -1.0, 1.0
+            overlap = diameter - dist
+            nx, ny = dx / dist, dy / dist
+            prize.touching = True
+            if other.asleep or other.y > prize.y + r / 2:
+                # Supports and sleeping prizes do not yield
+                prize.x += nx * overlap
+                prize.y += ny * overlap
+            else:
+                prize.x += nx * overlap / 2
+                prize.y += ny * overlap / 2
+                other.x -= nx * overlap / 2
+                other.y -= ny * overlap / 2
+
+    def settle(self, max_steps=600, dt=1 / 60):
+        """Run the physics until every prize sleeps (used to pre-settle a new pile)"""
+        for _ in range(max_steps):
+            if not self.awake:
+                break
+            self.step(dt)
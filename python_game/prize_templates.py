@@ -199,3 +199,11 @@ def draw_cat(surface, center, size):
     # Paws (small ovals)
     pygame.draw.ellipse(surface, (245,245,245), (cx - size*0.28, cy + size*0.25, size*0.12, size*0.08))
     pygame.draw.ellipse(surface, (245,245,245), (cx + size*0.16, cy + size*0.25, size*0.12, size*0.08))
+
+# Prize type -> drawing function; all templates share the (surface, center, size) signature
+TEMPLATES = {
+    'bunny': draw_bunny,
+    'teddy': draw_teddy,
+    'striped': draw_striped_doll,
+    'cat': draw_cat,
+}
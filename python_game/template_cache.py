@@ -0,0 +1,81 @@
+"""Memoized rendering of the procedural prize templates at any size and colourway.
+
+Rendered surfaces are cached by (template, size, palette variant) in an LRU
+bounded by a memory cap, so prizes can come in any size or rare colourway
+without shipping PNGs and without redrawing pygame.draw calls every frame.
+A palette variant is an exact colour remap applied after drawing; the
+templates draw without anti-aliasing, so every pixel keeps its template colour.
+"""
+from collections import OrderedDict
+
+import pygame
+
+from prize_templates import TEMPLATES
+
+# Variant name -> {template colour: replacement}
+PALETTE_VARIANTS = {
+    'classic': {},
+    'gold': {
+        (255,255,255): (255,215,110), (250,245,240): (250,210,105), (240,235,230): (235,195,95),
+        (245,245,245): (245,205,100), (210,160,110): (235,185,70), (100,180,255): (255,170,60),
+        (70,140,220): (215,130,40), (240,60,60): (255,190,60), (200,40,40): (215,150,40),
+    },
+    'midnight': {
+        (255,255,255): (120,125,170), (250,245,240): (110,115,160), (240,235,230): (100,105,150),
+        (245,245,245): (115,120,165), (210,160,110): (90,85,130), (40,40,40): (210,200,255),
+        (100,180,255): (160,110,220), (70,140,220): (130,85,190), (240,60,60): (90,70,160),
+    },
+}
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+def render_template(ptype, size, variant='classic'):
+    """Draw one prize template at size and apply a palette variant"""
+    surf = pygame.Surface((size, size), pygame.SRCALPHA)
+    surf.fill((0,0,0,0))
+    TEMPLATES[ptype](surf, (size//2, size//2), size)
+    remap = PALETTE_VARIANTS[variant]
+    if remap:
+        pixels = pygame.PixelArray(surf)
+        for old, new in remap.items():
+            pixels.replace(old, new)
+        pixels.close()
+    if pygame.display.get_surface() is not None:
+        surf = surf.convert_alpha()
+    return surf
+
+class TemplateCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # (template, size, variant) -> surface, least recently used first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, ptype, size, variant='classic'):
+        key = (ptype, size, variant)
+        surf = self.entries.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = render_template(ptype, size, variant)
+        self.entries[key] = surf
+        self.bytes += self.surface_bytes(surf)
+        # Evict least recently used entries, never the one just rendered
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.bytes -= self.surface_bytes(old)
+        return surf
+
+    @staticmethod
+    def surface_bytes(surf):
+        return surf.get_pitch() * surf.get_height()
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
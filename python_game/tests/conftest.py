@@ -0,0 +1,9 @@
+"""Run the tests headless, importing the game's modules the way main.py does"""
+
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+# Appended so a combined run with the Tetris tests still finds that game's main.py first
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
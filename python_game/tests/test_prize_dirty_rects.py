@@ -0,0 +1,51 @@
+"""Dirty-rect repaints must leave the screen exactly as a full redraw would"""
+
+import importlib.util
+import os
+import random
+
+import pygame
+
+from dirty_rects import DirtyRectTracker
+
+# Loaded under its own name: the Tetris game has a main.py of its own
+_spec = importlib.util.spec_from_file_location(
+    'prize_main', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py'))
+prize_main = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(prize_main)
+
+
+def test_dirty_frames_match_full_redraw():
+    pygame.init()
+    screen = pygame.display.set_mode((prize_main.WIDTH, prize_main.HEIGHT))
+    background = pygame.Surface(screen.get_size()).convert()
+    prize_main.draw_background(background, pygame.font.SysFont(None, 24))
+    font = pygame.font.SysFont(None, 32)
+    rng = random.Random(7)
+
+    # Translucent blobs stand in for prizes, so any double blend shows up
+    blobs = []
+    for i in range(12):
+        image = pygame.Surface((56, 56), pygame.SRCALPHA)
+        pygame.draw.circle(image, (rng.randrange(256), rng.randrange(256), rng.randrange(256), 120), (28, 28), 27)
+        blobs.append([image, rng.uniform(60, 420), rng.uniform(90, 640)])
+    claw = prize_main.Claw(prize_main.WIDTH // 2, 100)
+
+    tracker = DirtyRectTracker(screen.get_rect())
+    full = pygame.Surface(screen.get_size())
+    for frame in range(200):
+        for blob in blobs:
+            blob[1] += rng.uniform(-3, 3)
+            blob[2] += rng.uniform(-3, 3)
+        claw.x += rng.uniform(-4, 4)
+        claw.y = 100 + (frame * 3.7) % 400
+        entries = [(('prize', i), image.get_rect(center=(x, y)), image) for i, (image, x, y) in enumerate(blobs)]
+        entries.append((('claw', claw.x, claw.y), claw.get_draw_rect(), claw.get_image()))
+        text = font.render(f'Score: {frame // 7}', True, (255, 255, 255))
+        entries.append((('score', frame // 7), text.get_rect(topleft=(10, 10)), text))
+
+        dirty = tracker.update((key, rect) for key, rect, _ in entries)
+        prize_main.repaint(screen, background, entries, dirty)
+        full.blit(background, (0, 0))
+        prize_main.draw_scene(full, entries)
+        assert pygame.image.tobytes(screen, 'RGB') == pygame.image.tobytes(full, 'RGB'), f'frame {frame}'
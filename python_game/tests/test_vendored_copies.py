@@ -0,0 +1,16 @@
+"""Modules the prize game copies from the Tetris game must stay identical to the originals"""
+
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.mark.parametrize('name', ['dirty_rects.py', 'state_machine.py'])
+def test_copy_matches_original(name):
+    with open(os.path.join(ROOT, 'python_tetris_claw', name), 'rb') as f:
+        original = f.read()
+    with open(os.path.join(ROOT, 'python_game', name), 'rb') as f:
+        copy = f.read()
+    assert copy == original, f"python_game/{name} differs from python_tetris_claw/{name}"
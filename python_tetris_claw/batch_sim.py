@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+Tetris Claw - batched simulation
+Many single-player games stepped at once as NumPy arrays, for balancing runs
+and bot training.
+
+BatchSimulation keeps B boards side by side: column occupancy bitmasks,
+piece slots (id, shape, anchor cell, screen position), the claw, the piece
+it carries, timers and scores are all arrays with one row per board, and
+step(inputs) applies spawn, grab, gravity, claw movement, delivery and the
+danger-line check to the whole batch with array operations. The results are
+the same as stepping a Simulation per board with the same seed and inputs:
+same floats for the claw, same pieces in the same cells, same scores.
+
+Two facts about the rules keep it vectorizable:
+  * Spawn draws from the RNG never depend on the board, so each board's
+    upcoming (shape, column) pairs are drawn ahead from its own
+    random.Random in blocks.
+  * A spawned piece lands above everything in its columns and gravity never
+    lets pieces pass each other, so a later piece is never below an earlier
+    one in any column. Dropping pieces fully in id order therefore gives
+    exactly the board Board.settle() does, one piece rank at a time across
+    every board that grabbed.
+
+Inputs are one byte per board with the replay bits (UP, DOWN, LEFT, RIGHT,
+GRAB). Boards that end stop changing; LEVELS boards wait in LEVEL_COMPLETE
+until next_level() is called for them.
+
+    python batch_sim.py --check     # lockstep comparison with Simulation
+    python batch_sim.py --boards 65536 --ticks 600
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from replay import DOWN, GRAB, LEFT, RIGHT, UP, unpack_inputs
+from simulation import (BLOCK_SIZE, DANGER_LINE_ROW, EXIT_BOX_HEIGHT, EXIT_BOX_WIDTH, EXIT_BOX_X,
+                        EXIT_BOX_Y, GRID_HEIGHT, GRID_OFFSET_X, GRID_OFFSET_Y, GRID_WIDTH, SHAPES,
+                        TICK_MS, ClawState, GameMode, Simulation, new_claw)
+
+# Board status
+PLAYING = 0
+GAME_OVER = 1
+LEVEL_COMPLETE = 2
+
+BATCH_MODES = (GameMode.ENDLESS, GameMode.TIME_ATTACK, GameMode.LEVELS)
+
+MAX_PIECES = 40      # Piece slots per board; a board is lost long before 35 pieces fit
+SPAWN_BLOCK = 16     # Spawns drawn ahead per board at a time
+NO_PIECE = np.iinfo(np.int32).max
+NO_BOX = (np.inf, -np.inf, np.inf, -np.inf)  # Grab box of an empty slot: contains no point
+
+EXIT_X = EXIT_BOX_X + EXIT_BOX_WIDTH // 2
+EXIT_Y = EXIT_BOX_Y + EXIT_BOX_HEIGHT // 2
+LIFT_Y = GRID_OFFSET_Y + 50
+CLAW_MIN_X = 50 + GRID_OFFSET_X
+CLAW_MAX_X = GRID_WIDTH * BLOCK_SIZE - 50 + GRID_OFFSET_X
+CLAW_MIN_Y = 120 + GRID_OFFSET_Y
+CLAW_MAX_Y = GRID_HEIGHT * BLOCK_SIZE - 60 + GRID_OFFSET_Y
+CLAW_SPEED = 5
+DANGER_MASK = (1 << DANGER_LINE_ROW) - 1  # Column bits of the rows above the danger line
+
+# Shapes as arrays indexed by shape number (SHAPES order, as drawn by spawn_tetromino)
+SHAPE_KEYS = list(SHAPES)
+_normalized = []
+for _key in SHAPE_KEYS:
+    _blocks = SHAPES[_key]['blocks']
+    _min_x = min(b[0] for b in _blocks)
+    _min_y = min(b[1] for b in _blocks)
+    _normalized.append([(bx - _min_x, by - _min_y) for bx, by in _blocks])
+SHAPE_BX = np.array([[bx for bx, _ in blocks] for blocks in _normalized], dtype=np.int64)
+SHAPE_BY = np.array([[by for _, by in blocks] for blocks in _normalized], dtype=np.int64)
+SHAPE_MAX_X = SHAPE_BX.max(axis=1)
+SHAPE_MAX_Y = SHAPE_BY.max(axis=1)
+SHAPE_WIDTH = {key: int(SHAPE_MAX_X[i]) + 1 for i, key in enumerate(SHAPE_KEYS)}
+# Blocks that are the lowest of their shape in their column: the only ones drop distance looks under
+SHAPE_BOTTOM = np.array([[all(not (ox == bx and oy > by) for ox, oy in blocks) for bx, by in blocks]
+                         for blocks in _normalized])
+
+# Index of the lowest set bit of a column mask (GRID_HEIGHT for an empty column); a
+# floor bit at GRID_HEIGHT makes the same table give the drop distance to the floor
+FLOOR = 1 << GRID_HEIGHT
+LOWEST_BIT = np.full(FLOOR << 1, GRID_HEIGHT, dtype=np.int64)
+for _mask in range(1, FLOOR << 1):
+    LOWEST_BIT[_mask] = (_mask & -_mask).bit_length() - 1
+
+# Claw.update squares and roots with Python's **, i.e. libm pow, which rounds
+# differently from an exact product or sqrt when the exact result lies within
+# about 0.008 ULP of a halfway point. Results closer than POW_MARGIN ULP to
+# one are recomputed with ** itself (a few percent of them).
+POW_MARGIN = 0.48
+SPLIT = 134217729.0  # 2**27 + 1, splits a double into halves whose products are exact
+
+
+def exact_square(x: np.ndarray):
+    """x * x rounded, and the rounding error in ULPs of the result"""
+    p = x * x
+    c = SPLIT * x
+    hi = c - (c - x)
+    lo = x - hi
+    error = ((hi * hi - p) + 2 * hi * lo) + lo * lo
+    return p, error / np.spacing(p)
+
+
+def python_square(x: np.ndarray) -> np.ndarray:
+    """x ** 2 as Python computes it"""
+    p, error = exact_square(x)
+    close = np.flatnonzero(np.abs(error) > POW_MARGIN)
+    if len(close):
+        p[close] = [v ** 2 for v in x[close].tolist()]
+    return p
+
+
+def python_sqrt(s: np.ndarray) -> np.ndarray:
+    """s ** 0.5 as Python computes it, for s >= 0"""
+    r = np.sqrt(s)
+    r2, error = exact_square(r)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # s - r*r is exact, so this is the distance from r to the true root
+        offset = ((s - r2) - error * np.spacing(r2)) / (2 * r) / np.spacing(r)
+    close = np.flatnonzero(np.abs(offset) > POW_MARGIN)
+    if len(close):
+        r[close] = [v ** 0.5 for v in s[close].tolist()]
+    return r
+
+
+class BatchSimulation:
+    def __init__(self, count: int, mode: GameMode = GameMode.ENDLESS, seeds: Optional[Sequence[int]] = None,
+                 spawn_interval: float = 3500):
+        if mode not in BATCH_MODES:
+            raise ValueError(f"BatchSimulation runs single-player modes, not {mode.name}")
+        self.count = count
+        self.mode = mode
+        self.spawn_interval = spawn_interval
+        self.reset(seeds if seeds is not None else range(count))
+
+    def reset(self, seeds: Sequence[int]):
+        """Start a new game on every board, board i seeded with seeds[i] like Simulation.reset"""
+        n = self.count
+        seeds = list(seeds)
+        if len(seeds) != n:
+            raise ValueError(f"{len(seeds)} seeds for {n} boards")
+        self.rngs = [random.Random(seed) for seed in seeds]
+
+        self.status = np.full(n, PLAYING, dtype=np.int8)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.spawn_timer = np.zeros(n)
+        self.time_remaining = np.full(n, 60000.0)
+        self.current_level = np.ones(n, dtype=np.int64)
+        self.level_goal = np.full(n, 5, dtype=np.int64)
+        self.pieces_collected = np.zeros(n, dtype=np.int64)
+        self.next_piece_id = np.ones(n, dtype=np.int64)
+
+        # Upcoming spawns, drawn ahead from each board's RNG
+        self.spawn_shapes = np.zeros((n, SPAWN_BLOCK), dtype=np.int64)
+        self.spawn_cols = np.zeros((n, SPAWN_BLOCK), dtype=np.int64)
+        self.spawn_next = np.zeros(n, dtype=np.int64)
+        self.draw_spawns(np.arange(n))
+
+        self.column_masks = np.zeros((n, GRID_WIDTH), dtype=np.int64)  # Bit y set = row y occupied
+        self.piece_alive = np.zeros((n, MAX_PIECES), dtype=bool)        # Slot holds a piece on the board
+        self.piece_id = np.zeros((n, MAX_PIECES), dtype=np.int64)
+        self.piece_shape = np.zeros((n, MAX_PIECES), dtype=np.int64)
+        self.piece_col = np.zeros((n, MAX_PIECES), dtype=np.int64)      # Anchor: min x and min y of the cells
+        self.piece_row = np.zeros((n, MAX_PIECES), dtype=np.int64)
+        self.piece_x = np.zeros((n, MAX_PIECES))
+        self.piece_y = np.zeros((n, MAX_PIECES))
+        self.piece_box = np.empty((n, MAX_PIECES, 4))  # Grab box: min x, max x, min y, max y
+        self.slot_limit = 1                             # No board uses a slot at or past this
+
+        self.claw_state = np.zeros(n, dtype=np.int8)
+        self.claw_x = np.zeros(n)
+        self.claw_y = np.zeros(n)
+        self.target_x = np.zeros(n)
+        self.target_y = np.zeros(n)
+
+        # The piece a claw carries is off the board, so it lives outside the slots
+        self.held = np.zeros(n, dtype=bool)
+        self.held_id = np.zeros(n, dtype=np.int64)
+        self.held_shape = np.zeros(n, dtype=np.int64)
+        self.held_x = np.zeros(n)
+        self.held_y = np.zeros(n)
+        self.falling = np.zeros(n, dtype=bool)
+        self.fall_speed = np.zeros(n)
+        self.clear_boards(np.ones(n, dtype=bool))
+
+    def clear_boards(self, boards: np.ndarray):
+        """Simulation.clear_board for the boards in a mask"""
+        self.piece_alive[boards] = False
+        self.piece_box[boards] = NO_BOX
+        self.column_masks[boards] = 0
+        self.spawn_timer[boards] = 0.0
+        claw = new_claw()
+        self.claw_state[boards] = ClawState.IDLE
+        self.claw_x[boards] = self.target_x[boards] = claw.x
+        self.claw_y[boards] = self.target_y[boards] = claw.y
+        self.held[boards] = False
+        self.falling[boards] = False
+
+    def next_level(self, boards: np.ndarray):
+        """Simulation.next_level for the LEVEL_COMPLETE boards in a mask"""
+        boards = boards & (self.status == LEVEL_COMPLETE)
+        self.current_level[boards] += 1
+        self.pieces_collected[boards] = 0
+        self.level_goal[boards] = 5 + (self.current_level[boards] - 1) * 2
+        self.clear_boards(boards)
+        self.status[boards] = PLAYING
+
+    @property
+    def playing(self) -> np.ndarray:
+        return self.status == PLAYING
+
+    def draw_spawns(self, boards: np.ndarray):
+        """Draw the next SPAWN_BLOCK spawns of each board, exactly as spawn_tetromino would"""
+        keys = SHAPE_KEYS
+        for b in boards:
+            rng = self.rngs[b]
+            shapes = self.spawn_shapes[b]
+            cols = self.spawn_cols[b]
+            for k in range(SPAWN_BLOCK):
+                key = rng.choice(keys)
+                shapes[k] = keys.index(key)
+                cols[k] = rng.randint(0, GRID_WIDTH - SHAPE_WIDTH[key])
+        self.spawn_next[boards] = 0
+
+    def step(self, inputs: np.ndarray) -> np.ndarray:
+        """Advance every playing board one tick; inputs holds each board's input bits.
+
+        Returns a mask of the boards that delivered a piece this tick.
+        """
+        active = self.status == PLAYING
+        grab = active & (self.claw_state == ClawState.IDLE) & (inputs & GRAB != 0)
+        if grab.any():
+            self.grab(np.flatnonzero(grab))
+
+        # Held direction keys move the target of claws the player controls
+        steer = active & (self.claw_state == ClawState.IDLE)
+        tx, ty = self.target_x, self.target_y
+        ty = np.where(steer & (inputs & UP != 0), ty - 3.75, ty)
+        ty = np.where(steer & (inputs & DOWN != 0), ty + 3.75, ty)
+        tx = np.where(steer & (inputs & LEFT != 0), tx - 3.75, tx)
+        tx = np.where(steer & (inputs & RIGHT != 0), tx + 3.75, tx)
+        self.target_x = np.where(steer, np.minimum(np.maximum(tx, CLAW_MIN_X), CLAW_MAX_X), tx)
+        self.target_y = np.where(steer, np.minimum(np.maximum(ty, CLAW_MIN_Y), CLAW_MAX_Y), ty)
+
+        delivered = self.update(active)
+        self.ticks[active] += 1
+        return delivered
+
+    def update(self, active: np.ndarray) -> np.ndarray:
+        """Simulation.update for the boards in active"""
+        self.spawn_timer = np.where(active, self.spawn_timer + TICK_MS, self.spawn_timer)
+        spawning = active & (self.spawn_timer >= self.spawn_interval)
+        if spawning.any():
+            spawned = np.flatnonzero(spawning)
+            self.spawn(spawned)
+            self.spawn_timer[spawning] = 0.0
+            # Only a spawn raises a stack, so only these boards can have crossed the danger line
+            danger = spawned[(self.column_masks[spawned] & DANGER_MASK).any(axis=1)]
+            self.status[danger] = GAME_OVER
+            active = active.copy()
+            active[danger] = False
+
+        # Claw movement (Claw.update), the same float operations in the same order
+        x, y = self.claw_x, self.claw_y
+        dx = self.target_x - x
+        dy = self.target_y - y
+        distance = python_sqrt(python_square(dx) + python_square(dy))
+        far = distance > CLAW_SPEED
+        near = ~far & (distance > 0.5)
+        arrived = active & ~far & ~near
+        with np.errstate(divide='ignore', invalid='ignore'):
+            moved_x = np.where(far, x + (dx / distance) * CLAW_SPEED, np.where(near, x + dx * 0.2, self.target_x))
+            moved_y = np.where(far, y + (dy / distance) * CLAW_SPEED, np.where(near, y + dy * 0.2, self.target_y))
+        x = self.claw_x = np.where(active, moved_x, x)
+        y = self.claw_y = np.where(active, moved_y, y)
+
+        # Delivery sequence transitions (CLAW_MACHINE), from the state each claw started the tick in
+        state = self.claw_state
+        lifted = arrived & (state == ClawState.LIFTING)
+        released = arrived & (state == ClawState.MOVING_TO_EXIT)
+        state[lifted] = ClawState.MOVING_TO_EXIT
+        self.target_x[lifted] = EXIT_X
+        self.target_y[lifted] = y[lifted]
+        state[released] = ClawState.RELEASING
+        self.falling[released] = True
+        self.fall_speed[released] = 0.0
+
+        # The held piece follows the claw until released, then falls into the EXIT box
+        follow = active & self.held & ~self.falling
+        self.held_x = np.where(follow, x, self.held_x)
+        self.held_y = np.where(follow, y + 40, self.held_y)
+        falling = active & self.held & self.falling
+        self.fall_speed = np.where(falling, self.fall_speed + 0.5, self.fall_speed)
+        self.held_y = np.where(falling, self.held_y + self.fall_speed, self.held_y)
+        delivered = falling & (self.held_y >= EXIT_Y)
+        if delivered.any():
+            self.held_y[delivered] = EXIT_Y
+            self.held[delivered] = False
+            self.falling[delivered] = False
+            self.score[delivered] += 100
+            if self.mode == GameMode.LEVELS:
+                self.pieces_collected[delivered] += 1
+                done = delivered & (self.pieces_collected >= self.level_goal)
+                self.status[done & (self.current_level < 10)] = LEVEL_COMPLETE
+                self.status[done & (self.current_level >= 10)] = GAME_OVER
+            state[delivered] = ClawState.IDLE
+            self.target_x[delivered] = x[delivered]
+            self.target_y[delivered] = y[delivered]
+
+        if self.mode == GameMode.TIME_ATTACK:
+            self.time_remaining = np.where(active, self.time_remaining - TICK_MS, self.time_remaining)
+            expired = active & (self.time_remaining <= 0)
+            self.time_remaining[expired] = 0.0
+            self.status[expired] = GAME_OVER
+        return delivered
+
+    def spawn(self, boards: np.ndarray):
+        """spawn_tetromino on each of the given boards"""
+        index = self.spawn_next[boards]
+        shape = self.spawn_shapes[boards, index]
+        col = self.spawn_cols[boards, index]
+        self.spawn_next[boards] = index + 1
+        refill = boards[index + 1 >= SPAWN_BLOCK]
+        if len(refill):
+            self.draw_spawns(refill)
+
+        # Landing row from the column heights, as Board.landing_row
+        cols = col[:, None] + SHAPE_BX[shape]
+        by = SHAPE_BY[shape]
+        tops = LOWEST_BIT[self.column_masks[boards[:, None], cols]]
+        row = np.minimum(GRID_HEIGHT - (SHAPE_MAX_Y[shape] + 1), (tops - by - 1).min(axis=1))
+        fits = row >= 0
+        boards, shape, col, row, cols, by = boards[fits], shape[fits], col[fits], row[fits], cols[fits], by[fits]
+        if not len(boards):
+            return
+
+        rows = row[:, None] + by
+        for k in range(cols.shape[1]):
+            self.column_masks[boards, cols[:, k]] |= 1 << rows[:, k]
+        if self.piece_alive[boards].all(axis=1).any():
+            raise RuntimeError(f"a board has more than MAX_PIECES ({MAX_PIECES}) pieces")
+        slot = np.argmin(self.piece_alive[boards], axis=1)  # First free slot
+        self.piece_alive[boards, slot] = True
+        self.piece_id[boards, slot] = self.next_piece_id[boards]
+        self.next_piece_id[boards] += 1
+        self.piece_shape[boards, slot] = shape
+        self.piece_col[boards, slot] = col
+        self.piece_row[boards, slot] = row
+        self.piece_x[boards, slot] = (col + SHAPE_MAX_X[shape] / 2.0) * BLOCK_SIZE + BLOCK_SIZE / 2 + GRID_OFFSET_X
+        self.piece_y[boards, slot] = (row + SHAPE_MAX_Y[shape] / 2.0) * BLOCK_SIZE + BLOCK_SIZE / 2 + GRID_OFFSET_Y
+        self.update_boxes(boards, slot)
+        self.slot_limit = max(self.slot_limit, int(slot.max()) + 1)
+
+    def update_boxes(self, boards: np.ndarray, slot: np.ndarray):
+        """Simulation.grab_box of the pieces in the given slots"""
+        x = self.piece_x[boards, slot]
+        y = self.piece_y[boards, slot]
+        shape = self.piece_shape[boards, slot]
+        self.piece_box[boards, slot] = np.stack([
+            x - BLOCK_SIZE / 2 - 20,
+            x + SHAPE_MAX_X[shape] * BLOCK_SIZE + BLOCK_SIZE / 2 + 20,
+            y - SHAPE_MAX_Y[shape] * BLOCK_SIZE - BLOCK_SIZE / 2 - 20,
+            y + BLOCK_SIZE / 2 + 20,
+        ], axis=1)
+
+    def grab(self, boards: np.ndarray):
+        """grab_piece for the idle claws of the given boards"""
+        cx = self.claw_x[boards, None]
+        cy = self.claw_y[boards, None]
+        limit = self.slot_limit
+        box = self.piece_box[boards, :limit]
+        # The lowest id whose grab box covers the claw wins
+        inside = (box[..., 0] <= cx) & (cx <= box[..., 1]) & (box[..., 2] <= cy) & (cy <= box[..., 3])
+        ids = np.where(inside, self.piece_id[boards, :limit], NO_PIECE)
+        slot = ids.argmin(axis=1)
+        hit = ids[np.arange(len(boards)), slot] != NO_PIECE
+        boards, slot = boards[hit], slot[hit]
+        if not len(boards):
+            return
+
+        self.held[boards] = True
+        self.held_id[boards] = self.piece_id[boards, slot]
+        self.held_shape[boards] = self.piece_shape[boards, slot]
+        self.held_x[boards] = self.piece_x[boards, slot]
+        self.held_y[boards] = self.piece_y[boards, slot]
+        self.falling[boards] = False
+        self.claw_state[boards] = ClawState.LIFTING
+        self.target_x[boards] = self.claw_x[boards]
+        self.target_y[boards] = LIFT_Y
+
+        self.remove(boards, slot)
+        self.settle(boards, self.held_id[boards])
+
+    def remove(self, boards: np.ndarray, slot: np.ndarray):
+        shape = self.piece_shape[boards, slot]
+        cols = self.piece_col[boards, slot, None] + SHAPE_BX[shape]
+        rows = self.piece_row[boards, slot, None] + SHAPE_BY[shape]
+        for k in range(cols.shape[1]):
+            self.column_masks[boards, cols[:, k]] &= ~(1 << rows[:, k])
+        self.piece_alive[boards, slot] = False
+        self.piece_box[boards, slot] = NO_BOX
+
+    def settle(self, boards: np.ndarray, removed: np.ndarray):
+        """apply_gravity after a grab: drop every later piece fully, in id order"""
+        # Only pieces spawned after the removed one can have rested on it
+        limit = self.slot_limit
+        ids = np.where(self.piece_alive[boards, :limit] & (self.piece_id[boards, :limit] > removed[:, None]),
+                       self.piece_id[boards, :limit], NO_PIECE)
+        order = np.argsort(ids, axis=1)
+        rank_count = int((ids != NO_PIECE).sum(axis=1).max())
+        rows_index = np.arange(len(boards))
+        for rank in range(rank_count):
+            slot = order[:, rank]
+            valid = ids[rows_index, slot] != NO_PIECE
+            b, s = boards[valid], slot[valid]
+            shape = self.piece_shape[b, s]
+            cols = self.piece_col[b, s, None] + SHAPE_BX[shape]
+            rows = self.piece_row[b, s, None] + SHAPE_BY[shape]
+            # Board.drop_distance: gap under the lowest block of each column the piece spans
+            below = (self.column_masks[b[:, None], cols] | FLOOR) >> (rows + 1)
+            gaps = np.where(SHAPE_BOTTOM[shape], LOWEST_BIT[below], GRID_HEIGHT)
+            distance = gaps.min(axis=1)
+            falls = distance > 0
+            if not falls.any():
+                continue
+            b, s, cols, rows, distance = b[falls], s[falls], cols[falls], rows[falls], distance[falls]
+            for k in range(cols.shape[1]):
+                self.column_masks[b, cols[:, k]] &= ~(1 << rows[:, k])
+            rows = rows + distance[:, None]
+            for k in range(cols.shape[1]):
+                self.column_masks[b, cols[:, k]] |= 1 << rows[:, k]
+            self.piece_row[b, s] += distance
+            self.piece_y[b, s] += distance * BLOCK_SIZE
+            self.update_boxes(b, s)
+
+
+def compare(batch: BatchSimulation, sims: List[Simulation], tick: int) -> List[str]:
+    """Differences between the batch and the scalar simulations it should match"""
+    problems = []
+    status = {GameMode.GAME_OVER: GAME_OVER, GameMode.LEVEL_COMPLETE: LEVEL_COMPLETE}
+    for b, sim in enumerate(sims):
+        claw = sim.claw
+        piece = claw.grabbed_piece
+        expected = (status.get(sim.mode, PLAYING), sim.score, sim.time_remaining, sim.current_level,
+                    sim.pieces_collected, claw.x, claw.y, int(claw.state), list(sim.board.column_masks),
+                    piece is not None, (piece.x, piece.y) if piece else None)
+        actual = (int(batch.status[b]), int(batch.score[b]), float(batch.time_remaining[b]),
+                  int(batch.current_level[b]), int(batch.pieces_collected[b]), float(batch.claw_x[b]),
+                  float(batch.claw_y[b]), int(batch.claw_state[b]), batch.column_masks[b].tolist(),
+                  bool(batch.held[b]), (float(batch.held_x[b]), float(batch.held_y[b])) if batch.held[b] else None)
+        if expected != actual:
+            problems.append(f"tick {tick} board {b}: expected {expected}, got {actual}")
+    return problems
+
+
+class RandomPlayers:
+    """Random held direction keys per board, changed now and then, with frequent grabs"""
+
+    def __init__(self, count: int, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.keys = self.rng.integers(0, 16, count, dtype=np.uint8)
+
+    def inputs(self) -> np.ndarray:
+        count = len(self.keys)
+        change = self.rng.random(count) < 1 / 30
+        self.keys[change] = self.rng.integers(0, 16, int(change.sum()), dtype=np.uint8)
+        return self.keys | np.where(self.rng.random(count) < 0.2, GRAB, 0).astype(np.uint8)
+
+
+def check(boards: int, max_ticks: int, spawn_interval: float, modes: Sequence[GameMode] = BATCH_MODES) -> int:
+    """Step the batch and one Simulation per board in lockstep and report any difference.
+
+    Runs until every board has finished, so game over, the Time Attack
+    timeout and level completion are all compared, not just play. Returns
+    the number of modes that mismatched or didn't finish.
+    """
+    failures = 0
+    for mode in modes:
+        seeds = list(range(1, boards + 1))
+        batch = BatchSimulation(boards, mode, seeds, spawn_interval)
+        sims = []
+        for seed in seeds:
+            sim = Simulation(seed)
+            sim.reset(mode, seed)
+            sim.spawn_interval = spawn_interval
+            sims.append(sim)
+        players = RandomPlayers(boards)
+        delivered = levels = 0
+        problems = []
+        tick = 0
+        while tick < max_ticks and (batch.status != GAME_OVER).any():
+            inputs = players.inputs()
+            for b, sim in enumerate(sims):
+                if sim.playing:
+                    sim.step(unpack_inputs(int(inputs[b])))
+            delivered += int(batch.step(inputs).sum())
+            problems = compare(batch, sims, tick)
+            if problems:
+                break
+            # Levels boards go straight on to the next level
+            waiting = batch.status == LEVEL_COMPLETE
+            if waiting.any():
+                levels += int(waiting.sum())
+                batch.next_level(waiting)
+                for b in np.flatnonzero(waiting):
+                    sims[b].next_level()
+            tick += 1
+        finished = int((batch.status == GAME_OVER).sum())
+        timeouts = int(((batch.status == GAME_OVER) & (batch.time_remaining <= 0)).sum())
+        failures += bool(problems) or finished < boards
+        print(f"{mode.name:<12} {boards} boards, {tick} ticks: {delivered} deliveries, {levels} levels cleared, "
+              f"{finished} finished ({timeouts} timed out), "
+              f"{'MISMATCH' if problems else 'OK' if finished == boards else 'UNFINISHED'}")
+        for problem in problems[:5]:
+            print("  " + problem)
+    return failures
+
+
+def benchmark(boards: int, ticks: int, spawn_interval: float):
+    batch = BatchSimulation(boards, GameMode.ENDLESS, spawn_interval=spawn_interval)
+    players = RandomPlayers(boards)
+    pool = [players.inputs() for _ in range(64)]
+    start = time.perf_counter()
+    steps = 0
+    for tick in range(ticks):
+        steps += int(batch.playing.sum())
+        batch.step(pool[tick % len(pool)])
+    elapsed = time.perf_counter() - start
+    print(f"{boards} boards x {ticks} ticks: {steps / elapsed:,.0f} board-steps/s "
+          f"({elapsed / ticks * 1000:.2f} ms per tick, {int(batch.playing.sum())} still playing)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tetris Claw batched simulation")
+    parser.add_argument('--boards', type=int, help="boards in the batch (default 16384, 64 with --check)")
+    parser.add_argument('--ticks', type=int, help="ticks to time (default 600), or the cap on a --check run (default 30000)")
+    parser.add_argument('--spawn-interval', type=int, default=3500)
+    parser.add_argument('--check', action='store_true', help="compare against Simulation until every board finishes")
+    args = parser.parse_args(argv)
+    if args.check:
+        return 1 if check(args.boards or 64, args.ticks or 30000, args.spawn_interval) else 0
+    benchmark(args.boards or 16384, args.ticks or 600, args.spawn_interval)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
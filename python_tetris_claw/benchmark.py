@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Tetris Claw - benchmark
+Self-play throughput benchmark for the game loop.
+
+Scripted bots play many seeded episodes through Game.update (and optionally
+draw_game + display.flip) on the SDL dummy video driver, so it runs on CI
+without a display. Reports ticks/sec, time per phase, p50/p99 frame time and
+allocations per tick, and writes them as JSON so runs can be compared
+between commits:
+
+    python benchmark.py --episodes 20 --output before.json
+    python benchmark.py --episodes 20 --output after.json --compare before.json
+"""
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+import pygame
+
+from main import Game
+from simulation import GameMode, Inputs, Simulation
+
+# Methods timed on every episode's Game / Simulation. Times are inclusive, so
+# grab_piece also counts the apply_gravity call it makes.
+SIM_PHASES = ('step', 'spawn_tetromino', 'grab_piece', 'apply_gravity')
+GAME_PHASES = ('update', 'update_particles', 'draw_game')
+
+
+class BotPlayer:
+    """Scripted player: steers to the nearest piece and grabs it, with some random jitter"""
+
+    def __init__(self, seed: int, jitter: float = 0.2):
+        self.rng = random.Random(seed)
+        self.jitter = jitter
+
+    def inputs(self, sim: Simulation) -> Inputs:
+        rng = self.rng
+        claw = sim.claw
+        if claw.auto_moving or not sim.tetrominoes or rng.random() < self.jitter:
+            return Inputs(up=rng.random() < 0.2, down=rng.random() < 0.2,
+                          left=rng.random() < 0.2, right=rng.random() < 0.2,
+                          grab=rng.random() < 0.03)
+        target = min(sim.tetrominoes, key=lambda t: abs(t.x - claw.x) + abs(t.y - claw.y))
+        dx = target.x - claw.x
+        dy = target.y - claw.y
+        return Inputs(up=dy < -3, down=dy > 3, left=dx < -3, right=dx > 3,
+                      grab=abs(dx) < 6 and abs(dy) < 6)
+
+
+def timed(fn, totals: Dict[str, float], name: str):
+    """Wrap fn so every call adds its duration to totals[name]"""
+    clock = time.perf_counter
+
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            totals[name] += clock() - start
+    return wrapper
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def run_episode(seed: int, mode: GameMode, max_ticks: int, render: bool, spawn_interval: int,
+                phase_totals: Dict[str, float], frame_ms: List[float]) -> int:
+    """Play one seeded episode to game over (or max_ticks); returns the ticks run"""
+    game = Game(seed=seed)
+    game.start_game(mode)
+    game.sim.spawn_interval = spawn_interval
+    bot = BotPlayer(seed)
+
+    sim = game.sim
+    for name in SIM_PHASES:
+        setattr(sim, name, timed(getattr(sim, name), phase_totals, name))
+    for name in GAME_PHASES:
+        setattr(game, name, timed(getattr(game, name), phase_totals, name))
+    flip = timed(pygame.display.flip, phase_totals, 'flip')
+
+    clock = time.perf_counter
+    ticks = 0
+    try:
+        while ticks < max_ticks and sim.playing:
+            start = clock()
+            game.update(bot.inputs(sim))
+            if render:
+                game.draw_game()
+                flip()
+            frame_ms.append((clock() - start) * 1000)
+            ticks += 1
+    finally:
+        # Every Game starts a hint solver thread; don't let them pile up across episodes
+        game.hints.close()
+    return ticks
+
+
+def measure_allocations(seed: int, mode: GameMode, ticks: int, render: bool, spawn_interval: int) -> Dict:
+    """Replay one episode under tracemalloc and report memory allocated per tick"""
+    game = Game(seed=seed)
+    game.start_game(mode)
+    game.sim.spawn_interval = spawn_interval
+    bot = BotPlayer(seed)
+
+    tracemalloc.start()
+    transient = []
+    blocks_before = sys.getallocatedblocks()
+    try:
+        for _ in range(ticks):
+            if not game.sim.playing:
+                break
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            game.update(bot.inputs(game.sim))
+            if render:
+                game.draw_game()
+            _, peak = tracemalloc.get_traced_memory()
+            transient.append(peak - base)
+    finally:
+        tracemalloc.stop()
+        game.hints.close()
+    count = max(len(transient), 1)
+    return {
+        'ticks': len(transient),
+        'peak_bytes_per_tick_mean': sum(transient) / count,
+        'peak_bytes_per_tick_p99': percentile(transient, 99),
+        'net_blocks_per_tick': (sys.getallocatedblocks() - blocks_before) / count,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def run_benchmark(episodes: int, mode: GameMode, max_ticks: int, render: bool, spawn_interval: int,
+                  seed: int) -> Dict:
+    phase_totals: Dict[str, float] = defaultdict(float)
+    frame_ms: List[float] = []
+    total_ticks = 0
+    wall_start = time.perf_counter()
+    for episode in range(episodes):
+        total_ticks += run_episode(seed + episode, mode, max_ticks, render, spawn_interval,
+                                   phase_totals, frame_ms)
+    wall = time.perf_counter() - wall_start
+    # Setup (Game construction, static layers) is excluded from the tick rate
+    loop_time = sum(frame_ms) / 1000
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'episodes': episodes,
+            'mode': mode.name,
+            'max_ticks': max_ticks,
+            'render': render,
+            'spawn_interval': spawn_interval,
+            'seed': seed,
+        },
+        'ticks': total_ticks,
+        'wall_seconds': wall,
+        'ticks_per_sec': total_ticks / loop_time if loop_time else 0.0,
+        'frame_ms': {
+            'mean': sum(frame_ms) / max(len(frame_ms), 1),
+            'p50': percentile(frame_ms, 50),
+            'p99': percentile(frame_ms, 99),
+            'max': max(frame_ms, default=0.0),
+        },
+        'phases_ms_per_tick': {name: phase_totals[name] * 1000 / max(total_ticks, 1)
+                               for name in sorted(phase_totals)},
+        'allocations': measure_allocations(seed, mode, min(max_ticks, 2000), render, spawn_interval),
+    }
+
+
+def print_report(result: Dict, baseline: Dict = None):
+    def delta(value, old, higher_is_better=False):
+        if not old:
+            return ''
+        change = (value - old) / old * 100
+        better = change > 0 if higher_is_better else change < 0
+        return f"  ({change:+.1f}% {'better' if better else 'worse'})"
+
+    base = baseline or {}
+    print(f"ticks/sec      {result['ticks_per_sec']:>12,.0f}"
+          f"{delta(result['ticks_per_sec'], base.get('ticks_per_sec'), True)}")
+    for key in ('p50', 'p99', 'max'):
+        print(f"frame {key:<8} {result['frame_ms'][key]:>12.3f} ms"
+              f"{delta(result['frame_ms'][key], base.get('frame_ms', {}).get(key))}")
+    print("per tick:")
+    base_phases = base.get('phases_ms_per_tick', {})
+    for name, value in result['phases_ms_per_tick'].items():
+        print(f"  {name:<16} {value:>10.4f} ms{delta(value, base_phases.get(name))}")
+    alloc = result['allocations']
+    print(f"allocated/tick {alloc['peak_bytes_per_tick_mean']:>12,.0f} B mean, "
+          f"{alloc['peak_bytes_per_tick_p99']:,.0f} B p99, {alloc['net_blocks_per_tick']:+.2f} blocks net")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tetris Claw self-play benchmark")
+    parser.add_argument('--episodes', type=int, default=10)
+    parser.add_argument('--mode', choices=['ENDLESS', 'TIME_ATTACK', 'LEVELS'], default='ENDLESS')
+    parser.add_argument('--max-ticks', type=int, default=3600, help="tick limit per episode")
+    parser.add_argument('--spawn-interval', type=int, default=800,
+                        help="ms between spawns; lower than the game's 3500 to keep the board busy")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--render', action='store_true', help="also time draw_game and display.flip")
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--compare', help="baseline JSON to report changes against")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.episodes, GameMode[args.mode], args.max_ticks, args.render,
+                           args.spawn_interval, args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        differing = [key for key, value in result['meta'].items()
+                     if key not in ('commit', 'timestamp') and baseline['meta'].get(key) != value]
+        if differing:
+            print(f"note: baseline was run with different settings ({', '.join(differing)})")
+    print_report(result, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
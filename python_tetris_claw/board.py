@@ -0,0 +1,177 @@
+"""
+Tetris Claw - occupancy bitboard
+Compact grid engine used behind Game's spawn / grab / gravity methods.
+
+Every row is stored as an integer bitmask (bit x set = column x occupied) and
+every column as a bitmask over rows, so landing-row, collision and can-fall
+queries are a handful of integer operations regardless of board size. A flat
+piece-id layer maps each cell back to the piece occupying it, which doubles
+as the support graph used for incremental gravity.
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+EMPTY = 0  # Piece id stored in unoccupied cells; real ids start at 1
+
+
+def lowest_bit_index(mask: int) -> int:
+    """Index of the least significant set bit (mask must be non-zero)"""
+    return (mask & -mask).bit_length() - 1
+
+
+def shape_row_masks(blocks: Iterable[Tuple[int, int]]) -> Dict[int, int]:
+    """Bitmask of a shape's cells for each of its row offsets"""
+    masks: Dict[int, int] = {}
+    for bx, by in blocks:
+        masks[by] = masks.get(by, 0) | (1 << bx)
+    return masks
+
+
+class Board:
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.clear()
+
+    def clear(self):
+        """Remove every piece from the board"""
+        self.row_masks = [0] * self.height
+        self.column_masks = [0] * self.width
+        # Height map: topmost occupied row of each column (height if empty)
+        self.column_tops = [self.height] * self.width
+        self.cells = [EMPTY] * (self.width * self.height)
+        self.pieces: Dict[int, List[Tuple[int, int]]] = {}
+
+    def copy(self) -> 'Board':
+        """Independent copy of the board (piece cell lists are never mutated, so they are shared)"""
+        other = Board.__new__(Board)
+        other.width = self.width
+        other.height = self.height
+        other.row_masks = self.row_masks[:]
+        other.column_masks = self.column_masks[:]
+        other.column_tops = self.column_tops[:]
+        other.cells = self.cells[:]
+        other.pieces = dict(self.pieces)
+        return other
+
+    def is_occupied(self, x: int, y: int) -> bool:
+        return bool(self.row_masks[y] >> x & 1)
+
+    def piece_at(self, x: int, y: int) -> Optional[int]:
+        """Id of the piece covering a cell, or None if it is empty"""
+        piece_id = self.cells[y * self.width + x]
+        return piece_id if piece_id != EMPTY else None
+
+    def any_above(self, row: int) -> bool:
+        """True if any cell in rows [0, row) is occupied"""
+        return any(self.row_masks[:row])
+
+    def place(self, piece_id: int, cells: List[Tuple[int, int]]):
+        """Occupy cells with a piece"""
+        for x, y in cells:
+            self.row_masks[y] |= 1 << x
+            self.column_masks[x] |= 1 << y
+            self.cells[y * self.width + x] = piece_id
+            if y < self.column_tops[x]:
+                self.column_tops[x] = y
+        self.pieces[piece_id] = list(cells)
+
+    def remove(self, piece_id: int) -> List[Tuple[int, int]]:
+        """Free a piece's cells and return them"""
+        cells = self.pieces.pop(piece_id)
+        for x, y in cells:
+            self.row_masks[y] &= ~(1 << x)
+            self.column_masks[x] &= ~(1 << y)
+            self.cells[y * self.width + x] = EMPTY
+        for x in {x for x, _ in cells}:
+            mask = self.column_masks[x]
+            self.column_tops[x] = lowest_bit_index(mask) if mask else self.height
+        return cells
+
+    def move(self, piece_id: int, dy: int) -> List[Tuple[int, int]]:
+        """Shift a piece down by dy rows and return its new cells"""
+        cells = [(x, y + dy) for x, y in self.remove(piece_id)]
+        self.place(piece_id, cells)
+        return cells
+
+    def collides(self, blocks: Iterable[Tuple[int, int]], col: int, row: int) -> bool:
+        """True if a shape placed with its origin at (col, row) overlaps anything"""
+        for by, mask in shape_row_masks(blocks).items():
+            y = row + by
+            if y < 0 or y >= self.height or self.row_masks[y] & (mask << col):
+                return True
+        return False
+
+    def landing_row(self, blocks: List[Tuple[int, int]], col: int) -> int:
+        """Lowest row a normalized shape can rest at when stacked from the top.
+
+        Uses the height map, so a shape never lands below an overhang. A
+        negative result means the column stack is too tall to fit the shape.
+        """
+        row = self.height - (max(by for _, by in blocks) + 1)
+        for bx, by in blocks:
+            row = min(row, self.column_tops[col + bx] - by - 1)
+        return row
+
+    def drop_distance(self, piece_id: int) -> int:
+        """Number of rows a piece can fall before resting on something"""
+        # Bottom-most cell of the piece in each column it spans
+        bottoms: Dict[int, int] = {}
+        for x, y in self.pieces[piece_id]:
+            if y > bottoms.get(x, -1):
+                bottoms[x] = y
+
+        distance = self.height
+        for x, bottom in bottoms.items():
+            below = self.column_masks[x] >> (bottom + 1)
+            gap = lowest_bit_index(below) if below else self.height - bottom - 1
+            if gap < distance:
+                distance = gap
+        return distance
+
+    def can_fall(self, piece_id: int) -> bool:
+        return self.drop_distance(piece_id) > 0
+
+    def bottom_row(self, piece_id: int) -> int:
+        return max(y for _, y in self.pieces[piece_id])
+
+    def supported_by(self, piece_id: int) -> Set[int]:
+        """Ids of the pieces resting directly on top of a piece"""
+        above = set()
+        for x, y in self.pieces[piece_id]:
+            if y > 0:
+                other = self.cells[(y - 1) * self.width + x]
+                if other != EMPTY and other != piece_id:
+                    above.add(other)
+        return above
+
+    def settle(self, piece_ids: Iterable[int]) -> Dict[int, int]:
+        """Drop pieces, and everything transitively resting on them, to their final rows.
+
+        Only the given pieces and those found through the support graph are
+        examined. Each piece falls its whole drop distance in one move; lower
+        pieces are handled first so most pieces move only once. Returns the
+        number of rows each moved piece fell.
+        """
+        queued = {piece_id for piece_id in piece_ids if piece_id in self.pieces}
+        heap = [(-self.bottom_row(piece_id), piece_id) for piece_id in queued]
+        heapq.heapify(heap)
+        dropped: Dict[int, int] = {}
+
+        while heap:
+            _, piece_id = heapq.heappop(heap)
+            queued.discard(piece_id)
+            distance = self.drop_distance(piece_id)
+            if distance == 0:
+                continue
+
+            # Whatever rested on the old position may now be able to fall too
+            above = self.supported_by(piece_id)
+            self.move(piece_id, distance)
+            dropped[piece_id] = dropped.get(piece_id, 0) + distance
+            for other in above:
+                if other not in queued:
+                    queued.add(other)
+                    heapq.heappush(heap, (-self.bottom_row(other), other))
+        return dropped
@@ -0,0 +1,163 @@
+"""
+Tetris Claw - checkpoints
+Crash-safe save of the game in progress, picked up again with --resume.
+
+The game hands a checkpoint to a background writer every few seconds and
+whenever a level is cleared; the render thread only takes a simulation
+snapshot (tens of microseconds) and copies the replay's input bytes.
+Encoding, compression and the write happen on the writer thread. A file is
+written next to the checkpoint and renamed over it, so a crash mid-write
+leaves the previous checkpoint intact. If several checkpoints queue up
+while one is being written, only the newest is written.
+
+File layout (little endian):
+    header    magic b'TCCK', format version, session mode, flags, session seed (u64),
+              snapshot size (u32), replay size (u32), CRC-32 of snapshot and replay (u32)
+    snapshot  Snapshot.to_bytes() of the simulation
+    replay    Replay.to_bytes() of the game so far (size 0 if it isn't being recorded)
+"""
+
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+from replay import Replay
+from simulation import PLAY_MODES, GameMode
+from snapshot import Snapshot
+
+MAGIC = b'TCCK'
+VERSION = 2
+HEADER = struct.Struct('<4sBBBQIII')
+
+HAS_SEED = 1
+
+_CLEAR = object()  # Queue item: delete the checkpoint
+_CLOSE = object()  # Queue sentinel: finish the queued work and stop the writer
+
+
+@dataclass
+class Checkpoint:
+    mode: GameMode           # Mode the session was started in
+    seed: Optional[int]      # Session seed
+    snapshot: Snapshot
+    replay: Optional[Replay] = None
+
+    def to_bytes(self) -> bytes:
+        snapshot = self.snapshot.to_bytes()
+        replay = self.replay.to_bytes() if self.replay else b''
+        flags = HAS_SEED if self.seed is not None else 0
+        payload = snapshot + replay
+        header = HEADER.pack(MAGIC, VERSION, PLAY_MODES.index(self.mode), flags, self.seed or 0,
+                             len(snapshot), len(replay), zlib.crc32(payload))
+        return header + payload
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Checkpoint':
+        magic, version, mode, flags, seed, snapshot_size, replay_size, crc = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a Tetris Claw checkpoint (or an unsupported version)")
+        if len(data) != HEADER.size + snapshot_size + replay_size:
+            raise ValueError("Truncated checkpoint")
+        if zlib.crc32(memoryview(data)[HEADER.size:]) != crc:
+            raise ValueError("Corrupt checkpoint (checksum mismatch)")
+        start = HEADER.size
+        snapshot = Snapshot.from_bytes(data[start:start + snapshot_size])
+        start += snapshot_size
+        replay = Replay.from_bytes(data[start:start + replay_size]) if replay_size else None
+        return cls(PLAY_MODES[mode], seed if flags & HAS_SEED else None, snapshot, replay)
+
+
+def write_atomic(path: str, data: bytes):
+    """Write data to path so that readers see either the old file or the whole new one"""
+    temp = path + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def load(path: str) -> Optional[Checkpoint]:
+    """The checkpoint at path, or None if there is none or it can't be read.
+
+    A truncated, corrupt or old-version checkpoint is set aside, so the game
+    starts fresh instead of failing at every start.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return Checkpoint.from_bytes(f.read())
+    except FileNotFoundError:
+        return None
+    except (ValueError, IndexError, struct.error, zlib.error) as error:
+        print(f"checkpoint: ignoring unreadable {path}: {error}", file=sys.stderr)
+        set_aside(path)
+        return None
+
+
+def set_aside(path: str):
+    """Move an unusable checkpoint to path + '.bad' (delete it if that fails)"""
+    try:
+        os.replace(path, path + '.bad')
+    except OSError:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class CheckpointWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.queue: "queue.Queue" = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True)
+        self.writer.start()
+
+    def save(self, checkpoint: Checkpoint):
+        """Queue a checkpoint for writing; returns immediately.
+
+        The checkpoint must not be changed afterwards: give it a fresh
+        snapshot and a copy of the replay.
+        """
+        self.queue.put(checkpoint)
+
+    def clear(self):
+        """Queue removal of the checkpoint (the game it holds is over)"""
+        self.queue.put(_CLEAR)
+
+    def flush(self):
+        """Block until everything queued is on disk"""
+        self.queue.join()
+
+    def close(self):
+        """Write out whatever is still queued, then stop the writer"""
+        self.queue.put(_CLOSE)
+        self.writer.join()
+
+    def _write_loop(self):
+        closing = False
+        while not closing:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            jobs = [item for item in batch if item is not _CLOSE]
+            closing = len(jobs) < len(batch)
+            # Only the newest request matters: each one replaces the file
+            if jobs:
+                try:
+                    if jobs[-1] is _CLEAR:
+                        if os.path.exists(self.path):
+                            os.remove(self.path)
+                    else:
+                        write_atomic(self.path, jobs[-1].to_bytes())
+                except OSError as error:
+                    print(f"checkpoint: {error}", file=sys.stderr)
+            for _ in batch:
+                self.queue.task_done()
@@ -5,93 +5,74 @@ A claw machine game with Tetris blocks
 """
 
 import pygame
-import random
 import sys
+import os
 import math
-from enum import Enum
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
+import time
+import random
+import argparse
+from collections import OrderedDict
+
+from particles import ParticleSystem, DecorativeField
+from dirty_rects import DirtyRectTracker
+from replay import Replay
+from profiler import FrameProfiler
+from score_store import ScoreStore, Session
+from checkpoint import Checkpoint, CheckpointWriter
+from checkpoint import load as load_checkpoint, set_aside as set_aside_checkpoint
+from snapshot import restore, take
+from solver import HintWorker, Solver, SolverBot
+from simulation import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, BLOCK_SIZE, GRID_WIDTH, GRID_HEIGHT,
+    GRID_OFFSET_X, GRID_OFFSET_Y, EXIT_BOX_WIDTH, EXIT_BOX_HEIGHT, EXIT_BOX_X, EXIT_BOX_Y,
+    DANGER_LINE_ROW, MORANDI_BLUE, MORANDI_PINK, MORANDI_GREEN, MORANDI_PURPLE, MORANDI_YELLOW,
+    TICK_MS, SHAPES, GameMode, Tetromino, Inputs, Simulation
+)
 
 # Initialize Pygame
 pygame.init()
 
-# Constants
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 800
-BLOCK_SIZE = 40
-GRID_WIDTH = 10
-GRID_HEIGHT = 14
-GRID_OFFSET_X = 50  # 左边留50px边距
-GRID_OFFSET_Y = 80  # 顶部HUD区域
-FPS = 60
+FPS = 144  # Render cap; the simulation always advances in fixed TICK_MS steps
+MAX_FRAME_MS = 250  # Longest frame fed to the simulation, so a stall can't snowball
+DECORATIVE_COUNT = 50  # 背景漂浮粒子数量
+SCORE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scores.db')
+CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'checkpoint.tcc')
+CHECKPOINT_TICKS = 5 * 60  # Ticks between checkpoints of the game in progress
+CLAW_HEAD_SIZE = (81, 70)  # Sprite holding the claw below its rope
+CLAW_HEAD_CENTER = (40, 28)  # Claw position inside that sprite
+
+# Solver behind the hint overlay and the attract-mode demo; small, so a hint costs a few ms
+HINT_BEAM = 6
+HINT_DEPTH = 3
+HINT_COLOR = (240, 225, 150)
+ATTRACT_DELAY_MS = 20000  # Idle time on the main menu before the demo starts
 
-# EXIT box in bottom right corner of entire screen
-EXIT_BOX_WIDTH = 160
-EXIT_BOX_HEIGHT = 120
-EXIT_BOX_X = SCREEN_WIDTH - EXIT_BOX_WIDTH - 30
-EXIT_BOX_Y = SCREEN_HEIGHT - EXIT_BOX_HEIGHT - 40
+# VS mode: 2-4 local players share one board, each with (up, down, left, right, grab) keys
+VS_PLAYERS = 2
+MAX_PLAYERS = 4
+PLAYER_KEYS = (
+    (pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d, pygame.K_SPACE),
+    (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_RETURN),
+    (pygame.K_i, pygame.K_k, pygame.K_j, pygame.K_l, pygame.K_o),
+    (pygame.K_KP8, pygame.K_KP5, pygame.K_KP4, pygame.K_KP6, pygame.K_KP0),
+)
+PLAYER_CONTROLS = ("P1 WASD+SPACE", "P2 ARROWS+ENTER", "P3 IJKL+O", "P4 NUM 8456+0")
+PLAYER_COLORS = (MORANDI_BLUE, MORANDI_PINK, MORANDI_GREEN, MORANDI_YELLOW)
+VS_GRAB_KEYS = {keys[4]: player for player, keys in enumerate(PLAYER_KEYS) if player > 0}  # P1 grabs with SPACE
 
-# Colors - Morandi Color Palette (柔和、低饱和度)
+# Frame profiler: timed subsystems of Game.run (nested scopes are inclusive) and per-frame counters
+PROFILE_PHASES = ('events', 'update', 'draw', 'draw_decorative', 'draw_particles', 'flip')
+PROFILE_COUNTERS = ('ticks', 'particles', 'text_renders', 'surfaces_allocated')
+
+# Colors - Morandi Color Palette (柔和、低饱和度); shape colors live in simulation.py
 BLACK = (10, 10, 15)
 WHITE = (245, 245, 240)
-MORANDI_BLUE = (142, 171, 184)      # 莫兰迪蓝
-MORANDI_PINK = (216, 166, 166)      # 莫兰迪粉
-MORANDI_GREEN = (162, 180, 155)     # 莫兰迪绿
-MORANDI_PURPLE = (175, 159, 180)    # 莫兰迪紫
-MORANDI_YELLOW = (221, 202, 158)    # 莫兰迪黄
-MORANDI_ORANGE = (213, 166, 135)    # 莫兰迪橙
 MORANDI_GRAY = (180, 180, 175)      # 莫兰迪灰
 DARK_BG = (52, 55, 60)              # 深色背景
 DARKER_BG = (40, 43, 48)            # 更深背景
 GRID_COLOR = (80, 85, 90)           # 网格色
 HUD_BG = (60, 63, 68)               # HUD背景
 
-# Tetromino shapes with Morandi colors
-SHAPES = {
-    'I': {'blocks': [(0, 0), (1, 0), (2, 0), (3, 0)], 'color': MORANDI_BLUE},
-    'O': {'blocks': [(0, 0), (1, 0), (0, 1), (1, 1)], 'color': MORANDI_YELLOW},
-    'T': {'blocks': [(1, 0), (0, 1), (1, 1), (2, 1)], 'color': MORANDI_PURPLE},
-    'S': {'blocks': [(1, 0), (2, 0), (0, 1), (1, 1)], 'color': MORANDI_GREEN},
-    'Z': {'blocks': [(0, 0), (1, 0), (1, 1), (2, 1)], 'color': MORANDI_PINK},
-    'J': {'blocks': [(0, 0), (0, 1), (1, 1), (2, 1)], 'color': (130, 160, 175)},  # 浅莫兰迪蓝
-    'L': {'blocks': [(2, 0), (0, 1), (1, 1), (2, 1)], 'color': MORANDI_ORANGE}
-}
-
-
-class GameMode(Enum):
-    MENU = "menu"
-    MODE_SELECT = "mode_select"
-    ENDLESS = "endless"
-    TIME_ATTACK = "time_attack"
-    LEVELS = "levels"
-    VS_MODE = "vs_mode"
-    PAUSE = "pause"
-    GAME_OVER = "game_over"
-    LEVEL_COMPLETE = "level_complete"
-
-
-@dataclass
-class Tetromino:
-    x: float
-    y: float
-    shape_key: str
-    blocks: List[Tuple[int, int]]
-    color: Tuple[int, int, int]
-    grid_positions: List[Tuple[int, int]]
-
-
-@dataclass
-class Particle:
-    """粒子类 - 用于烟花和破碎效果"""
-    x: float
-    y: float
-    vx: float  # x方向速度
-    vy: float  # y方向速度
-    color: Tuple[int, int, int]
-    lifetime: int  # 生命周期（帧数）
-    size: int
-    particle_type: str  # 'firework' 或 'debris'
-
 
 def draw_glow_rect(surface, color, rect, glow_size=3, border_radius=5):
     """Draw a rectangle with subtle glow effect"""
@@ -123,571 +104,422 @@ def draw_gradient_bg(surface, color1, color2):
         pygame.draw.line(surface, color, (0, y), (surface.get_width(), y))
 
 
-class Claw:
-    def __init__(self, x: float, y: float):
-        self.x = x
-        self.y = y
-        self.target_x = x
-        self.target_y = y
-        self.speed = 5
-        self.auto_moving = False
-        self.state = 'idle'  # idle, lifting, moving_horizontal, releasing, returning
-        self.delivery_stage = 0  # 0: not delivering, 1: lift to top, 2: move to exit, 3: release, 4: piece falling
-        
-    def move_to(self, x: float, y: float):
-        self.target_x = x
-        self.target_y = y
-        
-    def update(self):
-        dx = self.target_x - self.x
-        dy = self.target_y - self.y
-        distance = (dx**2 + dy**2) ** 0.5
-        
-        if distance > self.speed:
-            self.x += (dx / distance) * self.speed
-            self.y += (dy / distance) * self.speed
-        elif distance > 0.5:
-            self.x += dx * 0.2
-            self.y += dy * 0.2
-        else:
-            self.x = self.target_x
-            self.y = self.target_y
-            return True  # Reached target
-        return False
-    
-    def draw(self, screen: pygame.Surface):
-        # 优雅的绳索 - 莫兰迪蓝色系
-        rope_color = MORANDI_BLUE
-        rope_shadow = tuple(max(0, c - 40) for c in rope_color)
-        
-        # 绳索阴影效果
-        pygame.draw.line(screen, rope_shadow,
-                        (int(self.x + 2), GRID_OFFSET_Y), 
-                        (int(self.x + 2), int(self.y - 18)), 5)
-        # 主绳索
-        pygame.draw.line(screen, rope_color, 
-                        (int(self.x), GRID_OFFSET_Y), 
-                        (int(self.x), int(self.y - 18)), 4)
-        
-        # 绳索高光
-        pygame.draw.line(screen, (200, 210, 220),
-                        (int(self.x - 1), GRID_OFFSET_Y), 
-                        (int(self.x - 1), int(self.y - 18)), 1)
-        
-        # 爪子主体 - 圆润设计
-        body_width = 50
-        body_height = 20
-        body_x = int(self.x - body_width/2)
-        body_y = int(self.y - 24)
-        
-        # 主体阴影
-        shadow_rect = pygame.Rect(body_x + 2, body_y + 2, body_width, body_height)
-        pygame.draw.rect(screen, (100, 110, 120), shadow_rect, border_radius=10)
-        
-        # 主体填充 - 莫兰迪紫色
-        body_rect = pygame.Rect(body_x, body_y, body_width, body_height)
-        pygame.draw.rect(screen, MORANDI_PURPLE, body_rect, border_radius=10)
-        
-        # 主体高光
-        highlight_rect = pygame.Rect(body_x + 5, body_y + 3, body_width - 10, 6)
-        highlight_surf = pygame.Surface((highlight_rect.width, highlight_rect.height), pygame.SRCALPHA)
-        for i in range(highlight_rect.height):
-            alpha = int(80 * (1 - i / highlight_rect.height))
-            pygame.draw.line(highlight_surf, (255, 255, 255, alpha), (0, i), (highlight_rect.width, i))
-        screen.blit(highlight_surf, highlight_rect.topleft)
-        
-        # 主体边框
-        border_color = tuple(max(0, c - 50) for c in MORANDI_PURPLE)
-        pygame.draw.rect(screen, border_color, body_rect, 2, border_radius=10)
-        
-        # 装饰线
-        deco_y = body_y + body_height // 2
-        pygame.draw.line(screen, border_color, (body_x + 10, deco_y), (body_x + body_width - 10, deco_y), 1)
-        
-        # 爪子臂 - 更流畅的曲线形状
-        arm_base_color = MORANDI_BLUE
-        arm_shadow = tuple(max(0, c - 40) for c in arm_base_color)
-        
-        # 左臂 - 更优雅的形状
-        left_points = [
-            (int(self.x - 18), int(self.y - 4)),
-            (int(self.x - 32), int(self.y + 30)),
-            (int(self.x - 27), int(self.y + 32)),
-            (int(self.x - 15), int(self.y - 2))
-        ]
-        
-        # 左臂阴影
-        left_shadow = [(p[0] + 1, p[1] + 1) for p in left_points]
-        pygame.draw.polygon(screen, arm_shadow, left_shadow)
-        
-        # 左臂主体
-        pygame.draw.polygon(screen, arm_base_color, left_points)
-        
-        # 左臂高光
-        left_highlight = [
-            (int(self.x - 16), int(self.y - 2)),
-            (int(self.x - 28), int(self.y + 28)),
-            (int(self.x - 26), int(self.y + 28)),
-            (int(self.x - 15), int(self.y - 1))
-        ]
-        pygame.draw.polygon(screen, (220, 230, 240), left_highlight)
-        
-        # 左臂边框
-        pygame.draw.polygon(screen, arm_shadow, left_points, 2)
-        
-        # 右臂
-        right_points = [
-            (int(self.x + 18), int(self.y - 4)),
-            (int(self.x + 32), int(self.y + 30)),
-            (int(self.x + 27), int(self.y + 32)),
-            (int(self.x + 15), int(self.y - 2))
-        ]
-        
-        # 右臂阴影
-        right_shadow = [(p[0] + 1, p[1] + 1) for p in right_points]
-        pygame.draw.polygon(screen, arm_shadow, right_shadow)
-        
-        # 右臂主体
-        pygame.draw.polygon(screen, arm_base_color, right_points)
-        
-        # 右臂高光
-        right_highlight = [
-            (int(self.x + 16), int(self.y - 2)),
-            (int(self.x + 28), int(self.y + 28)),
-            (int(self.x + 26), int(self.y + 28)),
-            (int(self.x + 15), int(self.y - 1))
-        ]
-        pygame.draw.polygon(screen, (220, 230, 240), right_highlight)
-        
-        # 右臂边框
-        pygame.draw.polygon(screen, arm_shadow, right_points, 2)
-        
-        # 爪子尖端 - 圆润的抓握点
-        tip_color = MORANDI_PINK
-        tip_shadow = tuple(max(0, c - 40) for c in tip_color)
-        
-        for pos in [(int(self.x - 29), int(self.y + 31)), (int(self.x + 29), int(self.y + 31))]:
-            # 阴影
-            pygame.draw.circle(screen, tip_shadow, (pos[0] + 1, pos[1] + 1), 6)
-            # 主体
-            pygame.draw.circle(screen, tip_color, pos, 6)
-            # 高光
-            pygame.draw.circle(screen, (240, 230, 235), (pos[0] - 1, pos[1] - 1), 3)
-            # 边框
-            pygame.draw.circle(screen, tip_shadow, pos, 6, 2)
+def build_tetromino_sprite(blocks, color):
+    """Pre-render a whole tetromino into one surface.
+    
+    Returns the sprite and the offset of its top-left corner from the piece
+    centre, so drawing a piece is a single blit.
+    """
+    max_x = max(b[0] for b in blocks)
+    max_y = max(b[1] for b in blocks)
+    center_offset_x = sum(b[0] for b in blocks) / len(blocks)
+    center_offset_y = sum(b[1] for b in blocks) / len(blocks)
+    
+    sprite = pygame.Surface(((max_x + 1) * BLOCK_SIZE, (max_y + 1) * BLOCK_SIZE), pygame.SRCALPHA)
+    block_size = BLOCK_SIZE - 4
+    border_color = tuple(max(0, c - 40) for c in color)
+    
+    # Subtle highlight on top, shared by every block
+    highlight_surf = pygame.Surface((block_size - 6, block_size // 3), pygame.SRCALPHA)
+    for i in range(highlight_surf.get_height()):
+        alpha = int(60 * (1 - i / highlight_surf.get_height()))
+        pygame.draw.line(highlight_surf, (255, 255, 255, alpha), (0, i), (highlight_surf.get_width(), i))
+    
+    for bx, by in blocks:
+        # Screen y grows downwards while block y grows upwards
+        rect = pygame.Rect(bx * BLOCK_SIZE + 2, (max_y - by) * BLOCK_SIZE + 2, block_size, block_size)
+        pygame.draw.rect(sprite, color, rect, border_radius=6)
+        sprite.blit(highlight_surf, (rect.x + 3, rect.y + 3))
+        pygame.draw.rect(sprite, border_color, rect, 2, border_radius=6)
+    
+    offset = (-center_offset_x * BLOCK_SIZE - BLOCK_SIZE / 2,
+              (center_offset_y - max_y) * BLOCK_SIZE - BLOCK_SIZE / 2)
+    return sprite.convert_alpha(), offset
+
+
+def build_hint_outline(blocks):
+    """Outline of a tetromino, laid out like its build_tetromino_sprite sprite"""
+    max_x = max(b[0] for b in blocks)
+    max_y = max(b[1] for b in blocks)
+    outline = pygame.Surface(((max_x + 1) * BLOCK_SIZE, (max_y + 1) * BLOCK_SIZE), pygame.SRCALPHA)
+    for bx, by in blocks:
+        rect = pygame.Rect(bx * BLOCK_SIZE, (max_y - by) * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+        pygame.draw.rect(outline, HINT_COLOR, rect, 3, border_radius=8)
+    return outline.convert_alpha()
+
+
+class TextCache:
+    """Font registry plus an LRU cache of rendered text surfaces"""
+    
+    def __init__(self, max_entries: int = 256):
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+    
+    def font(self, size: int) -> pygame.font.Font:
+        """Return the default font at the given size, loading it only once"""
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+        return font
+    
+    def render(self, font: pygame.font.Font, text: str, color, antialias: bool = True) -> pygame.Surface:
+        """Render text, reusing the surface if the same string was drawn recently"""
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+def draw_claw(screen: pygame.Surface, x: float, y: float):
+    """Draw the claw centred at (x, y)
+
+    The rope is filled and the head blitted from a sprite: unlike the draw
+    primitives, both give the same pixels with or without a clip rect, so a
+    dirty-rect repaint matches a full redraw.
+    """
+    x, y = int(x), int(y)
+    # 优雅的绳索 - 莫兰迪蓝色系
+    rope_color = MORANDI_BLUE
+    rope_shadow = tuple(max(0, c - 40) for c in rope_color)
+    top, bottom = sorted((GRID_OFFSET_Y, y - 18))
+    height = bottom - top + 1
+    
+    # 绳索阴影效果
+    screen.fill(rope_shadow, (x, top, 5, height))
+    # 主绳索
+    screen.fill(rope_color, (x - 1, top, 4, height))
+    # 绳索高光
+    screen.fill((200, 210, 220), (x - 1, top, 1, height))
+    
+    head = get_claw_head()
+    screen.blit(head, (x - CLAW_HEAD_CENTER[0], y - CLAW_HEAD_CENTER[1]))
+
+
+_claw_head = None
+
+
+def get_claw_head() -> pygame.Surface:
+    """The claw body, arms and tips, drawn once into a sprite"""
+    global _claw_head
+    if _claw_head is None:
+        sprite = pygame.Surface(CLAW_HEAD_SIZE, pygame.SRCALPHA)
+        draw_claw_head(sprite, *CLAW_HEAD_CENTER)
+        _claw_head = sprite.convert_alpha()
+    return _claw_head
+
+
+def draw_claw_head(screen: pygame.Surface, x: int, y: int):
+    """Draw everything below the rope for a claw centred at (x, y)"""
+    # 爪子主体 - 圆润设计
+    body_width = 50
+    body_height = 20
+    body_x = int(x - body_width/2)
+    body_y = int(y - 24)
+    
+    # 主体阴影
+    shadow_rect = pygame.Rect(body_x + 2, body_y + 2, body_width, body_height)
+    pygame.draw.rect(screen, (100, 110, 120), shadow_rect, border_radius=10)
+    
+    # 主体填充 - 莫兰迪紫色
+    body_rect = pygame.Rect(body_x, body_y, body_width, body_height)
+    pygame.draw.rect(screen, MORANDI_PURPLE, body_rect, border_radius=10)
+    
+    # 主体高光
+    highlight_rect = pygame.Rect(body_x + 5, body_y + 3, body_width - 10, 6)
+    highlight_surf = pygame.Surface((highlight_rect.width, highlight_rect.height), pygame.SRCALPHA)
+    for i in range(highlight_rect.height):
+        alpha = int(80 * (1 - i / highlight_rect.height))
+        pygame.draw.line(highlight_surf, (255, 255, 255, alpha), (0, i), (highlight_rect.width, i))
+    screen.blit(highlight_surf, highlight_rect.topleft)
+    
+    # 主体边框
+    border_color = tuple(max(0, c - 50) for c in MORANDI_PURPLE)
+    pygame.draw.rect(screen, border_color, body_rect, 2, border_radius=10)
+    
+    # 装饰线
+    deco_y = body_y + body_height // 2
+    pygame.draw.line(screen, border_color, (body_x + 10, deco_y), (body_x + body_width - 10, deco_y), 1)
+    
+    # 爪子臂 - 更流畅的曲线形状
+    arm_base_color = MORANDI_BLUE
+    arm_shadow = tuple(max(0, c - 40) for c in arm_base_color)
+    
+    # 左臂 - 更优雅的形状
+    left_points = [
+        (int(x - 18), int(y - 4)),
+        (int(x - 32), int(y + 30)),
+        (int(x - 27), int(y + 32)),
+        (int(x - 15), int(y - 2))
+    ]
+    
+    # 左臂阴影
+    left_shadow = [(p[0] + 1, p[1] + 1) for p in left_points]
+    pygame.draw.polygon(screen, arm_shadow, left_shadow)
+    
+    # 左臂主体
+    pygame.draw.polygon(screen, arm_base_color, left_points)
+    
+    # 左臂高光
+    left_highlight = [
+        (int(x - 16), int(y - 2)),
+        (int(x - 28), int(y + 28)),
+        (int(x - 26), int(y + 28)),
+        (int(x - 15), int(y - 1))
+    ]
+    pygame.draw.polygon(screen, (220, 230, 240), left_highlight)
+    
+    # 左臂边框
+    pygame.draw.polygon(screen, arm_shadow, left_points, 2)
+    
+    # 右臂
+    right_points = [
+        (int(x + 18), int(y - 4)),
+        (int(x + 32), int(y + 30)),
+        (int(x + 27), int(y + 32)),
+        (int(x + 15), int(y - 2))
+    ]
+    
+    # 右臂阴影
+    right_shadow = [(p[0] + 1, p[1] + 1) for p in right_points]
+    pygame.draw.polygon(screen, arm_shadow, right_shadow)
+    
+    # 右臂主体
+    pygame.draw.polygon(screen, arm_base_color, right_points)
+    
+    # 右臂高光
+    right_highlight = [
+        (int(x + 16), int(y - 2)),
+        (int(x + 28), int(y + 28)),
+        (int(x + 26), int(y + 28)),
+        (int(x + 15), int(y - 1))
+    ]
+    pygame.draw.polygon(screen, (220, 230, 240), right_highlight)
+    
+    # 右臂边框
+    pygame.draw.polygon(screen, arm_shadow, right_points, 2)
+    
+    # 爪子尖端 - 圆润的抓握点
+    tip_color = MORANDI_PINK
+    tip_shadow = tuple(max(0, c - 40) for c in tip_color)
+    
+    for pos in [(int(x - 29), int(y + 31)), (int(x + 29), int(y + 31))]:
+        # 阴影
+        pygame.draw.circle(screen, tip_shadow, (pos[0] + 1, pos[1] + 1), 6)
+        # 主体
+        pygame.draw.circle(screen, tip_color, pos, 6)
+        # 高光
+        pygame.draw.circle(screen, (240, 230, 235), (pos[0] - 1, pos[1] - 1), 3)
+        # 边框
+        pygame.draw.circle(screen, tip_shadow, pos, 6, 2)
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, seed=None, decorative_count: int = DECORATIVE_COUNT, dirty_rects: bool = False,
+                 replay_dir=None, profile_log=None, vs_players: int = VS_PLAYERS, score_db=None,
+                 checkpoint=None):
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Tetris Claw")
         self.clock = pygame.time.Clock()
         self.running = True
-        self.mode = GameMode.MENU
-        
-        # Game state
-        self.score = 0
-        self.high_scores = {
-            'endless': 0,
-            'time_attack': 0,
-            'levels': [0] * 10
-        }
-        self.tetrominoes: List[Tetromino] = []
-        self.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.claw = Claw(GRID_WIDTH * BLOCK_SIZE // 2 + GRID_OFFSET_X, 150 + GRID_OFFSET_Y)
-        self.grabbed_piece: Optional[Tetromino] = None
-        
-        # Timing
-        self.spawn_timer = 0
-        self.spawn_interval = 3500  # milliseconds - 降低生成速度
-        
-        # Time Attack mode
-        self.time_remaining = 60000  # 60 seconds in milliseconds
         
-        # Levels mode
-        self.current_level = 1
-        self.level_goal = 5
-        self.pieces_collected = 0
+        # Every random choice comes from streams seeded off one session seed,
+        # so a run is reproducible from the seed and the inputs
+        self.session_rng = random.Random(seed)
+        
+        # Game rules run in a display-independent simulation
+        self.sim = Simulation(seed)
+        
+        # Replay of the game in progress; finished ones are saved to replay_dir
+        self.replay = None
+        self.last_replay = None
+        self.replay_next_level = False
+        self.replay_dir = replay_dir
+        
+        # Persistent high scores and session log (written off the render thread)
+        self.scores = ScoreStore(score_db) if score_db else None
+        if self.scores:
+            self.sim.high_scores['endless'] = self.scores.best(GameMode.ENDLESS.value)
+            self.sim.high_scores['time_attack'] = self.scores.best(GameMode.TIME_ATTACK.value)
+            self.sim.high_scores['levels'] = [self.scores.best(GameMode.LEVELS.value, level) for level in range(1, 11)]
+        self.session_mode = None
+        self.session_seed = None
+        
+        # Crash-safe checkpoints of the game in progress (written off the render thread)
+        self.checkpoints = CheckpointWriter(checkpoint) if checkpoint else None
+        self.checkpoint_ticks = 0
+        
+        # Fixed-timestep loop state: unsimulated time, and where moving
+        # things were one tick ago so rendering can interpolate between ticks
+        self.accumulator = 0.0
+        self.render_alpha = 1.0
+        self.pending_grabs = set()  # Players whose grab key was pressed since the last tick
+        self.prev_claws = []
+        self.prev_pieces = []
+        
+        # Optional dirty-rect rendering: only changed regions are repainted and
+        # pushed to the display, instead of a full flip every frame
+        self.dirty_rects = dirty_rects
+        self.dirty_tracker = DirtyRectTracker(self.screen.get_rect())
+        
+        # Frame profiler (F3 toggles the overlay); frames go to profile_log if given
+        self.profiler = FrameProfiler(PROFILE_PHASES, PROFILE_COUNTERS)
+        if profile_log:
+            self.profiler.open_log(profile_log)
         
         # Mode selection
         self.selected_mode_index = 0
-        self.mode_options = ['ENDLESS', 'TIME ATTACK', 'LEVELS']
+        self.mode_options = ['ENDLESS', 'TIME ATTACK', 'LEVELS', 'VS']
+        self.vs_players = max(2, min(MAX_PLAYERS, vs_players))
         
         # EXIT box - positioned at bottom right of entire screen
         self.exit_box = pygame.Rect(EXIT_BOX_X, EXIT_BOX_Y, EXIT_BOX_WIDTH, EXIT_BOX_HEIGHT)
         
         # Particle system for effects
-        self.particles: List[Particle] = []
+        self.particles = ParticleSystem(seed=self.session_rng.getrandbits(32))
         
         # Decorative elements for the right side gap
-        self.decorative_particles = []
+        self.decorative_count = decorative_count
         self.init_decorative_elements()
         
         # Font
-        self.font_large = pygame.font.Font(None, 64)
-        self.font_medium = pygame.font.Font(None, 32)
-        self.font_small = pygame.font.Font(None, 24)
+        self.text_cache = TextCache()
+        self.font_large = self.text_cache.font(64)
+        self.font_medium = self.text_cache.font(32)
+        self.font_small = self.text_cache.font(24)
+        
+        # Pre-rendered static layers, keyed by (layer name, layout)
+        self.static_layers = {}
+        
+        # Tetromino sprite atlas: shape key -> (sprite, offset from piece centre)
+        self.tetromino_sprites = {
+            key: build_tetromino_sprite(shape['blocks'], shape['color'])
+            for key, shape in SHAPES.items()
+        }
+        self.hint_outlines = {key: build_hint_outline(shape['blocks']) for key, shape in SHAPES.items()}
+        
+        # Solver: hint overlay (H toggles it) and the attract-mode demo
+        self.solver = Solver(HINT_BEAM, HINT_DEPTH)
+        self.hints = HintWorker(Solver(HINT_BEAM, HINT_DEPTH))  # Searches off the render thread
+        self.show_hint = False
+        self.demo = None        # SolverBot playing the attract-mode demo
+        self.menu_sim = None    # The player's simulation, set aside while the demo runs
+        self.demo_seed = 0
+        self.idle_ms = 0.0      # Time spent on the main menu without a key press
     
-    def init_decorative_elements(self):
-        """初始化全屏背景漂浮粒子"""
-        import random
-        self.decorative_particles = []
-        
-        # 创建全屏背景漂浮粒子 - 增加数量，覆盖整个屏幕
-        for i in range(50):
-            x = random.uniform(20, SCREEN_WIDTH - 20)
-            y = random.uniform(20, SCREEN_HEIGHT - 20)
-            self.decorative_particles.append({
-                'x': x,
-                'y': y,
-                'base_y': y,
-                'speed': random.uniform(0.2, 0.6),
-                'amplitude': random.uniform(8, 25),
-                'phase': random.uniform(0, 6.28),
-                'size': random.randint(2, 4),
-                'color': random.choice([MORANDI_BLUE, MORANDI_PINK, MORANDI_PURPLE, MORANDI_GREEN, MORANDI_YELLOW]),
-                'alpha': random.randint(30, 80)  # 更低的透明度，作为柔和背景
-            })
-
-        
-    def spawn_tetromino(self):
-        """Spawn a tetromino from the bottom - stacking properly"""
-        shape_key = random.choice(list(SHAPES.keys()))
-        shape_data = SHAPES[shape_key]
-        blocks = shape_data['blocks']
-        
-        # Normalize blocks to start from (0, 0)
-        min_x = min(b[0] for b in blocks)
-        min_y = min(b[1] for b in blocks)
-        normalized_blocks = [(bx - min_x, by - min_y) for bx, by in blocks]
-        
-        # Get shape dimensions
-        max_x = max(b[0] for b in normalized_blocks)
-        max_y = max(b[1] for b in normalized_blocks)
-        shape_width = max_x + 1
-        shape_height = max_y + 1
-        
-        # Random column that keeps shape fully inside grid
-        if shape_width > GRID_WIDTH:
-            return  # Shape too wide
-        start_col = random.randint(0, GRID_WIDTH - shape_width)
-        
-        # Find the lowest position where this piece can rest
-        # Start from the bottom and move up until we find a valid position
-        spawn_row = GRID_HEIGHT - shape_height  # Start with piece at bottom
-        
-        # Check each block's column to find obstacles
-        for bx, by in normalized_blocks:
-            col = start_col + bx
-            
-            # Find the topmost occupied cell in this column
-            for row in range(GRID_HEIGHT):
-                if self.grid[row][col] is not None:
-                    # Found an obstacle at 'row'
-                    # This block (at offset 'by' from spawn_row) would be at spawn_row + by
-                    # We need spawn_row + by < row (piece must be above obstacle)
-                    # So spawn_row < row - by
-                    # Therefore spawn_row = row - by - 1
-                    max_spawn_row = row - by - 1
-                    spawn_row = min(spawn_row, max_spawn_row)
-                    break
-        
-        # Check if spawn position is valid
-        if spawn_row < 0:
-            return  # No space to spawn
-        
-        # Calculate screen position (center of shape)
-        center_x = max_x / 2.0
-        center_y = max_y / 2.0
-        spawn_x = (start_col + center_x) * BLOCK_SIZE + BLOCK_SIZE / 2 + GRID_OFFSET_X
-        spawn_y = (spawn_row + center_y) * BLOCK_SIZE + BLOCK_SIZE / 2 + GRID_OFFSET_Y
-        
-        # Create tetromino and mark grid
-        grid_positions = []
-        for bx, by in normalized_blocks:
-            grid_x = start_col + bx
-            grid_y = spawn_row + by
-            
-            if 0 <= grid_x < GRID_WIDTH and 0 <= grid_y < GRID_HEIGHT:
-                self.grid[grid_y][grid_x] = shape_key
-                grid_positions.append((grid_x, grid_y))
-        
-        if not grid_positions:
-            return  # Failed to place
-        
-        tetromino = Tetromino(
-            x=spawn_x,
-            y=spawn_y,
-            shape_key=shape_key,
-            blocks=normalized_blocks,  # Use normalized blocks
-            color=shape_data['color'],
-            grid_positions=grid_positions
-        )
-        
-        self.tetrominoes.append(tetromino)
+    @property
+    def mode(self) -> GameMode:
+        return self.sim.mode
     
-    def grab_piece(self):
-        """Try to grab a tetromino at claw position"""
-        if self.grabbed_piece:
-            return
-        
-        for tetromino in self.tetrominoes:
-            # Calculate bounds
-            min_x = tetromino.x + min(b[0] for b in tetromino.blocks) * BLOCK_SIZE - BLOCK_SIZE/2
-            max_x = tetromino.x + max(b[0] for b in tetromino.blocks) * BLOCK_SIZE + BLOCK_SIZE/2
-            min_y = tetromino.y - max(b[1] for b in tetromino.blocks) * BLOCK_SIZE - BLOCK_SIZE/2
-            max_y = tetromino.y - min(b[1] for b in tetromino.blocks) * BLOCK_SIZE + BLOCK_SIZE/2
-            
-            # Expanded grab area
-            if (min_x - 20 <= self.claw.x <= max_x + 20 and 
-                min_y - 20 <= self.claw.y <= max_y + 20):
-                self.grabbed_piece = tetromino
-                
-                # Start delivery sequence: Stage 1 - Lift vertically to top
-                self.claw.state = 'lifting'
-                self.claw.delivery_stage = 1
-                self.claw.auto_moving = True
-                self.claw.move_to(self.claw.x, GRID_OFFSET_Y + 50)  # Lift to top
-                
-                # Clear grid
-                for gx, gy in tetromino.grid_positions:
-                    if 0 <= gy < GRID_HEIGHT and 0 <= gx < GRID_WIDTH:
-                        self.grid[gy][gx] = None
-                
-                # 应用重力，让上方的方块下落
-                self.apply_gravity()
-                
-                break
-    
-    def apply_gravity(self):
-        """应用重力 - 让悬空的方块下落"""
-        # 对于每个方块，检查它下方是否有支撑
-        # 从下往上检查，确保下层方块先下落
-        changed = True
-        while changed:
-            changed = False
-            
-            for tetromino in self.tetrominoes:
-                if tetromino == self.grabbed_piece:
-                    continue
-                
-                # 检查这个方块是否可以下落
-                can_fall = self.check_can_fall(tetromino)
-                
-                if can_fall:
-                    # 清除当前位置
-                    for gx, gy in tetromino.grid_positions:
-                        if 0 <= gy < GRID_HEIGHT and 0 <= gx < GRID_WIDTH:
-                            self.grid[gy][gx] = None
-                    
-                    # 下落一行
-                    for i in range(len(tetromino.grid_positions)):
-                        gx, gy = tetromino.grid_positions[i]
-                        tetromino.grid_positions[i] = (gx, gy + 1)
-                    
-                    # 更新显示位置
-                    tetromino.y += BLOCK_SIZE
-                    
-                    # 在新位置放置
-                    for gx, gy in tetromino.grid_positions:
-                        if 0 <= gy < GRID_HEIGHT and 0 <= gx < GRID_WIDTH:
-                            self.grid[gy][gx] = tetromino.color
-                    
-                    changed = True
-    
-    def check_can_fall(self, tetromino):
-        """检查方块是否可以下落"""
-        # 检查每个块下方是否有障碍
-        for gx, gy in tetromino.grid_positions:
-            # 检查是否已经到达底部
-            if gy + 1 >= GRID_HEIGHT:
-                return False
-            
-            # 检查下方是否有其他方块（不是当前方块的一部分）
-            if self.grid[gy + 1][gx] is not None:
-                # 确保下方的方块不是自己的一部分
-                is_self = False
-                for check_gx, check_gy in tetromino.grid_positions:
-                    if check_gx == gx and check_gy == gy + 1:
-                        is_self = True
-                        break
-                
-                if not is_self:
-                    return False
-        
-        return True
+    @mode.setter
+    def mode(self, mode: GameMode):
+        self.sim.mode = mode
     
-    def deliver_piece(self):
-        """Handle piece delivery and falling animation"""
-        if not self.grabbed_piece:
-            return
-        
-        # Start the falling animation
-        self.grabbed_piece.falling = True
-        self.grabbed_piece.fall_speed = 0
-        self.grabbed_piece.target_y = self.exit_box.centery
-        
-        # Move to stage 4: piece is falling
-        self.claw.delivery_stage = 4
+    def get_static_layer(self, name: str) -> pygame.Surface:
+        """Return a cached static layer, rebuilding it only when the layout changes"""
+        key = (name, self.screen.get_size(), tuple(self.exit_box))
+        layer = self.static_layers.get(key)
+        if layer is None:
+            # Drop layers built for an old layout before caching the new one
+            for stale in [k for k in self.static_layers if k[0] == name]:
+                del self.static_layers[stale]
+            layer = self.build_static_layer(name)
+            self.static_layers[key] = layer
+        return layer
     
-    def update_falling_piece(self):
-        """Update falling piece animation"""
-        if self.grabbed_piece and hasattr(self.grabbed_piece, 'falling') and self.grabbed_piece.falling:
-            # Gravity acceleration
-            self.grabbed_piece.fall_speed += 0.5
-            self.grabbed_piece.y += self.grabbed_piece.fall_speed
-            
-            # Check if reached EXIT box
-            if self.grabbed_piece.y >= self.grabbed_piece.target_y:
-                self.grabbed_piece.y = self.grabbed_piece.target_y
-                
-                # Create particle effects - 破碎 + 烟花
-                self.create_shatter_effect(self.grabbed_piece.x, self.grabbed_piece.y, self.grabbed_piece.color)
-                self.create_firework_effect(self.grabbed_piece.x, self.grabbed_piece.y, self.grabbed_piece.color)
-                
-                # Complete delivery
-                self.tetrominoes.remove(self.grabbed_piece)
-                self.grabbed_piece = None
-                self.score += 100
-                
-                # Level mode piece collection
-                if self.mode == GameMode.LEVELS:
-                    self.pieces_collected += 1
-                    if self.pieces_collected >= self.level_goal:
-                        if self.current_level < 10:
-                            self.mode = GameMode.LEVEL_COMPLETE
-                        else:
-                            self.mode = GameMode.GAME_OVER
-                            if self.score > self.high_scores['levels'][self.current_level - 1]:
-                                self.high_scores['levels'][self.current_level - 1] = self.score
-                
-                # Reset claw
-                self.claw.auto_moving = False
-                self.claw.state = 'idle'
-                self.claw.delivery_stage = 0
-                self.claw.target_x = self.claw.x
-                self.claw.target_y = self.claw.y
+    def build_static_layer(self, name: str) -> pygame.Surface:
+        """Render a static layer into an off-screen surface"""
+        if name == 'background':
+            layer = pygame.Surface(self.screen.get_size()).convert()
+            draw_gradient_bg(layer, DARKER_BG, DARK_BG)
+        elif name == 'board':
+            layer = self.get_static_layer('background').copy()
+            self.draw_board_chrome(layer)
+        elif name == 'controls':
+            panel = self.get_controls_panel_rect()
+            # Labels overhang the nominal panel width, so the layer runs to the screen edge
+            size = (self.screen.get_width() - panel.x, panel.height)
+            layer = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+            # Transparent fill in the backdrop colour keeps antialiased edges from darkening
+            layer.fill((*DARK_BG, 0))
+            self.draw_controls_panel(layer, panel.width)
+        else:
+            raise ValueError(f"Unknown static layer: {name}")
+        return layer
+    
+    def init_decorative_elements(self):
+        """初始化全屏背景漂浮粒子"""
+        colors = [MORANDI_BLUE, MORANDI_PINK, MORANDI_PURPLE, MORANDI_GREEN, MORANDI_YELLOW]
+        self.decorative_particles = DecorativeField(self.decorative_count, SCREEN_WIDTH, SCREEN_HEIGHT, colors,
+                                                    seed=self.session_rng.getrandbits(32))
     
     def create_shatter_effect(self, x, y, color):
         """创建破碎效果 - 方块碎片向外飞散"""
-        import random
-        for i in range(15):  # 15个碎片
-            angle = random.uniform(0, 2 * 3.14159)
-            speed = random.uniform(2, 8)
-            vx = speed * math.cos(angle)
-            vy = speed * math.sin(angle) - random.uniform(2, 5)  # 向上飞
-            
-            particle = Particle(
-                x=x + random.uniform(-20, 20),
-                y=y + random.uniform(-20, 20),
-                vx=vx,
-                vy=vy,
-                color=color,
-                lifetime=random.randint(30, 50),
-                size=random.randint(3, 7),
-                particle_type='debris'
-            )
-            self.particles.append(particle)
+        self.particles.emit_shatter(x, y, color, 15)  # 15个碎片
     
     def create_firework_effect(self, x, y, color):
         """创建烟花效果 - 彩色粒子向上爆发"""
-        import random
         # 烟花颜色 - 莫兰迪色系
         firework_colors = [MORANDI_PINK, MORANDI_YELLOW, MORANDI_BLUE, MORANDI_PURPLE, MORANDI_GREEN]
-        
-        for i in range(30):  # 30个烟花粒子
-            angle = random.uniform(0, 2 * 3.14159)
-            speed = random.uniform(3, 10)
-            vx = speed * math.cos(angle)
-            vy = speed * math.sin(angle) - random.uniform(3, 8)  # 向上爆发
-            
-            particle = Particle(
-                x=x,
-                y=y,
-                vx=vx,
-                vy=vy,
-                color=random.choice(firework_colors),
-                lifetime=random.randint(40, 70),
-                size=random.randint(2, 5),
-                particle_type='firework'
-            )
-            self.particles.append(particle)
+        self.particles.emit_firework(x, y, firework_colors, 30)  # 30个烟花粒子
     
     def update_particles(self):
         """更新所有粒子"""
-        for particle in self.particles[:]:
-            # 更新位置
-            particle.x += particle.vx
-            particle.y += particle.vy
-            
-            # 重力影响
-            particle.vy += 0.3  # 重力加速度
-            
-            # 空气阻力
-            particle.vx *= 0.98
-            
-            # 减少生命
-            particle.lifetime -= 1
-            
-            # 移除死亡粒子
-            if particle.lifetime <= 0:
-                self.particles.remove(particle)
+        self.particles.update()
     
     def update_decorative_particles(self):
         """更新装饰粒子 - 漂浮效果"""
-        for p in self.decorative_particles:
-            # 正弦波漂浮
-            p['phase'] += p['speed'] * 0.05
-            p['y'] = p['base_y'] + math.sin(p['phase']) * p['amplitude']
+        self.decorative_particles.update()
     
     def draw_particles(self):
         """绘制所有粒子"""
-        for particle in self.particles:
-            # 根据剩余生命计算透明度
-            alpha = int(255 * (particle.lifetime / 70))
-            alpha = min(255, max(0, alpha))
-            
-            # 绘制粒子
-            if particle.particle_type == 'firework':
-                # 烟花粒子 - 发光效果
-                for i in range(2, 0, -1):
-                    glow_alpha = int(alpha * 0.5 * (1 - i / 2))
-                    pygame.draw.circle(self.screen, (*particle.color, glow_alpha), 
-                                     (int(particle.x), int(particle.y)), 
-                                     particle.size + i)
-                pygame.draw.circle(self.screen, (*particle.color, alpha), 
-                                 (int(particle.x), int(particle.y)), 
-                                 particle.size)
-            else:  # debris
-                # 碎片 - 方块状
-                rect = pygame.Rect(int(particle.x), int(particle.y), particle.size, particle.size)
-                surf = pygame.Surface((particle.size, particle.size), pygame.SRCALPHA)
-                surf.fill((*particle.color, alpha))
-                self.screen.blit(surf, rect)
-    
-    def draw_decorative_elements(self):
-        """绘制右侧装饰元素和操作说明"""
-        # 先绘制背景漂浮粒子
-        for p in self.decorative_particles:
-            # 绘制半透明粒子作为背景
-            surf = pygame.Surface((p['size'] * 2, p['size'] * 2), pygame.SRCALPHA)
-            pygame.draw.circle(surf, (*p['color'], p['alpha']), (p['size'], p['size']), p['size'])
-            self.screen.blit(surf, (int(p['x'] - p['size']), int(p['y'] - p['size'])))
-        
-        # 操作说明面板位置
+        self.particles.draw(self.screen)
+    
+    def decorative_entries(self):
+        """Scene entries for the floating background particles and the controls panel above them"""
+        entries = [
+            (('dot', i), sprite.get_rect(topleft=pos), sprite)
+            for i, (sprite, pos) in enumerate(zip(self.decorative_particles.sprite_list,
+                                                  self.decorative_particles.positions()))
+        ]
+        # 操作说明面板 (pre-rendered, drawn above the floating particles)
+        controls = self.get_static_layer('controls')
+        entries.append((('controls',), controls.get_rect(topleft=self.get_controls_panel_rect().topleft), controls))
+        return entries
+    
+    def get_controls_panel_rect(self) -> pygame.Rect:
+        """Screen area covered by the controls panel"""
         panel_x = GRID_OFFSET_X + GRID_WIDTH * BLOCK_SIZE + 25
         panel_width = EXIT_BOX_X - panel_x - 25
         panel_y = GRID_OFFSET_Y + 30
+        return pygame.Rect(panel_x, panel_y, panel_width, self.exit_box.y - panel_y)
+    
+    def draw_controls_panel(self, surface: pygame.Surface, panel_width: int):
+        """Draw the controls panel with its top-left corner at (0, 0)"""
+        panel_x = 0
+        panel_y = 0
         
         # 标题
-        title_font = pygame.font.Font(None, 28)
-        title_text = title_font.render("CONTROLS", True, MORANDI_PURPLE)
+        title_font = self.text_cache.font(28)
+        title_text = self.text_cache.render(title_font, "CONTROLS", MORANDI_PURPLE)
         title_rect = title_text.get_rect(centerx=panel_x + panel_width // 2, y=panel_y)
-        self.screen.blit(title_text, title_rect)
+        surface.blit(title_text, title_rect)
         
         # 分隔线
         line_y = title_rect.bottom + 10
-        pygame.draw.line(self.screen, MORANDI_PURPLE,
+        pygame.draw.line(surface, MORANDI_PURPLE,
                         (panel_x + 10, line_y),
                         (panel_x + panel_width - 10, line_y), 2)
         
@@ -698,40 +530,41 @@ class Game:
             ("A", "Move Left"),
             ("D", "Move Right"),
             ("SPACE", "Grab/Drop"),
+            ("H", "Hint"),
             ("ESC", "Menu")
         ]
         
-        key_font = pygame.font.Font(None, 24)
-        desc_font = pygame.font.Font(None, 20)
+        key_font = self.text_cache.font(24)
+        desc_font = self.text_cache.font(20)
         
         y_offset = line_y + 20
         for key, desc in controls:
             # 按键背景框
-            key_text = key_font.render(key, True, WHITE)
+            key_text = self.text_cache.render(key_font, key, WHITE)
             key_width = max(60, key_text.get_width() + 16)
             key_rect = pygame.Rect(panel_x + 10, y_offset, key_width, 32)
             
             # 绘制按键框 - 莫兰迪风格
-            pygame.draw.rect(self.screen, (45, 50, 58), key_rect, border_radius=6)
-            pygame.draw.rect(self.screen, MORANDI_BLUE, key_rect, 2, border_radius=6)
+            pygame.draw.rect(surface, (45, 50, 58), key_rect, border_radius=6)
+            pygame.draw.rect(surface, MORANDI_BLUE, key_rect, 2, border_radius=6)
             
             # 按键文字
             key_text_rect = key_text.get_rect(center=key_rect.center)
-            self.screen.blit(key_text, key_text_rect)
+            surface.blit(key_text, key_text_rect)
             
             # 说明文字
-            desc_text = desc_font.render(desc, True, MORANDI_GRAY)
+            desc_text = self.text_cache.render(desc_font, desc, MORANDI_GRAY)
             desc_rect = desc_text.get_rect(left=key_rect.right + 12, centery=key_rect.centery)
-            self.screen.blit(desc_text, desc_rect)
+            surface.blit(desc_text, desc_rect)
             
             y_offset += 45
         
         # 底部提示 - 指向EXIT的箭头
         tip_y = y_offset + 20
-        tip_font = pygame.font.Font(None, 18)
-        tip_text = tip_font.render("Deliver pieces to", True, (120, 130, 145))
+        tip_font = self.text_cache.font(18)
+        tip_text = self.text_cache.render(tip_font, "Deliver pieces to", (120, 130, 145))
         tip_rect = tip_text.get_rect(centerx=panel_x + panel_width // 2, y=tip_y)
-        self.screen.blit(tip_text, tip_rect)
+        surface.blit(tip_text, tip_rect)
         
         # 箭头指向EXIT
         arrow_y = tip_rect.bottom + 15
@@ -740,57 +573,67 @@ class Game:
             (panel_x + panel_width // 2 - 6, arrow_y + 12),
             (panel_x + panel_width // 2 + 6, arrow_y + 12)
         ]
-        pygame.draw.polygon(self.screen, MORANDI_GREEN, arrow_points)
+        pygame.draw.polygon(surface, MORANDI_GREEN, arrow_points)
     
-    def draw_tetromino(self, tetromino: Tetromino):
-        """Draw a tetromino with clean, simple style"""
-        for bx, by in tetromino.blocks:
-            center_offset_x = sum(b[0] for b in tetromino.blocks) / len(tetromino.blocks)
-            center_offset_y = sum(b[1] for b in tetromino.blocks) / len(tetromino.blocks)
-            
-            x = tetromino.x + (bx - center_offset_x) * BLOCK_SIZE
-            y = tetromino.y - (by - center_offset_y) * BLOCK_SIZE
-            
-            # Block rect
-            block_size = BLOCK_SIZE - 4
-            rect = pygame.Rect(x - block_size/2, y - block_size/2, block_size, block_size)
-            
-            # Simple filled rect with subtle border
-            pygame.draw.rect(self.screen, tetromino.color, rect, border_radius=6)
-            
-            # Subtle highlight on top
-            highlight_rect = pygame.Rect(rect.x + 3, rect.y + 3, rect.width - 6, rect.height // 3)
-            highlight_surf = pygame.Surface((highlight_rect.width, highlight_rect.height), pygame.SRCALPHA)
-            for i in range(highlight_rect.height):
-                alpha = int(60 * (1 - i / highlight_rect.height))
-                pygame.draw.line(highlight_surf, (255, 255, 255, alpha), (0, i), (highlight_rect.width, i))
-            self.screen.blit(highlight_surf, highlight_rect.topleft)
-            
-            # Border
-            border_color = tuple(max(0, c - 40) for c in tetromino.color)
-            pygame.draw.rect(self.screen, border_color, rect, 2, border_radius=6)
+    def tetromino_entry(self, tetromino: Tetromino, pos=None):
+        """Scene entry for a tetromino's pre-rendered sprite, centred at pos (default: its own position)"""
+        x, y = pos if pos else (tetromino.x, tetromino.y)
+        sprite, (offset_x, offset_y) = self.tetromino_sprites[tetromino.shape_key]
+        rect = sprite.get_rect(topleft=(int(x + offset_x), int(y + offset_y)))
+        return ('piece', tetromino.piece_id), rect, sprite
+    
+    def hint_entry(self):
+        """Scene entry outlining the piece the solver would grab next, or None.
+
+        A new hint is requested from the background solver only when a piece
+        spawns or leaves the board; until it finishes, the last finished hint
+        is drawn. During the demo it shows the piece the bot is going for.
+        """
+        sim = self.sim
+        if self.demo:
+            piece_id = self.demo.target
+        else:
+            if len(sim.claws) > 1 or sim.claw.auto_moving:
+                return None
+            self.hints.request((sim.next_piece_id, len(sim.board.pieces)), sim)
+            hint = self.hints.result
+            if hint is None:
+                return None
+            piece_id = hint[1]
+        piece = sim.pieces_by_id.get(piece_id)
+        if piece is None or piece.piece_id not in sim.board.pieces:
+            return None
+        sprite, (offset_x, offset_y) = self.tetromino_sprites[piece.shape_key]
+        rect = sprite.get_rect(topleft=(int(piece.x + offset_x), int(piece.y + offset_y)))
+        return ('hint', piece.piece_id), rect, self.hint_outlines[piece.shape_key]
+    
+    def render_pos(self, obj, prev):
+        """Position of obj interpolated between the previous and the latest tick"""
+        if prev is None or prev[0] is not obj:
+            return obj.x, obj.y
+        a = self.render_alpha
+        return prev[1] + (obj.x - prev[1]) * a, prev[2] + (obj.y - prev[2]) * a
     
     def draw_menu(self):
         """Draw main menu with clean, professional design"""
-        import math, time
         
         # Simple gradient background
-        draw_gradient_bg(self.screen, DARKER_BG, DARK_BG)
+        self.screen.blit(self.get_static_layer('background'), (0, 0))
         
         # Clean title
         current_time = time.time()
         pulse = (math.sin(current_time * 1.5) + 1) / 2
         
         # Main title - simple and clean
-        title_font = pygame.font.Font(None, 72)
+        title_font = self.text_cache.font(72)
         title_text = "TETRIS CLAW"
-        title = title_font.render(title_text, True, (220, 230, 250))
+        title = self.text_cache.render(title_font, title_text, (220, 230, 250))
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 200))
         self.screen.blit(title, title_rect)
         
         # Subtle subtitle
-        subtitle_font = pygame.font.Font(None, 24)
-        subtitle = subtitle_font.render("Master the Perfect Drop", True, (140, 150, 180))
+        subtitle_font = self.text_cache.font(24)
+        subtitle = self.text_cache.render(subtitle_font, "Master the Perfect Drop", (140, 150, 180))
         subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, 270))
         self.screen.blit(subtitle, subtitle_rect)
         
@@ -808,28 +651,28 @@ class Game:
         self.screen.blit(button_surf, (button_rect.x, button_rect.y))
         
         # Button text
-        button_font = pygame.font.Font(None, 32)
-        play_text = button_font.render("PRESS SPACE TO START", True, (180, 200, 240))
+        button_font = self.text_cache.font(32)
+        play_text = self.text_cache.render(button_font, "PRESS SPACE TO START", (180, 200, 240))
         play_rect = play_text.get_rect(center=button_rect.center)
         self.screen.blit(play_text, play_rect)
         
         # Quit text
-        quit_font = pygame.font.Font(None, 20)
-        quit_text = quit_font.render("Press ESC to quit", True, (100, 110, 130))
+        quit_font = self.text_cache.font(20)
+        quit_text = self.text_cache.render(quit_font, "Press ESC to quit", (100, 110, 130))
         quit_rect = quit_text.get_rect(center=(SCREEN_WIDTH // 2, 720))
         self.screen.blit(quit_text, quit_rect)
     
     def draw_mode_select(self):
         """Draw mode selection screen with modern design"""
         # Gradient background
-        draw_gradient_bg(self.screen, DARKER_BG, DARK_BG)
+        self.screen.blit(self.get_static_layer('background'), (0, 0))
         
         # Title with glow
-        title = self.font_large.render("SELECT MODE", True, WHITE)
+        title = self.text_cache.render(self.font_large, "SELECT MODE", WHITE)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 100))
         
         for offset in [(2, 2), (-2, 2), (2, -2), (-2, -2)]:
-            glow = self.font_large.render("SELECT MODE", True, (*MORANDI_PURPLE, 80))
+            glow = self.text_cache.render(self.font_large, "SELECT MODE", (*MORANDI_PURPLE, 80))
             self.screen.blit(glow, (title_rect.x + offset[0], title_rect.y + offset[1]))
         
         self.screen.blit(title, title_rect)
@@ -857,77 +700,73 @@ class Game:
                 hs_color = (120, 120, 140)
             
             # Mode name with glow if selected
-            mode_text = self.font_medium.render(mode_name, True, text_color)
+            mode_text = self.text_cache.render(self.font_medium, mode_name, text_color)
             mode_rect = mode_text.get_rect(center=(SCREEN_WIDTH // 2, y_pos))
             
             if i == self.selected_mode_index:
                 for offset in [(1, 1), (-1, 1), (1, -1), (-1, -1)]:
-                    glow = self.font_medium.render(mode_name, True, (*MORANDI_BLUE, 100))
+                    glow = self.text_cache.render(self.font_medium, mode_name, (*MORANDI_BLUE, 100))
                     self.screen.blit(glow, (mode_rect.x + offset[0], mode_rect.y + offset[1]))
             
             self.screen.blit(mode_text, mode_rect)
             
-            # High score
+            # High score (kept in memory by the score store, so no query per frame)
             if mode_name == 'ENDLESS':
-                hs = self.high_scores['endless']
+                hs = self.best_score(GameMode.ENDLESS)
             elif mode_name == 'TIME ATTACK':
-                hs = self.high_scores['time_attack']
+                hs = self.best_score(GameMode.TIME_ATTACK)
+            elif mode_name == 'LEVELS':
+                hs = self.best_score(GameMode.LEVELS)
             else:
-                hs = max(self.high_scores['levels'])
+                hs = None
             
-            hs_text = self.font_small.render(f"Best: {hs}", True, hs_color)
+            caption = f"Best: {hs}" if hs is not None else f"{self.vs_players} players"
+            hs_text = self.text_cache.render(self.font_small, caption, hs_color)
             hs_rect = hs_text.get_rect(center=(SCREEN_WIDTH // 2, y_pos + 25))
             self.screen.blit(hs_text, hs_rect)
         
         # Instructions
-        inst_text = self.font_small.render("W/S: Select | SPACE: Confirm | ESC: Back", True, MORANDI_GRAY)
+        inst_text = self.text_cache.render(self.font_small, "W/S: Select | SPACE: Confirm | ESC: Back", MORANDI_GRAY)
         inst_rect = inst_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50))
         self.screen.blit(inst_text, inst_rect)
     
-    def draw_game(self):
-        """Draw game screen with clean design"""
-        # Simple gradient background
-        draw_gradient_bg(self.screen, DARKER_BG, DARK_BG)
-        
+    def draw_board_chrome(self, surface: pygame.Surface):
+        """Draw the static parts of the game screen: HUD bar, grid, danger line and EXIT box"""
         # HUD area
         hud_bg = pygame.Rect(0, 0, SCREEN_WIDTH, GRID_OFFSET_Y)
-        pygame.draw.rect(self.screen, (30, 35, 42), hud_bg)
-        pygame.draw.line(self.screen, MORANDI_BLUE, 
+        pygame.draw.rect(surface, (30, 35, 42), hud_bg)
+        pygame.draw.line(surface, MORANDI_BLUE, 
                         (0, GRID_OFFSET_Y - 2), 
                         (SCREEN_WIDTH, GRID_OFFSET_Y - 2), 3)
         
         # Grid area with border
         grid_bg = pygame.Rect(GRID_OFFSET_X, GRID_OFFSET_Y, 
                              GRID_WIDTH * BLOCK_SIZE, GRID_HEIGHT * BLOCK_SIZE)
-        pygame.draw.rect(self.screen, (18, 20, 26), grid_bg)
+        pygame.draw.rect(surface, (18, 20, 26), grid_bg)
         
         # Grid outer border - 莫兰迪色
-        pygame.draw.rect(self.screen, MORANDI_PURPLE, grid_bg, 3, border_radius=2)
+        pygame.draw.rect(surface, MORANDI_PURPLE, grid_bg, 3, border_radius=2)
         
         # Subtle inner shadow
         shadow_rect = pygame.Rect(GRID_OFFSET_X + 3, GRID_OFFSET_Y + 3,
                                  GRID_WIDTH * BLOCK_SIZE - 6, GRID_HEIGHT * BLOCK_SIZE - 6)
-        pygame.draw.rect(self.screen, (25, 28, 34), shadow_rect, 1)
+        pygame.draw.rect(surface, (25, 28, 34), shadow_rect, 1)
         
         # Simple grid lines - more subtle
         for x in range(1, GRID_WIDTH):  # Skip outer edges
             line_x = x * BLOCK_SIZE + GRID_OFFSET_X
-            pygame.draw.line(self.screen, (35, 40, 50), 
+            pygame.draw.line(surface, (35, 40, 50), 
                            (line_x, GRID_OFFSET_Y + 3), 
                            (line_x, GRID_HEIGHT * BLOCK_SIZE + GRID_OFFSET_Y - 3))
         for y in range(1, GRID_HEIGHT):  # Skip outer edges
             line_y = y * BLOCK_SIZE + GRID_OFFSET_Y
-            pygame.draw.line(self.screen, (35, 40, 50), 
+            pygame.draw.line(surface, (35, 40, 50), 
                            (GRID_OFFSET_X + 3, line_y), 
                            (GRID_WIDTH * BLOCK_SIZE + GRID_OFFSET_X - 3, line_y))
         
-        # Danger line with pulsing effect
-        import math
-        import time
-        pulse = (math.sin(time.time() * 3) + 1) / 2
-        danger_y = 3 * BLOCK_SIZE + GRID_OFFSET_Y
-        danger_alpha = int(140 + pulse * 80)
-        pygame.draw.line(self.screen, MORANDI_PINK, 
+        # Danger line
+        danger_y = DANGER_LINE_ROW * BLOCK_SIZE + GRID_OFFSET_Y
+        pygame.draw.line(surface, MORANDI_PINK, 
                         (GRID_OFFSET_X + 5, danger_y), 
                         (GRID_WIDTH * BLOCK_SIZE + GRID_OFFSET_X - 5, danger_y), 3)
         
@@ -935,28 +774,28 @@ class Game:
         # Shadow
         exit_shadow = pygame.Rect(self.exit_box.x + 3, self.exit_box.y + 3, 
                                  self.exit_box.width, self.exit_box.height)
-        pygame.draw.rect(self.screen, (20, 25, 30), exit_shadow, border_radius=12)
+        pygame.draw.rect(surface, (20, 25, 30), exit_shadow, border_radius=12)
         
         # Main box
-        pygame.draw.rect(self.screen, (35, 42, 48), self.exit_box, border_radius=12)
+        pygame.draw.rect(surface, (35, 42, 48), self.exit_box, border_radius=12)
         
         # Inner highlight
         inner_rect = pygame.Rect(self.exit_box.x + 8, self.exit_box.y + 8,
                                 self.exit_box.width - 16, self.exit_box.height - 16)
-        pygame.draw.rect(self.screen, (45, 52, 58), inner_rect, border_radius=8)
+        pygame.draw.rect(surface, (45, 52, 58), inner_rect, border_radius=8)
         
         # Border - 莫兰迪绿色
-        pygame.draw.rect(self.screen, MORANDI_GREEN, self.exit_box, 4, border_radius=12)
+        pygame.draw.rect(surface, MORANDI_GREEN, self.exit_box, 4, border_radius=12)
         
         # EXIT text with shadow
-        exit_font = pygame.font.Font(None, 48)
-        exit_shadow_text = exit_font.render("EXIT", True, (60, 70, 75))
+        exit_font = self.text_cache.font(48)
+        exit_shadow_text = self.text_cache.render(exit_font, "EXIT", (60, 70, 75))
         exit_shadow_rect = exit_shadow_text.get_rect(center=(self.exit_box.centerx + 2, self.exit_box.centery + 2))
-        self.screen.blit(exit_shadow_text, exit_shadow_rect)
+        surface.blit(exit_shadow_text, exit_shadow_rect)
         
-        exit_text = exit_font.render("EXIT", True, MORANDI_GREEN)
+        exit_text = self.text_cache.render(exit_font, "EXIT", MORANDI_GREEN)
         exit_rect = exit_text.get_rect(center=self.exit_box.center)
-        self.screen.blit(exit_text, exit_rect)
+        surface.blit(exit_text, exit_rect)
         
         # Decorative corner dots
         dot_positions = [
@@ -966,41 +805,74 @@ class Game:
             (self.exit_box.right - 12, self.exit_box.bottom - 12)
         ]
         for pos in dot_positions:
-            pygame.draw.circle(self.screen, MORANDI_GREEN, pos, 3)
-        
-        # Draw decorative elements in the gap
-        self.draw_decorative_elements()
-        
-        # Draw tetrominoes
-        for tetromino in self.tetrominoes:
-            if tetromino != self.grabbed_piece:
-                self.draw_tetromino(tetromino)
-        
-        # Draw grabbed piece (follows claw unless falling)
-        if self.grabbed_piece:
-            if hasattr(self.grabbed_piece, 'falling') and self.grabbed_piece.falling:
-                # Piece is falling - don't update position, it updates itself
-                pass
-            else:
-                # Piece follows claw
-                self.grabbed_piece.x = self.claw.x
-                self.grabbed_piece.y = self.claw.y + 40
-            
-            self.draw_tetromino(self.grabbed_piece)
-        
-        # Draw claw
-        self.claw.draw(self.screen)
-        
-        # Draw particles (烟花和破碎效果)
-        self.draw_particles()
-        
-        # HUD - Score
-        score_text = self.font_medium.render(f"SCORE: {self.score}", True, (200, 210, 230))
-        self.screen.blit(score_text, (20, 20))
+            pygame.draw.circle(surface, MORANDI_GREEN, pos, 3)
+    
+    def claw_rect(self, x: int, y: int) -> pygame.Rect:
+        """Screen area draw_claw can touch for a claw at (x, y), rope included"""
+        top = min(GRID_OFFSET_Y, y - 28) - 2
+        return pygame.Rect(x - 40, top, 81, y + 42 - top)
+    
+    def text_entry(self, name, font, text, color, **position):
+        """Scene entry for a cached text surface placed with get_rect keywords"""
+        surface = self.text_cache.render(font, text, color)
+        return (name, text, color), surface.get_rect(**position), surface
+    
+    def game_entries(self):
+        """Everything draw_game puts over the board layer, in drawing order.
+
+        Each entry is (key, rect, surface). The key names the entity and its
+        appearance, rect is its screen area, and surface is None for entries
+        drawn procedurally (claw, particles).
+        """
+        entries = self.decorative_entries()
+        
+        claws = self.sim.claws
+        vs = len(claws) > 1
+        
+        # Tetrominoes
+        grabbed = [claw.grabbed_piece for claw in claws if claw.grabbed_piece]
+        grabbed_ids = {piece.piece_id for piece in grabbed}
+        for tetromino in self.sim.tetrominoes:
+            if tetromino.piece_id not in grabbed_ids:
+                entries.append(self.tetromino_entry(tetromino))
+        
+        # Suggested next grab
+        if self.show_hint or self.demo:
+            hint = self.hint_entry()
+            if hint:
+                entries.append(hint)
+        
+        # Grabbed pieces (the simulation keeps them under their claws until they fall)
+        prev_pieces = {prev[0].piece_id: prev for prev in self.prev_pieces}
+        for piece in grabbed:
+            entries.append(self.tetromino_entry(piece, self.render_pos(piece, prev_pieces.get(piece.piece_id))))
+        
+        # Claws, labelled by player in VS mode
+        for claw, prev in zip(claws, self.prev_claws or [None] * len(claws)):
+            claw_x, claw_y = self.render_pos(claw, prev)
+            claw_x, claw_y = int(claw_x), int(claw_y)
+            entries.append((('claw', claw_x, claw_y), self.claw_rect(claw_x, claw_y), None))
+            if vs:
+                entries.append(self.text_entry(('player', claw.player), self.font_small, f"P{claw.player + 1}",
+                                               PLAYER_COLORS[claw.player], center=(claw_x, claw_y - 38)))
+        
+        # Particles (烟花和破碎效果), tracked per screen tile and repainted whenever they change
+        version = self.particles.version
+        for rect in self.particles.tile_rects():
+            entries.append((('particles', version, rect.topleft), rect, None))
+        
+        # HUD - Score (one per player in VS mode)
+        if vs:
+            for player, score in enumerate(self.sim.player_scores):
+                entries.append(self.text_entry(('score', player), self.font_medium, f"P{player + 1}: {score}",
+                                               PLAYER_COLORS[player], topleft=(20 + player * 150, 20)))
+        else:
+            entries.append(self.text_entry('score', self.font_medium, f"SCORE: {self.sim.score}", (200, 210, 230),
+                                           topleft=(20, 20)))
         
         # Mode-specific UI
-        if self.mode == GameMode.TIME_ATTACK:
-            seconds = self.time_remaining // 1000
+        if self.mode in (GameMode.TIME_ATTACK, GameMode.VS_MODE):
+            seconds = int(self.sim.time_remaining // 1000)
             if seconds > 20:
                 time_color = (100, 180, 220)
             elif seconds > 10:
@@ -1008,48 +880,135 @@ class Game:
             else:
                 time_color = (220, 100, 120)
             
-            time_text = self.font_medium.render(f"TIME: {seconds}s", True, time_color)
-            time_rect = time_text.get_rect(right=SCREEN_WIDTH - 20, y=20)
-            self.screen.blit(time_text, time_rect)
+            entries.append(self.text_entry('time', self.font_medium, f"TIME: {seconds}s", time_color,
+                                           right=SCREEN_WIDTH - 20, y=20))
         
         elif self.mode == GameMode.LEVELS:
-            level_text = self.font_medium.render(f"LEVEL {self.current_level}", True, (180, 150, 220))
-            level_rect = level_text.get_rect(right=SCREEN_WIDTH - 20, y=15)
-            self.screen.blit(level_text, level_rect)
-            
-            progress_text = self.font_small.render(f"{self.pieces_collected}/{self.level_goal}", True, (150, 150, 180))
-            progress_rect = progress_text.get_rect(right=SCREEN_WIDTH - 20, y=45)
-            self.screen.blit(progress_text, progress_rect)
+            entries.append(self.text_entry('level', self.font_medium, f"LEVEL {self.sim.current_level}", (180, 150, 220),
+                                           right=SCREEN_WIDTH - 20, y=15))
+            entries.append(self.text_entry('progress', self.font_small, f"{self.sim.pieces_collected}/{self.sim.level_goal}",
+                                           (150, 150, 180), right=SCREEN_WIDTH - 20, y=45))
         
         # Instructions at bottom
-        inst_text = self.font_small.render("WASD: Move | SPACE: Grab | ESC: Menu", True, (120, 130, 150))
-        inst_rect = inst_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 20))
-        self.screen.blit(inst_text, inst_rect)
+        if self.demo:
+            instructions = "DEMO - PRESS ANY KEY"
+        elif vs:
+            instructions = " | ".join(PLAYER_CONTROLS[:len(claws)])
+        else:
+            instructions = "WASD: Move | SPACE: Grab | H: Hint | ESC: Menu"
+        entries.append(self.text_entry('instructions', self.font_small, instructions,
+                                       (120, 130, 150), center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 20)))
+        
+        if self.profiler.visible:
+            entries.append(self.profiler_entry())
+        return entries
+    
+    def profiler_entry(self):
+        """Scene entry for the profiler overlay; its key changes every frame"""
+        overlay = self.profiler.render_overlay(self.text_cache, self.text_cache.font(18))
+        return ('profiler', self.profiler.frames), overlay.get_rect(bottomleft=(10, SCREEN_HEIGHT - 40)), overlay
+    
+    def allocated_surfaces(self) -> int:
+        """Surfaces created so far by the render caches"""
+        return (self.text_cache.misses + len(self.static_layers) + len(self.particles.sprites)
+                + len(self.decorative_particles.sprites))
+    
+    def draw_entries(self, entries):
+        """Draw scene entries in order"""
+        batch = []
+        particles_drawn = False
+        for key, rect, surface in entries:
+            if surface is not None:
+                batch.append((surface, rect))
+                continue
+            # Procedural entries must keep their place in the layering
+            if batch:
+                self.screen.blits(batch, doreturn=False)
+                batch = []
+            if key[0] == 'claw':
+                draw_claw(self.screen, key[1], key[2])
+            elif key[0] == 'particles' and not particles_drawn:
+                # One pass draws every particle, whichever tile triggered it
+                with self.profiler.scope('draw_particles'):
+                    self.draw_particles()
+                particles_drawn = True
+        if batch:
+            self.screen.blits(batch, doreturn=False)
+    
+    def draw_game(self):
+        """Draw game screen with clean design"""
+        # Background, HUD bar, grid and EXIT box are pre-rendered
+        self.screen.blit(self.get_static_layer('board'), (0, 0))
+        self.draw_game_entries(self.game_entries())
+    
+    def draw_game_entries(self, entries):
+        """Draw game_entries(), timing the background particles on their own"""
+        split = len(self.decorative_particles) + 1
+        with self.profiler.scope('draw_decorative'):
+            self.draw_entries(entries[:split])
+        self.draw_entries(entries[split:])
+    
+    def draw_game_dirty(self):
+        """Repaint only what changed since the last frame and return the dirty rects.
+
+        Each dirty rect is restored and redrawn on its own with the screen
+        clipped to it. Translucent entries (text, the controls panel, hint
+        outlines) reaching outside the rect would otherwise be composited
+        again over last frame's pixels there, and overlapping rects would
+        draw them twice.
+        """
+        entries = self.game_entries()
+        dirty = self.dirty_tracker.update((key, rect) for key, rect, _ in entries)
+        board = self.get_static_layer('board')
+        rects = [rect for _, rect, _ in entries]
+        split = len(self.decorative_particles) + 1
+        screen = self.screen
+        for dirty_rect in dirty:
+            screen.set_clip(dirty_rect)
+            screen.blit(board, dirty_rect, dirty_rect)
+            hits = dirty_rect.collidelistall(rects)
+            with self.profiler.scope('draw_decorative'):
+                self.draw_entries([entries[i] for i in hits if i < split])
+            self.draw_entries([entries[i] for i in hits if i >= split])
+        screen.set_clip(None)
+        return dirty
     
     def draw_game_over(self):
         """Draw game over screen"""
         self.screen.fill(BLACK)
         
-        title = self.font_large.render("GAME OVER", True, MORANDI_PINK)
+        title = self.text_cache.render(self.font_large, "GAME OVER", MORANDI_PINK)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 200))
         self.screen.blit(title, title_rect)
         
-        score_text = self.font_medium.render(f"Final Score: {self.score}", True, WHITE)
+        score_text = self.text_cache.render(self.font_medium, f"Final Score: {self.sim.score}", WHITE)
         score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, 350))
         self.screen.blit(score_text, score_rect)
         
-        # Show appropriate high score
-        if self.mode == GameMode.TIME_ATTACK or self.mode == GameMode.GAME_OVER:
+        # VS results, or the appropriate high score
+        if self.sim.players > 1:
+            scores = self.sim.player_scores
+            best = max(scores)
+            leaders = [player for player, score in enumerate(scores) if score == best]
+            if len(leaders) == 1:
+                result = self.text_cache.render(self.font_medium, f"P{leaders[0] + 1} WINS!", PLAYER_COLORS[leaders[0]])
+            else:
+                result = self.text_cache.render(self.font_medium, "DRAW", MORANDI_YELLOW)
+            self.screen.blit(result, result.get_rect(center=(SCREEN_WIDTH // 2, 420)))
+            line = "   ".join(f"P{player + 1}: {score}" for player, score in enumerate(scores))
+            line_text = self.text_cache.render(self.font_small, line, MORANDI_GRAY)
+            self.screen.blit(line_text, line_text.get_rect(center=(SCREEN_WIDTH // 2, 470)))
+        elif self.mode == GameMode.TIME_ATTACK or self.mode == GameMode.GAME_OVER:
             mode_key = 'time_attack' if self.mode == GameMode.TIME_ATTACK else 'endless'
-            hs = self.high_scores.get(mode_key, 0)
-            if self.score > hs:
-                hs_text = self.font_medium.render("NEW HIGH SCORE!", True, MORANDI_YELLOW)
+            hs = self.sim.high_scores.get(mode_key, 0)
+            if self.sim.score > hs:
+                hs_text = self.text_cache.render(self.font_medium, "NEW HIGH SCORE!", MORANDI_YELLOW)
             else:
-                hs_text = self.font_medium.render(f"High Score: {hs}", True, MORANDI_GRAY)
+                hs_text = self.text_cache.render(self.font_medium, f"High Score: {hs}", MORANDI_GRAY)
             hs_rect = hs_text.get_rect(center=(SCREEN_WIDTH // 2, 420))
             self.screen.blit(hs_text, hs_rect)
         
-        continue_text = self.font_small.render("Press SPACE to continue", True, MORANDI_BLUE)
+        continue_text = self.text_cache.render(self.font_small, "Press SPACE to continue", MORANDI_BLUE)
         continue_rect = continue_text.get_rect(center=(SCREEN_WIDTH // 2, 550))
         self.screen.blit(continue_text, continue_rect)
     
@@ -1057,214 +1016,338 @@ class Game:
         """Draw level complete screen"""
         self.screen.fill(BLACK)
         
-        title = self.font_large.render("LEVEL COMPLETE!", True, MORANDI_GREEN)
+        title = self.text_cache.render(self.font_large, "LEVEL COMPLETE!", MORANDI_GREEN)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 200))
         self.screen.blit(title, title_rect)
         
-        level_text = self.font_medium.render(f"Level {self.current_level} Cleared", True, WHITE)
+        level_text = self.text_cache.render(self.font_medium, f"Level {self.sim.current_level} Cleared", WHITE)
         level_rect = level_text.get_rect(center=(SCREEN_WIDTH // 2, 350))
         self.screen.blit(level_text, level_rect)
         
-        score_text = self.font_medium.render(f"Score: {self.score}", True, MORANDI_GRAY)
+        score_text = self.text_cache.render(self.font_medium, f"Score: {self.sim.score}", MORANDI_GRAY)
         score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, 420))
         self.screen.blit(score_text, score_rect)
         
-        continue_text = self.font_small.render("Press SPACE for next level", True, MORANDI_BLUE)
+        continue_text = self.text_cache.render(self.font_small, "Press SPACE for next level", MORANDI_BLUE)
         continue_rect = continue_text.get_rect(center=(SCREEN_WIDTH // 2, 550))
         self.screen.blit(continue_text, continue_rect)
     
     def handle_input(self):
-        """Handle keyboard input"""
+        """Read held movement keys, one Inputs per claw"""
         keys = pygame.key.get_pressed()
-        
-        if self.mode in [GameMode.ENDLESS, GameMode.TIME_ATTACK, GameMode.LEVELS]:
-            if not self.claw.auto_moving and self.claw.state == 'idle':
-                if keys[pygame.K_w]:
-                    self.claw.target_y -= 3.75
-                if keys[pygame.K_s]:
-                    self.claw.target_y += 3.75
-                if keys[pygame.K_a]:
-                    self.claw.target_x -= 3.75
-                if keys[pygame.K_d]:
-                    self.claw.target_x += 3.75
-                
-                # Clamp to bounds (within grid area)
-                self.claw.target_x = max(50 + GRID_OFFSET_X, 
-                                        min(GRID_WIDTH * BLOCK_SIZE - 50 + GRID_OFFSET_X, 
-                                            self.claw.target_x))
-                self.claw.target_y = max(120 + GRID_OFFSET_Y, 
-                                        min(GRID_HEIGHT * BLOCK_SIZE - 60 + GRID_OFFSET_Y, 
-                                            self.claw.target_y))
-    
-    def reset_game(self, mode: GameMode):
-        """Reset game state for a new game"""
-        self.mode = mode
-        self.score = 0
-        self.tetrominoes = []
-        self.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.grabbed_piece = None
-        self.spawn_timer = 0
-        self.claw = Claw(GRID_WIDTH * BLOCK_SIZE // 2 + GRID_OFFSET_X, 150 + GRID_OFFSET_Y)
-        
-        if mode == GameMode.TIME_ATTACK:
-            self.time_remaining = 60000  # 60 seconds
-        elif mode == GameMode.LEVELS:
-            self.current_level = 1
-            self.level_goal = 5
-            self.pieces_collected = 0
-    
-    def next_level(self):
-        """Advance to next level"""
-        self.current_level += 1
-        self.pieces_collected = 0
-        self.level_goal = 5 + (self.current_level - 1) * 2  # Increase difficulty
-        self.tetrominoes = []
-        self.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.grabbed_piece = None
-        self.spawn_timer = 0
-        self.claw = Claw(GRID_WIDTH * BLOCK_SIZE // 2 + GRID_OFFSET_X, 150 + GRID_OFFSET_Y)
-        self.mode = GameMode.LEVELS
-        self.grabbed_piece = None
-        self.spawn_timer = 0
-        self.claw = Claw(GRID_WIDTH * BLOCK_SIZE // 2 + GRID_OFFSET_X, 150 + GRID_OFFSET_Y)
-        self.mode = GameMode.LEVELS
-    
-    def update(self, dt: int):
-        """Update game state"""
-        if self.mode in [GameMode.ENDLESS, GameMode.TIME_ATTACK, GameMode.LEVELS]:
-            # Spawn timer
-            self.spawn_timer += dt
-            if self.spawn_timer >= self.spawn_interval:
-                self.spawn_tetromino()
-                self.spawn_timer = 0
-            
-            # 检测方块是否超过红线（危险线在第3行）
-            danger_line_row = 3
-            for tetromino in self.tetrominoes:
-                if tetromino != self.grabbed_piece:  # 不检测被抓住的方块
-                    # 检查方块的最小y位置（最高点）
-                    min_y_grid = min(pos[1] for pos in tetromino.grid_positions)
-                    if min_y_grid < danger_line_row:
-                        # 游戏失败
-                        if self.mode == GameMode.ENDLESS:
-                            if self.score > self.high_scores['endless']:
-                                self.high_scores['endless'] = self.score
-                        elif self.mode == GameMode.TIME_ATTACK:
-                            if self.score > self.high_scores['time_attack']:
-                                self.high_scores['time_attack'] = self.score
-                        self.mode = GameMode.GAME_OVER
-                        return
-            
-            # Update claw and handle delivery stages
-            if self.claw.update():
-                # Claw reached target position
-                if self.claw.auto_moving:
-                    if self.claw.delivery_stage == 1:
-                        # Stage 1 complete: Lifted to top, now move horizontally to EXIT
-                        self.claw.delivery_stage = 2
-                        self.claw.state = 'moving_horizontal'
-                        self.claw.move_to(self.exit_box.centerx, self.claw.y)
-                    
-                    elif self.claw.delivery_stage == 2:
-                        # Stage 2 complete: Reached EXIT position, now release piece
-                        self.claw.delivery_stage = 3
-                        self.claw.state = 'releasing'
-                        # Release the piece - it will start falling
-                        self.deliver_piece()
-            
-            # Update falling piece animation
-            self.update_falling_piece()
+        return [
+            Inputs(up=keys[up], down=keys[down], left=keys[left], right=keys[right])
+            for up, down, left, right, _ in PLAYER_KEYS[:len(self.sim.claws)]
+        ]
+    
+    def best_score(self, mode: GameMode) -> int:
+        """Best score of a mode: all-time with a score store, else this session's"""
+        if self.scores:
+            return self.scores.best(mode.value)
+        if mode == GameMode.LEVELS:
+            return max(self.sim.high_scores['levels'])
+        return self.sim.high_scores[mode.value]
+    
+    def record_session(self):
+        """Queue the game just finished (or the level just cleared) for the score store"""
+        if self.scores is None or self.session_mode is None or self.demo:
+            return
+        level = self.sim.current_level if self.session_mode == GameMode.LEVELS else 0
+        self.scores.record(Session(self.session_mode.value, self.sim.score, level=level,
+                                   players=self.sim.players, seed=self.session_seed))
+    
+    def start_game(self, mode: GameMode):
+        """Start a new game with a fresh seed from the session stream and begin recording it.
+
+        VS games are not recorded: replays hold one player's inputs.
+        """
+        seed = self.session_rng.getrandbits(63)
+        self.sim.reset(mode, seed, players=self.vs_players)
+        self.session_mode = mode
+        self.session_seed = seed
+        self.replay = Replay(seed, mode) if mode != GameMode.VS_MODE else None
+        self.replay_next_level = False
+    
+    def save_checkpoint(self):
+        """Queue a checkpoint of the game in progress"""
+        if self.checkpoints is None or self.demo or self.session_mode is None:
+            return
+        replay = self.replay.copy() if self.replay is not None else None
+        self.checkpoints.save(Checkpoint(self.session_mode, self.session_seed, take(self.sim), replay))
+        self.checkpoint_ticks = 0
+    
+    def clear_checkpoint(self):
+        """The game in progress is over or abandoned: nothing to resume"""
+        if self.checkpoints and not self.demo:
+            self.checkpoints.clear()
+    
+    def resume(self, path: str) -> bool:
+        """Continue the game saved in a checkpoint; False if there is none or it is unusable"""
+        checkpoint = load_checkpoint(path)
+        if checkpoint is None:
+            return False
+        # Restored into a fresh simulation, so a snapshot that fails half way leaves the game untouched
+        sim = Simulation(checkpoint.seed)
+        try:
+            restore(sim, checkpoint.snapshot)
+        except (KeyError, IndexError, ValueError, OverflowError) as error:
+            print(f"checkpoint: ignoring unusable {path}: {error}", file=sys.stderr)
+            set_aside_checkpoint(path)
+            return False
+        self.sim = sim
+        self.session_mode = checkpoint.mode
+        self.session_seed = checkpoint.seed
+        self.replay = checkpoint.replay
+        self.replay_next_level = False
+        if self.sim.players > 1:
+            self.vs_players = self.sim.players
+        self.prev_claws = []
+        self.prev_pieces = []
+        return True
+    
+    def start_demo(self):
+        """Attract mode: the solver plays an Endless game on a side simulation"""
+        self.menu_sim = self.sim
+        self.sim = Simulation(self.demo_seed)
+        self.sim.reset(GameMode.ENDLESS, self.demo_seed)
+        self.demo_seed += 1
+        self.demo = SolverBot(self.solver)
+        self.prev_claws = []
+        self.prev_pieces = []
+    
+    def stop_demo(self):
+        """Back to the main menu and the player's own simulation"""
+        self.sim = self.menu_sim
+        self.menu_sim = None
+        self.demo = None
+        self.idle_ms = 0.0
+        self.prev_claws = []
+        self.prev_pieces = []
+    
+    def finish_replay(self):
+        """Close the replay of a finished game, saving it if a replay directory is set"""
+        replay = self.replay
+        self.replay = None
+        self.last_replay = replay
+        replay.score = self.sim.score
+        if self.replay_dir:
+            os.makedirs(self.replay_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}_{replay.mode.value}_{replay.score}.tcr"
+            replay.save(os.path.join(self.replay_dir, name))
+    
+    def update(self, inputs, dt: float = TICK_MS):
+        """Advance the simulation and the visual effects by one tick (inputs: one Inputs, or one per claw)"""
+        if self.replay is not None:
+            self.replay.record(inputs if isinstance(inputs, Inputs) else inputs[0], self.replay_next_level)
+            self.replay_next_level = False
+        
+        # Remember where moving things were, for interpolated rendering
+        claws = self.sim.claws
+        self.prev_claws = [(claw, claw.x, claw.y) for claw in claws]
+        self.prev_pieces = [(claw.grabbed_piece, claw.grabbed_piece.x, claw.grabbed_piece.y)
+                            for claw in claws if claw.grabbed_piece]
+        
+        playing = self.sim.playing
+        for event in self.sim.step(inputs, dt):
+            if event.kind == 'delivered':
+                # Create particle effects - 破碎 + 烟花
+                self.create_shatter_effect(event.x, event.y, event.color)
+                self.create_firework_effect(event.x, event.y, event.color)
+            elif event.kind == 'game_over':
+                self.record_session()
+                self.clear_checkpoint()
+                if self.replay is not None:
+                    self.finish_replay()
+            elif event.kind == 'level_complete':
+                self.record_session()
+                self.save_checkpoint()
+        
+        if playing:
+            self.checkpoint_ticks += 1
+            if self.checkpoint_ticks >= CHECKPOINT_TICKS and self.sim.playing:
+                self.save_checkpoint()
             
             # Update particles
             self.update_particles()
             
             # Update decorative particles
             self.update_decorative_particles()
+    
+    def handle_event(self, event):
+        """React to one pygame event (quit, menu navigation, mode start, grab)"""
+        if event.type == pygame.QUIT:
+            # Closing the window mid-game keeps the game to resume later
+            if self.sim.playing:
+                self.save_checkpoint()
+            self.running = False
+        elif event.type == pygame.KEYDOWN:
+            self.idle_ms = 0.0
+            if self.demo:
+                # Any key ends the demo
+                self.stop_demo()
+                return
+            
+            if event.key == pygame.K_ESCAPE:
+                if self.mode == GameMode.MENU:
+                    self.running = False
+                elif self.mode == GameMode.MODE_SELECT:
+                    self.mode = GameMode.MENU
+                else:
+                    # Leaving mid-game abandons its replay and checkpoint
+                    self.replay = None
+                    self.clear_checkpoint()
+                    self.mode = GameMode.MODE_SELECT
+            
+            elif event.key == pygame.K_SPACE:
+                if self.mode == GameMode.MENU:
+                    self.mode = GameMode.MODE_SELECT
+                
+                elif self.mode == GameMode.MODE_SELECT:
+                    # Start selected mode
+                    selected = self.mode_options[self.selected_mode_index]
+                    if selected == 'ENDLESS':
+                        self.start_game(GameMode.ENDLESS)
+                    elif selected == 'TIME ATTACK':
+                        self.start_game(GameMode.TIME_ATTACK)
+                    elif selected == 'LEVELS':
+                        self.start_game(GameMode.LEVELS)
+                    elif selected == 'VS':
+                        self.start_game(GameMode.VS_MODE)
+                
+                elif self.mode == GameMode.GAME_OVER:
+                    self.mode = GameMode.MODE_SELECT
+                
+                elif self.mode == GameMode.LEVEL_COMPLETE:
+                    self.sim.next_level()
+                    self.replay_next_level = True
+                
+                elif self.sim.playing:
+                    # Held until the next simulation tick consumes it
+                    self.pending_grabs.add(0)
+            
+            elif self.sim.players > 1 and self.sim.playing and event.key in VS_GRAB_KEYS:
+                self.pending_grabs.add(VS_GRAB_KEYS[event.key])
+            
+            elif event.key == pygame.K_w:
+                if self.mode == GameMode.MODE_SELECT:
+                    self.selected_mode_index = (self.selected_mode_index - 1) % len(self.mode_options)
             
-            # Time Attack mode timer
-            if self.mode == GameMode.TIME_ATTACK:
-                self.time_remaining -= dt
-                if self.time_remaining <= 0:
-                    self.time_remaining = 0
-                    # Save high score
-                    if self.score > self.high_scores['time_attack']:
-                        self.high_scores['time_attack'] = self.score
-                    self.mode = GameMode.GAME_OVER
+            elif event.key == pygame.K_s:
+                if self.mode == GameMode.MODE_SELECT:
+                    self.selected_mode_index = (self.selected_mode_index + 1) % len(self.mode_options)
+            
+            elif event.key == pygame.K_h:
+                self.show_hint = not self.show_hint
+            
+            elif event.key == pygame.K_F3:
+                self.profiler.visible = not self.profiler.visible
+    
+    def draw_screen(self):
+        """Full repaint of whichever screen the current mode shows"""
+        if self.mode == GameMode.MENU:
+            self.draw_menu()
+        elif self.mode == GameMode.MODE_SELECT:
+            self.draw_mode_select()
+        elif self.sim.playing:
+            self.draw_game()
+        elif self.mode == GameMode.GAME_OVER:
+            self.draw_game_over()
+        elif self.mode == GameMode.LEVEL_COMPLETE:
+            self.draw_level_complete()
+        
+        # draw_game includes the overlay in its entries; other screens get it on top
+        if self.profiler.visible and not self.sim.playing:
+            _, rect, overlay = self.profiler_entry()
+            self.screen.blit(overlay, rect)
     
     def run(self):
         """Main game loop"""
+        profiler = self.profiler
         while self.running:
-            dt = self.clock.tick(FPS)
+            frame_ms = self.clock.tick(FPS)
+            self.accumulator += min(frame_ms, MAX_FRAME_MS)
+            # Profiled frame time excludes the clock's idle wait
+            profiler.begin_frame()
+            text_renders = self.text_cache.misses
+            surfaces = self.allocated_surfaces()
             
             # Event handling
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        if self.mode == GameMode.MENU:
-                            self.running = False
-                        elif self.mode == GameMode.MODE_SELECT:
-                            self.mode = GameMode.MENU
-                        else:
-                            self.mode = GameMode.MODE_SELECT
-                    
-                    elif event.key == pygame.K_SPACE:
-                        if self.mode == GameMode.MENU:
-                            self.mode = GameMode.MODE_SELECT
-                        
-                        elif self.mode == GameMode.MODE_SELECT:
-                            # Start selected mode
-                            selected = self.mode_options[self.selected_mode_index]
-                            if selected == 'ENDLESS':
-                                self.reset_game(GameMode.ENDLESS)
-                            elif selected == 'TIME ATTACK':
-                                self.reset_game(GameMode.TIME_ATTACK)
-                            elif selected == 'LEVELS':
-                                self.reset_game(GameMode.LEVELS)
-                        
-                        elif self.mode == GameMode.GAME_OVER:
-                            self.mode = GameMode.MODE_SELECT
-                        
-                        elif self.mode == GameMode.LEVEL_COMPLETE:
-                            self.next_level()
-                        
-                        elif self.mode in [GameMode.ENDLESS, GameMode.TIME_ATTACK, GameMode.LEVELS]:
-                            if not self.claw.auto_moving:
-                                self.grab_piece()
-                    
-                    elif event.key == pygame.K_w:
-                        if self.mode == GameMode.MODE_SELECT:
-                            self.selected_mode_index = (self.selected_mode_index - 1) % len(self.mode_options)
-                    
-                    elif event.key == pygame.K_s:
-                        if self.mode == GameMode.MODE_SELECT:
-                            self.selected_mode_index = (self.selected_mode_index + 1) % len(self.mode_options)
+            with profiler.scope('events'):
+                for event in pygame.event.get():
+                    self.handle_event(event)
+            
+            # Attract mode after a while on the main menu
+            if self.mode == GameMode.MENU:
+                self.idle_ms += frame_ms
+                if self.idle_ms >= ATTRACT_DELAY_MS:
+                    self.start_demo()
             
             # Input handling
-            self.handle_input()
+            inputs = self.handle_input()
             
-            # Update
-            self.update(dt)
+            # Update in fixed ticks; rendering runs at whatever rate the display allows
+            ticks = 0
+            with profiler.scope('update'):
+                while self.accumulator >= TICK_MS:
+                    if self.demo:
+                        inputs = [self.demo.inputs(self.sim)]
+                    else:
+                        for player, claw_inputs in enumerate(inputs):
+                            claw_inputs.grab = player in self.pending_grabs
+                    self.pending_grabs.clear()
+                    self.update(inputs, TICK_MS)
+                    self.accumulator -= TICK_MS
+                    ticks += 1
+            if self.demo and not self.sim.playing:
+                self.stop_demo()
+            self.render_alpha = self.accumulator / TICK_MS
             
             # Draw
-            if self.mode == GameMode.MENU:
-                self.draw_menu()
-            elif self.mode == GameMode.MODE_SELECT:
-                self.draw_mode_select()
-            elif self.mode in [GameMode.ENDLESS, GameMode.TIME_ATTACK, GameMode.LEVELS]:
-                self.draw_game()
-            elif self.mode == GameMode.GAME_OVER:
-                self.draw_game_over()
-            elif self.mode == GameMode.LEVEL_COMPLETE:
-                self.draw_level_complete()
+            with profiler.scope('draw'):
+                if self.dirty_rects and self.sim.playing:
+                    dirty = self.draw_game_dirty()
+                else:
+                    # Any full-screen frame leaves the tracked rects stale
+                    dirty = None
+                    self.dirty_tracker.invalidate()
+                    self.draw_screen()
             
-            pygame.display.flip()
-        
+            with profiler.scope('flip'):
+                if dirty is None:
+                    pygame.display.flip()
+                else:
+                    pygame.display.update(dirty)
+            
+            profiler.count('ticks', ticks)
+            profiler.count('particles', len(self.particles))
+            profiler.count('text_renders', self.text_cache.misses - text_renders)
+            profiler.count('surfaces_allocated', self.allocated_surfaces() - surfaces)
+            profiler.end_frame()
+        
+        profiler.close()
+        self.hints.close()
+        if self.scores:
+            self.scores.close()
+        if self.checkpoints:
+            self.checkpoints.close()
         pygame.quit()
         sys.exit()
 
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Tetris Claw")
+    parser.add_argument("--dirty-rects", action="store_true", help="repaint and push only changed screen regions")
+    parser.add_argument("--seed", type=int, help="session seed (random if omitted)")
+    parser.add_argument("--replay-dir", help="save a replay of every finished game here")
+    parser.add_argument("--profile-log", help="write per-frame profiler data to this .csv or .jsonl file")
+    parser.add_argument("--players", type=int, default=VS_PLAYERS, help=f"local players in VS mode (2-{MAX_PLAYERS})")
+    parser.add_argument("--scores", default=SCORE_DB, help="SQLite high-score database ('' to keep scores in memory)")
+    parser.add_argument("--checkpoint", default=CHECKPOINT, help="checkpoint file for the game in progress ('' for none)")
+    parser.add_argument("--resume", action="store_true", help="continue the game saved in the checkpoint")
+    args = parser.parse_args()
+    game = Game(seed=args.seed, dirty_rects=args.dirty_rects, replay_dir=args.replay_dir,
+                profile_log=args.profile_log, vs_players=args.players, score_db=args.scores,
+                checkpoint=args.checkpoint)
+    if args.resume and not (args.checkpoint and game.resume(args.checkpoint)):
+        print("No checkpoint to resume; starting at the menu")
     game.run()
@@ -0,0 +1,253 @@
+"""
+Tetris Claw - particle effects
+Structure-of-arrays particle engine for the shatter and firework effects.
+
+Particles live in fixed-capacity NumPy arrays and are integrated in one
+batch per frame. Dead particles are swap-removed so live ones always occupy
+the first `count` slots, and drawing blits pre-rendered sprites with a
+single Surface.blits call of the sprites inside the clip rect.
+"""
+
+import numpy as np
+import pygame
+
+DEBRIS = 0    # 碎片 - 方块状, fades out
+FIREWORK = 1  # 烟花 - 圆形
+
+GRAVITY = 0.3  # 重力加速度 (px / frame²)
+DRAG = 0.98    # 空气阻力 on horizontal speed
+FADE_FRAMES = 70  # Lifetime at which a particle is fully opaque
+
+
+class ParticleSystem:
+    def __init__(self, capacity: int = 4096, seed=None):
+        self.capacity = capacity
+        self.count = 0
+        self.version = 0  # Bumped whenever particles are added, moved or removed
+        self.rng = np.random.default_rng(seed)
+
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.int32)  # 剩余帧数
+        self.size = np.zeros(capacity, dtype=np.int32)
+        self.color = np.zeros(capacity, dtype=np.int32)     # Index into self.palette
+        self.kind = np.zeros(capacity, dtype=np.int8)
+
+        self.palette = []
+        self.palette_index = {}
+        self.sprites = {}
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+        self.version += 1
+
+    def color_id(self, color) -> int:
+        color = tuple(color)
+        index = self.palette_index.get(color)
+        if index is None:
+            index = len(self.palette)
+            self.palette.append(color)
+            self.palette_index[color] = index
+        return index
+
+    def emit(self, x, y, vx, vy, color_ids, lifetime, size, kind):
+        """Append a batch of particles; anything beyond capacity is dropped"""
+        n = min(len(vx), self.capacity - self.count)
+        if n <= 0:
+            return
+        start, end = self.count, self.count + n
+        self.x[start:end] = np.broadcast_to(x, len(vx))[:n]
+        self.y[start:end] = np.broadcast_to(y, len(vx))[:n]
+        self.vx[start:end] = vx[:n]
+        self.vy[start:end] = vy[:n]
+        self.color[start:end] = np.broadcast_to(color_ids, len(vx))[:n]
+        self.lifetime[start:end] = lifetime[:n]
+        self.size[start:end] = size[:n]
+        self.kind[start:end] = kind
+        self.count = end
+        self.version += 1
+
+    def emit_shatter(self, x, y, color, n=15):
+        """破碎效果 - 方块碎片向外飞散"""
+        angle = self.rng.uniform(0, 2 * np.pi, n)
+        speed = self.rng.uniform(2, 8, n)
+        self.emit(
+            x + self.rng.uniform(-20, 20, n),
+            y + self.rng.uniform(-20, 20, n),
+            speed * np.cos(angle),
+            speed * np.sin(angle) - self.rng.uniform(2, 5, n),  # 向上飞
+            self.color_id(color),
+            self.rng.integers(30, 51, n),
+            self.rng.integers(3, 8, n),
+            DEBRIS
+        )
+
+    def emit_firework(self, x, y, colors, n=30):
+        """烟花效果 - 彩色粒子向上爆发"""
+        angle = self.rng.uniform(0, 2 * np.pi, n)
+        speed = self.rng.uniform(3, 10, n)
+        color_ids = np.array([self.color_id(c) for c in colors])
+        self.emit(
+            x,
+            y,
+            speed * np.cos(angle),
+            speed * np.sin(angle) - self.rng.uniform(3, 8, n),  # 向上爆发
+            color_ids[self.rng.integers(0, len(color_ids), n)],
+            self.rng.integers(40, 71, n),
+            self.rng.integers(2, 6, n),
+            FIREWORK
+        )
+
+    def update(self):
+        """Integrate every live particle one frame and compact out the dead ones"""
+        n = self.count
+        if n == 0:
+            return
+        self.version += 1
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.vy[:n] += GRAVITY
+        self.vx[:n] *= DRAG
+        self.lifetime[:n] -= 1
+
+        alive = self.lifetime[:n] > 0
+        live = int(np.count_nonzero(alive))
+        if live == n:
+            return
+        # Swap-remove: fill holes below the new count with survivors from above it
+        holes = np.flatnonzero(~alive[:live])
+        movers = np.flatnonzero(alive[live:]) + live
+        for array in (self.x, self.y, self.vx, self.vy, self.lifetime, self.size, self.color, self.kind):
+            array[holes] = array[movers]
+        self.count = live
+
+    def get_sprite(self, kind: int, size: int, color_id: int, alpha: int) -> pygame.Surface:
+        key = (kind, size, color_id, alpha)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            color = self.palette[color_id]
+            if kind == FIREWORK:
+                # Glow rings and core are drawn opaque, so the sprite is one disc
+                radius = size + 2
+                sprite = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, color, (radius, radius), radius)
+            else:
+                sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+                sprite.fill((*color, alpha))
+            sprite = sprite.convert_alpha()
+            self.sprites[key] = sprite
+        return sprite
+
+    def tile_rects(self, tile_size: int = 64):
+        """Screen tiles touched by any live particle's sprite.
+
+        Sprites are smaller than a tile, so checking the four corners of each
+        sprite finds every tile it overlaps. Tiles keep dirty regions tight
+        when particles spread out over the screen.
+        """
+        n = self.count
+        if n == 0:
+            return []
+        firework = self.kind[:n] == FIREWORK
+        size = self.size[:n]
+        offset = np.where(firework, size + 2, 0)
+        extent = np.where(firework, 2 * (size + 2) + 1, size)
+        left = self.x[:n].astype(np.int32) - offset
+        top = self.y[:n].astype(np.int32) - offset
+        tiles = set()
+        for xs in (left, left + extent):
+            for ys in (top, top + extent):
+                tiles.update(zip((xs // tile_size).tolist(), (ys // tile_size).tolist()))
+        return [pygame.Rect(tx * tile_size, ty * tile_size, tile_size, tile_size) for tx, ty in sorted(tiles)]
+
+    def draw(self, surface: pygame.Surface):
+        n = self.count
+        if n == 0:
+            return
+        # 根据剩余生命计算透明度
+        alpha = np.clip(255 * self.lifetime[:n] // FADE_FRAMES, 0, 255)
+        kind = self.kind[:n]
+        size = self.size[:n]
+        # Fireworks are centred on the particle, debris hangs from its top-left corner
+        offset = np.where(kind == FIREWORK, size + 2, 0)
+        alpha = np.where(kind == FIREWORK, 255, alpha)
+        px = self.x[:n].astype(np.int32) - offset
+        py = self.y[:n].astype(np.int32) - offset
+        # Skip sprites outside the clip rect (a single dirty rect while repainting)
+        clip = surface.get_clip()
+        extent = np.where(kind == FIREWORK, 2 * (size + 2) + 1, size)
+        shown = np.flatnonzero((px < clip.right) & (px + extent > clip.left) &
+                               (py < clip.bottom) & (py + extent > clip.top))
+
+        get_sprite = self.get_sprite
+        surface.blits([
+            (get_sprite(k, s, c, a), (x, y))
+            for k, s, c, a, x, y in zip(kind[shown].tolist(), size[shown].tolist(), self.color[shown].tolist(),
+                                        alpha[shown].tolist(), px[shown].tolist(), py[shown].tolist())
+        ], doreturn=False)
+
+
+class DecorativeField:
+    """Floating background dots that bob on a sine wave.
+
+    Positions never leave their column, so the whole field is one vectorized
+    sine per frame. Sprites are cached per (size, color, alpha); every
+    particle is drawn with a single Surface.blits call, so the count can grow
+    to thousands without per-frame allocation.
+    """
+
+    def __init__(self, count: int, width: int, height: int, colors, seed=None, margin: int = 20):
+        self.rng = np.random.default_rng(seed)
+        self.count = count
+        self.palette = [tuple(c) for c in colors]
+
+        self.x = self.rng.uniform(margin, width - margin, count)
+        self.base_y = self.rng.uniform(margin, height - margin, count)
+        self.speed = self.rng.uniform(0.2, 0.6, count)
+        self.amplitude = self.rng.uniform(8, 25, count)
+        self.phase = self.rng.uniform(0, 6.28, count)
+        self.size = self.rng.integers(2, 5, count)
+        self.color = self.rng.integers(0, len(self.palette), count)
+        self.alpha = self.rng.integers(30, 81, count)  # 更低的透明度，作为柔和背景
+        self.y = self.base_y.copy()
+
+        self.sprites = {}
+        # Sprites are fixed per particle, so the blit list only needs fresh positions
+        self.sprite_list = [
+            self.get_sprite(s, c, a)
+            for s, c, a in zip(self.size.tolist(), self.color.tolist(), self.alpha.tolist())
+        ]
+
+    def __len__(self):
+        return self.count
+
+    def get_sprite(self, size: int, color_id: int, alpha: int) -> pygame.Surface:
+        key = (size, color_id, alpha)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (*self.palette[color_id], alpha), (size, size), size)
+            sprite = sprite.convert_alpha()
+            self.sprites[key] = sprite
+        return sprite
+
+    def update(self):
+        """正弦波漂浮"""
+        self.phase += self.speed * 0.05
+        np.sin(self.phase, out=self.y)
+        self.y *= self.amplitude
+        self.y += self.base_y
+
+    def positions(self):
+        """Top-left blit position of every particle's sprite"""
+        px = (self.x - self.size).astype(np.int32).tolist()
+        py = (self.y - self.size).astype(np.int32).tolist()
+        return zip(px, py)
+
+    def draw(self, surface: pygame.Surface):
+        surface.blits(list(zip(self.sprite_list, self.positions())), doreturn=False)
@@ -0,0 +1,182 @@
+"""
+Tetris Claw - frame profiler
+Scoped timers and per-frame counters for the game loop.
+
+Each frame the loop wraps its subsystems in `with profiler.scope(name):`
+blocks and sets counters; end_frame() stores the row in a ring buffer of the
+last N frames and, if a log is open, appends it to a CSV or JSONL file for
+offline analysis. The ring buffer feeds a toggleable on-screen overlay with
+a frame-time graph and the most expensive subsystems.
+
+Scopes are preallocated objects writing into a NumPy row, so an always-on
+profiler costs two perf_counter calls per scope.
+"""
+
+import csv
+import json
+import time
+from typing import Iterable
+
+import numpy as np
+import pygame
+
+OVERLAY_SIZE = (320, 190)
+TARGET_FRAME_MS = 1000 / 60  # Reference line on the graph
+
+
+class _Scope:
+    __slots__ = ('row', 'column', 'start')
+
+    def __init__(self, row: np.ndarray, column: int):
+        self.row = row
+        self.column = column
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.row[self.column] += (time.perf_counter() - self.start) * 1000
+
+
+class FrameProfiler:
+    def __init__(self, phases: Iterable[str], counters: Iterable[str], capacity: int = 240):
+        self.phases = tuple(phases)
+        self.counters = tuple(counters)
+        self.capacity = capacity
+        self.counter_index = {name: i for i, name in enumerate(self.counters)}
+
+        # Ring buffer of the last `capacity` frames (ms per phase, frame ms, counter values)
+        self.times = np.zeros((capacity, len(self.phases)))
+        self.frame_ms = np.zeros(capacity)
+        self.counts = np.zeros((capacity, len(self.counters)), dtype=np.int64)
+        self.frames = 0  # Frames recorded so far
+
+        self.current = np.zeros(len(self.phases))
+        self.current_counts = np.zeros(len(self.counters), dtype=np.int64)
+        self.scopes = {name: _Scope(self.current, i) for i, name in enumerate(self.phases)}
+        self.frame_start = 0.0
+
+        self.visible = False
+        self.overlay = None  # Reused every frame the overlay is drawn
+        self.log_file = None
+        self.log_writer = None
+
+    def scope(self, name: str) -> _Scope:
+        return self.scopes[name]
+
+    def count(self, name: str, value: int):
+        self.current_counts[self.counter_index[name]] = value
+
+    def begin_frame(self):
+        self.current[:] = 0
+        self.current_counts[:] = 0
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        row = self.frames % self.capacity
+        frame_ms = (time.perf_counter() - self.frame_start) * 1000
+        self.times[row] = self.current
+        self.frame_ms[row] = frame_ms
+        self.counts[row] = self.current_counts
+        self.frames += 1
+        if self.log_file:
+            self.write_row(frame_ms)
+
+    def recent(self):
+        """(frame_ms, phase times, counts) of the buffered frames, oldest first"""
+        n = min(self.frames, self.capacity)
+        order = (np.arange(n) + self.frames - n) % self.capacity
+        return self.frame_ms[order], self.times[order], self.counts[order]
+
+    def top_phases(self, limit: int = 4):
+        """Phases with the highest mean time over the buffered frames, as (name, ms)"""
+        _, times, _ = self.recent()
+        if len(times) == 0:
+            return []
+        means = times.mean(axis=0)
+        order = np.argsort(means)[::-1][:limit]
+        return [(self.phases[i], float(means[i])) for i in order]
+
+    # Export
+
+    def open_log(self, path: str):
+        """Append every following frame to path (.csv, anything else as JSONL)"""
+        self.log_file = open(path, 'w', newline='')
+        if path.endswith('.csv'):
+            self.log_writer = csv.writer(self.log_file)
+            self.log_writer.writerow(['frame', 'frame_ms', *self.phases, *self.counters])
+        else:
+            self.log_writer = None
+
+    def write_row(self, frame_ms: float):
+        times = [round(t, 4) for t in self.current.tolist()]
+        counts = self.current_counts.tolist()
+        if self.log_writer:
+            self.log_writer.writerow([self.frames, round(frame_ms, 4), *times, *counts])
+        else:
+            record = {'frame': self.frames, 'frame_ms': round(frame_ms, 4)}
+            record.update(zip(self.phases, times))
+            record.update(zip(self.counters, counts))
+            self.log_file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+            self.log_writer = None
+
+    # Overlay
+
+    def render_overlay(self, text_cache, font: pygame.font.Font) -> pygame.Surface:
+        """Frame-time graph of the buffered frames plus the top offenders.
+
+        The overlay is redrawn into one surface kept across frames. Only its
+        fixed labels go through the game's text cache; the numbers change
+        every frame and are rendered directly, so they neither add to the
+        text_renders counter shown here nor push the game's strings out of
+        the cache.
+        """
+        width, height = OVERLAY_SIZE
+        surface = self.overlay
+        if surface is None:
+            surface = self.overlay = pygame.Surface(OVERLAY_SIZE, pygame.SRCALPHA)
+        surface.fill((10, 10, 15, 190))
+        frame_ms, _, counts = self.recent()
+
+        graph_top, graph_height = 6, 60
+        scale = graph_height / max(2 * TARGET_FRAME_MS, float(frame_ms.max()) if len(frame_ms) else 0)
+        target_y = graph_top + graph_height - int(TARGET_FRAME_MS * scale)
+        pygame.draw.line(surface, (90, 100, 120), (6, target_y), (width - 6, target_y))
+        bar_width = (width - 12) / self.capacity
+        for i, ms in enumerate(frame_ms.tolist()):
+            bar = max(1, int(ms * scale))
+            color = (150, 190, 140) if ms <= TARGET_FRAME_MS else (220, 120, 130)
+            x = 6 + int(i * bar_width)
+            pygame.draw.line(surface, color, (x, graph_top + graph_height - bar), (x, graph_top + graph_height))
+
+        # Timings one per line, then the latest counters two per line; values right-aligned
+        y = graph_top + graph_height + 6
+        line = font.get_linesize()
+        half = width // 2
+
+        def label(text, value, left, right):
+            surface.blit(text_cache.render(font, text, (200, 210, 230)), (left, y))
+            value = font.render(value, True, (150, 190, 140))
+            surface.blit(value, value.get_rect(topright=(right, y)))
+
+        if len(frame_ms):
+            label("frame", f"p50 {np.percentile(frame_ms, 50):.2f}  p99 {np.percentile(frame_ms, 99):.2f}  "
+                           f"last {frame_ms[-1]:.2f} ms", 8, width - 8)
+            y += line
+        for name, ms in self.top_phases():
+            label(name, f"{ms:.3f} ms", 8, width - 8)
+            y += line
+        if len(counts):
+            latest = list(zip(self.counters, counts[-1].tolist()))
+            for i in range(0, len(latest), 2):
+                for (name, value), left in zip(latest[i:i + 2], (8, half + 8)):
+                    label(name, str(value), left, left + half - 16)
+                y += line
+        return surface
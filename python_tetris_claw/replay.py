@@ -0,0 +1,121 @@
+"""
+Tetris Claw - replays
+Compact binary record of a play session and a headless runner for it.
+
+The simulation is deterministic for a given seed and input sequence, so a
+session is fully described by the seed and mode it started with plus the
+inputs of every tick. Re-running it reproduces the exact game, which is how
+disputed high scores are verified and production bugs reproduced.
+
+File layout (little endian):
+    header  magic b'TCRP', format version, mode, seed (u64), ticks (u32), claimed score (u32)
+    body    zlib-compressed input bits, one byte per tick (held keys compress to almost nothing)
+"""
+
+import struct
+import sys
+import time
+import zlib
+from typing import List
+
+from simulation import PLAY_MODES, GameMode, Inputs, Simulation
+
+MAGIC = b'TCRP'
+VERSION = 1
+HEADER = struct.Struct('<4sBBQII')
+
+# Input bits of one tick
+UP = 1
+DOWN = 2
+LEFT = 4
+RIGHT = 8
+GRAB = 16
+NEXT_LEVEL = 32  # Player advanced past LEVEL_COMPLETE just before this tick
+
+
+def pack_inputs(inputs: Inputs, next_level: bool = False) -> int:
+    return (UP * inputs.up | DOWN * inputs.down | LEFT * inputs.left | RIGHT * inputs.right
+            | GRAB * inputs.grab | NEXT_LEVEL * next_level)
+
+
+def unpack_inputs(bits: int) -> Inputs:
+    return Inputs(up=bool(bits & UP), down=bool(bits & DOWN), left=bool(bits & LEFT),
+                  right=bool(bits & RIGHT), grab=bool(bits & GRAB))
+
+
+class Replay:
+    def __init__(self, seed: int, mode: GameMode, score: int = 0):
+        self.seed = seed
+        self.mode = mode
+        self.score = score  # Final score claimed by the recorded session
+        self.ticks = bytearray()  # Input bits, one byte per tick
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def copy(self) -> 'Replay':
+        replay = Replay(self.seed, self.mode, self.score)
+        replay.ticks = bytearray(self.ticks)
+        return replay
+
+    def record(self, inputs: Inputs, next_level: bool = False):
+        self.ticks.append(pack_inputs(inputs, next_level))
+
+    def to_bytes(self) -> bytes:
+        header = HEADER.pack(MAGIC, VERSION, PLAY_MODES.index(self.mode), self.seed, len(self.ticks), self.score)
+        return header + zlib.compress(bytes(self.ticks), 9)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        magic, version, mode, seed, count, score = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a Tetris Claw replay (or an unsupported version)")
+        replay = cls(seed, PLAY_MODES[mode], score)
+        replay.ticks = bytearray(zlib.decompress(data[HEADER.size:]))
+        if len(replay.ticks) != count:
+            raise ValueError(f"Truncated replay: {len(replay.ticks)} of {count} ticks")
+        return replay
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> 'Replay':
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+def play(replay: Replay) -> Simulation:
+    """Re-simulate a recorded session headlessly, as fast as possible"""
+    sim = Simulation()
+    sim.reset(replay.mode, replay.seed)
+    for bits in replay.ticks:
+        if bits & NEXT_LEVEL:
+            sim.next_level()
+        sim.step(unpack_inputs(bits))
+    return sim
+
+
+def main(argv: List[str]) -> int:
+    """Re-run replay files and check each one reproduces its claimed score"""
+    if not argv:
+        print("usage: python replay.py REPLAY...")
+        return 2
+    failures = 0
+    for path in argv:
+        replay = Replay.load(path)
+        start = time.perf_counter()
+        sim = play(replay)
+        elapsed = time.perf_counter() - start
+        ok = sim.score == replay.score
+        failures += not ok
+        speed = len(replay) / elapsed if elapsed else float('inf')
+        print(f"{path}: {replay.mode.name} seed={replay.seed} ticks={len(replay)} "
+              f"score={sim.score} claimed={replay.score} {'OK' if ok else 'MISMATCH'} "
+              f"({speed:,.0f} ticks/s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
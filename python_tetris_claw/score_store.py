@@ -0,0 +1,139 @@
+"""
+Tetris Claw - score store
+Persistent high scores and session log in an embedded SQLite database.
+
+Every finished game and cleared level is one row in `sessions`. Writes never
+block the caller: record() hands the row to a background writer thread
+through a queue, and the writer commits whatever has queued up in one
+transaction. The database runs in WAL mode, so the writer never blocks
+readers and a commit is a sequential append to the log.
+
+Bests are kept in memory, loaded once at open and raised by record() as
+soon as a session is queued, so menus can show them every frame without
+touching the database. top() answers top-K queries from the
+(mode, score) and (mode, level, score) indexes, without scanning the log.
+"""
+
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    mode TEXT NOT NULL,              -- GameMode value: endless, time_attack, levels, vs_mode
+    level INTEGER NOT NULL,          -- Level reached in levels mode, else 0
+    score INTEGER NOT NULL,
+    players INTEGER NOT NULL,
+    seed INTEGER,
+    ended_at REAL NOT NULL           -- Unix time
+);
+CREATE INDEX IF NOT EXISTS sessions_mode_score ON sessions (mode, score DESC);
+CREATE INDEX IF NOT EXISTS sessions_mode_level_score ON sessions (mode, level, score DESC);
+"""
+
+BATCH_SIZE = 512  # Most rows committed in one transaction
+_CLOSE = object()  # Queue sentinel: flush and stop the writer
+
+
+@dataclass
+class Session:
+    mode: str
+    score: int
+    level: int = 0
+    players: int = 1
+    seed: Optional[int] = None
+    ended_at: float = 0.0  # Filled in by record() if left at 0
+
+    def row(self) -> Tuple:
+        return (self.mode, self.level, self.score, self.players, self.seed, self.ended_at)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode NORMAL only loses the last commits on power loss, never corrupts
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ScoreStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = connect(path)  # Reads, on the caller's thread
+        self.conn.executescript(SCHEMA)
+
+        # (mode, level) -> best score; level None is the best over all levels
+        self.bests: Dict[Tuple[str, Optional[int]], int] = {}
+        for mode, level, score in self.conn.execute(
+                "SELECT mode, level, MAX(score) FROM sessions GROUP BY mode, level"):
+            self.bests[mode, level] = score
+            self.bests[mode, None] = max(score, self.bests.get((mode, None), 0))
+
+        self.queue: "queue.Queue" = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name="score-writer", daemon=True)
+        self.writer.start()
+
+    def record(self, session: Session):
+        """Queue a finished session for writing; returns immediately"""
+        if not session.ended_at:
+            session.ended_at = time.time()
+        for key in ((session.mode, session.level), (session.mode, None)):
+            if session.score > self.bests.get(key, 0):
+                self.bests[key] = session.score
+        self.queue.put(session.row())
+
+    def best(self, mode: str, level: Optional[int] = None) -> int:
+        """Best score for a mode (and level), including sessions still queued"""
+        return self.bests.get((mode, level), 0)
+
+    def top(self, mode: str, k: int = 10, level: Optional[int] = None) -> List[Tuple[int, int, float]]:
+        """Top k sessions of a mode (and level) already on disk, as (score, level, ended_at)"""
+        if level is None:
+            return self.conn.execute(
+                "SELECT score, level, ended_at FROM sessions WHERE mode = ? ORDER BY score DESC LIMIT ?",
+                (mode, k)).fetchall()
+        return self.conn.execute(
+            "SELECT score, level, ended_at FROM sessions WHERE mode = ? AND level = ? ORDER BY score DESC LIMIT ?",
+            (mode, level, k)).fetchall()
+
+    def flush(self):
+        """Block until every queued session is committed"""
+        self.queue.join()
+
+    def close(self):
+        """Write out everything still queued, then stop the writer"""
+        self.queue.put(_CLOSE)
+        self.writer.join()
+        self.conn.close()
+
+    def _write_loop(self):
+        conn = connect(self.path)
+        closing = False
+        while not closing:
+            batch = [self.queue.get()]
+            # Everything that queued up while the last commit ran goes in one transaction
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [item for item in batch if item is not _CLOSE]
+            closing = len(rows) < len(batch)
+            try:
+                if rows:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO sessions (mode, level, score, players, seed, ended_at) VALUES (?, ?, ?, ?, ?, ?)",
+                            rows)
+            except sqlite3.Error as error:
+                # A locked or full database loses this batch, not the writer
+                print(f"score store: {len(rows)} sessions not saved: {error}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+        conn.close()
@@ -0,0 +1,608 @@
+"""
+Tetris Claw - simulation core
+Game rules with no dependency on pygame, a display, surfaces or fonts.
+
+Simulation owns the board, the pieces, the claw, timers, score and mode
+transitions. step(inputs, dt) advances it deterministically for a given seed,
+so sessions can run headless (server-side play, replays, validation) while
+Game in main.py only renders it.
+"""
+
+import random
+from dataclasses import dataclass
+from enum import Enum, IntEnum
+from typing import List, Optional, Sequence, Tuple, Union
+
+from board import Board
+from spatial_index import SpatialHash
+from state_machine import StateMachine
+
+# Layout (pixels) - the rules work in screen space
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 800
+BLOCK_SIZE = 40
+GRID_WIDTH = 10
+GRID_HEIGHT = 14
+GRID_OFFSET_X = 50  # 左边留50px边距
+GRID_OFFSET_Y = 80  # 顶部HUD区域
+
+# EXIT box in bottom right corner of entire screen
+EXIT_BOX_WIDTH = 160
+EXIT_BOX_HEIGHT = 120
+EXIT_BOX_X = SCREEN_WIDTH - EXIT_BOX_WIDTH - 30
+EXIT_BOX_Y = SCREEN_HEIGHT - EXIT_BOX_HEIGHT - 40
+
+DANGER_LINE_ROW = 3  # 危险线在第3行
+
+# The rules advance in fixed ticks; per-tick speeds below assume this rate
+TICK_RATE = 60
+TICK_MS = 1000 / TICK_RATE
+
+# Colors - Morandi Color Palette (柔和、低饱和度)
+MORANDI_BLUE = (142, 171, 184)      # 莫兰迪蓝
+MORANDI_PINK = (216, 166, 166)      # 莫兰迪粉
+MORANDI_GREEN = (162, 180, 155)     # 莫兰迪绿
+MORANDI_PURPLE = (175, 159, 180)    # 莫兰迪紫
+MORANDI_YELLOW = (221, 202, 158)    # 莫兰迪黄
+MORANDI_ORANGE = (213, 166, 135)    # 莫兰迪橙
+
+# Tetromino shapes with Morandi colors
+SHAPES = {
+    'I': {'blocks': [(0, 0), (1, 0), (2, 0), (3, 0)], 'color': MORANDI_BLUE},
+    'O': {'blocks': [(0, 0), (1, 0), (0, 1), (1, 1)], 'color': MORANDI_YELLOW},
+    'T': {'blocks': [(1, 0), (0, 1), (1, 1), (2, 1)], 'color': MORANDI_PURPLE},
+    'S': {'blocks': [(1, 0), (2, 0), (0, 1), (1, 1)], 'color': MORANDI_GREEN},
+    'Z': {'blocks': [(0, 0), (1, 0), (1, 1), (2, 1)], 'color': MORANDI_PINK},
+    'J': {'blocks': [(0, 0), (0, 1), (1, 1), (2, 1)], 'color': (130, 160, 175)},  # 浅莫兰迪蓝
+    'L': {'blocks': [(2, 0), (0, 1), (1, 1), (2, 1)], 'color': MORANDI_ORANGE}
+}
+
+
+class GameMode(Enum):
+    MENU = "menu"
+    MODE_SELECT = "mode_select"
+    ENDLESS = "endless"
+    TIME_ATTACK = "time_attack"
+    LEVELS = "levels"
+    VS_MODE = "vs_mode"
+    PAUSE = "pause"
+    GAME_OVER = "game_over"
+    LEVEL_COMPLETE = "level_complete"
+
+
+PLAY_MODES = (GameMode.ENDLESS, GameMode.TIME_ATTACK, GameMode.LEVELS, GameMode.VS_MODE)
+TIMED_MODES = (GameMode.TIME_ATTACK, GameMode.VS_MODE)
+
+
+@dataclass
+class Tetromino:
+    x: float
+    y: float
+    shape_key: str
+    blocks: List[Tuple[int, int]]
+    color: Tuple[int, int, int]
+    grid_positions: List[Tuple[int, int]]
+    piece_id: int = 0  # Id of the piece on the Board
+    # Delivery animation, once released over the EXIT box
+    falling: bool = False
+    fall_speed: float = 0.0
+    target_y: float = 0.0
+
+
+@dataclass
+class Inputs:
+    """Player input for one step"""
+    up: bool = False
+    down: bool = False
+    left: bool = False
+    right: bool = False
+    grab: bool = False  # SPACE pressed during this step
+
+
+@dataclass
+class Event:
+    """Something the renderer or a session host may want to react to"""
+    kind: str  # 'grabbed', 'delivered', 'game_over', 'level_complete'
+    x: float = 0.0
+    y: float = 0.0
+    color: Optional[Tuple[int, int, int]] = None
+    player: int = 0  # Claw that grabbed or delivered
+
+
+class ClawState(IntEnum):
+    IDLE = 0            # Player-controlled
+    LIFTING = 1         # Carrying a piece straight up to the top
+    MOVING_TO_EXIT = 2  # Carrying it across to the EXIT box
+    RELEASING = 3       # Piece released, falling into the EXIT box
+
+
+class ClawEvent(IntEnum):
+    GRAB = 0
+    ARRIVED = 1    # Reached the current move target
+    DELIVERED = 2  # Released piece landed in the EXIT box
+
+
+class Claw:
+    def __init__(self, x: float, y: float, player: int = 0):
+        self.x = x
+        self.y = y
+        self.target_x = x
+        self.target_y = y
+        self.speed = 5  # px per tick
+        self.state = ClawState.IDLE
+        self.player = player
+        self.grabbed_piece: Optional[Tetromino] = None
+
+    @property
+    def auto_moving(self) -> bool:
+        """True while the claw runs a delivery and ignores the player"""
+        return self.state != ClawState.IDLE
+
+    def move_to(self, x: float, y: float):
+        self.target_x = x
+        self.target_y = y
+
+    def update(self):
+        dx = self.target_x - self.x
+        dy = self.target_y - self.y
+        distance = (dx**2 + dy**2) ** 0.5
+
+        if distance > self.speed:
+            self.x += (dx / distance) * self.speed
+            self.y += (dy / distance) * self.speed
+        elif distance > 0.5:
+            self.x += dx * 0.2
+            self.y += dy * 0.2
+        else:
+            self.x = self.target_x
+            self.y = self.target_y
+            return True  # Reached target
+        return False
+
+
+def grab_box(x: float, y: float, blocks: List[Tuple[int, int]]) -> Tuple[float, float, float, float]:
+    """Expanded grab area of a piece at (x, y) as (min_x, min_y, max_x, max_y)"""
+    min_bx = min(b[0] for b in blocks)
+    max_bx = max(b[0] for b in blocks)
+    min_by = min(b[1] for b in blocks)
+    max_by = max(b[1] for b in blocks)
+    return (
+        x + min_bx * BLOCK_SIZE - BLOCK_SIZE/2 - 20,
+        y - max_by * BLOCK_SIZE - BLOCK_SIZE/2 - 20,
+        x + max_bx * BLOCK_SIZE + BLOCK_SIZE/2 + 20,
+        y - min_by * BLOCK_SIZE + BLOCK_SIZE/2 + 20
+    )
+
+
+def new_claw(player: int = 0, players: int = 1) -> Claw:
+    """Claw at its start position; several claws are spread evenly across the grid"""
+    x = GRID_WIDTH * BLOCK_SIZE * (player + 1) // (players + 1) + GRID_OFFSET_X
+    return Claw(x, 150 + GRID_OFFSET_Y, player)
+
+
+# Delivery sequence: grab -> lift to top -> move to EXIT -> release -> idle.
+# Updates and enter actions take (claw, sim).
+
+def _claw_move(claw: Claw, sim):
+    claw.update()
+
+
+def _claw_move_until_arrived(claw: Claw, sim):
+    if claw.update():
+        return ClawEvent.ARRIVED
+
+
+def _claw_enter_idle(claw: Claw, sim):
+    claw.target_x = claw.x
+    claw.target_y = claw.y
+
+
+def _claw_enter_lifting(claw: Claw, sim):
+    claw.move_to(claw.x, GRID_OFFSET_Y + 50)
+
+
+def _claw_enter_moving_to_exit(claw: Claw, sim):
+    claw.move_to(sim.exit_x, claw.y)
+
+
+def _claw_enter_releasing(claw: Claw, sim):
+    sim.deliver_piece(claw)
+
+
+CLAW_MACHINE = StateMachine(
+    ClawState, ClawEvent,
+    transitions={
+        (ClawState.IDLE, ClawEvent.GRAB): ClawState.LIFTING,
+        (ClawState.LIFTING, ClawEvent.ARRIVED): ClawState.MOVING_TO_EXIT,
+        (ClawState.MOVING_TO_EXIT, ClawEvent.ARRIVED): ClawState.RELEASING,
+        (ClawState.RELEASING, ClawEvent.DELIVERED): ClawState.IDLE,
+    },
+    updates={
+        ClawState.IDLE: _claw_move,
+        ClawState.LIFTING: _claw_move_until_arrived,
+        ClawState.MOVING_TO_EXIT: _claw_move_until_arrived,
+        ClawState.RELEASING: _claw_move,
+    },
+    on_enter={
+        ClawState.IDLE: _claw_enter_idle,
+        ClawState.LIFTING: _claw_enter_lifting,
+        ClawState.MOVING_TO_EXIT: _claw_enter_moving_to_exit,
+        ClawState.RELEASING: _claw_enter_releasing,
+    },
+)
+
+
+class Simulation:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self._rng_state = None  # rng.getstate() until the next draw, see rng_state()
+        self.mode = GameMode.MENU
+
+        # Game state
+        self.score = 0
+        self.high_scores = {
+            'endless': 0,
+            'time_attack': 0,
+            'levels': [0] * 10
+        }
+        self.tetrominoes: List[Tetromino] = []
+        self.board = Board(GRID_WIDTH, GRID_HEIGHT)
+        self.pieces_by_id = {}
+        self.next_piece_id = 1
+        self.grab_index = SpatialHash(BLOCK_SIZE * 2)  # Grab areas of pieces on the board
+
+        # Claws, one per player (several only in VS mode), and each player's score
+        self.players = 1
+        self.claws = [new_claw()]
+        self.player_scores = [0]
+        self.ticks = 0  # Steps since reset; rotates grab priority between claws
+
+        # Timing
+        self.spawn_timer = 0
+        self.spawn_interval = 3500  # milliseconds - 降低生成速度
+
+        # Time Attack mode
+        self.time_remaining = 60000  # 60 seconds in milliseconds
+
+        # Levels mode
+        self.current_level = 1
+        self.level_goal = 5
+        self.pieces_collected = 0
+
+        # EXIT box centre, where delivered pieces land
+        self.exit_x = EXIT_BOX_X + EXIT_BOX_WIDTH // 2
+        self.exit_y = EXIT_BOX_Y + EXIT_BOX_HEIGHT // 2
+
+        # Events raised during the current step
+        self.events: List[Event] = []
+
+    @property
+    def playing(self) -> bool:
+        return self.mode in PLAY_MODES
+
+    @property
+    def claw(self) -> Claw:
+        """Player one's claw (the only one outside VS mode)"""
+        return self.claws[0]
+
+    @property
+    def grabbed_piece(self) -> Optional[Tetromino]:
+        return self.claws[0].grabbed_piece
+
+    @property
+    def grid(self) -> List[List[Optional[str]]]:
+        """Row-major view of the board holding each cell's shape key (None if empty)"""
+        shapes = {t.piece_id: t.shape_key for t in self.tetrominoes}
+        return [[shapes.get(self.board.piece_at(x, y)) for x in range(self.board.width)]
+                for y in range(self.board.height)]
+
+    def clear_board(self):
+        self.tetrominoes = []
+        self.board.clear()
+        self.pieces_by_id = {}
+        self.grab_index.clear()
+        self.spawn_timer = 0
+        self.claws = [new_claw(i, self.players) for i in range(self.players)]
+
+    def reset(self, mode: GameMode, seed=None, players: int = 1):
+        """Reset game state for a new game, reseeding the RNG if a seed is given.
+
+        players claws share the board in VS mode; every other mode has one.
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+            self._rng_state = None
+        self.mode = mode
+        self.score = 0
+        self.players = players if mode == GameMode.VS_MODE else 1
+        self.player_scores = [0] * self.players
+        self.ticks = 0
+        self.clear_board()
+
+        if mode in TIMED_MODES:
+            self.time_remaining = 60000  # 60 seconds
+        elif mode == GameMode.LEVELS:
+            self.current_level = 1
+            self.level_goal = 5
+            self.pieces_collected = 0
+
+    def rng_state(self) -> tuple:
+        """rng.getstate(), cached between draws so snapshots taken between spawns share one tuple.
+
+        spawn_tetromino is the only place the rules draw from rng; anything
+        else that draws from it must call set_rng_state() or clear the cache.
+        """
+        if self._rng_state is None:
+            self._rng_state = self.rng.getstate()
+        return self._rng_state
+
+    def set_rng_state(self, state: tuple):
+        if state is not self._rng_state:
+            self.rng.setstate(state)
+            self._rng_state = state
+
+    def next_level(self):
+        """Advance to next level"""
+        self.current_level += 1
+        self.pieces_collected = 0
+        self.level_goal = 5 + (self.current_level - 1) * 2  # Increase difficulty
+        self.clear_board()
+        self.mode = GameMode.LEVELS
+
+    def spawn_tetromino(self):
+        """Spawn a tetromino from the bottom - stacking properly"""
+        self._rng_state = None
+        shape_key = self.rng.choice(list(SHAPES.keys()))
+        shape_data = SHAPES[shape_key]
+        blocks = shape_data['blocks']
+
+        # Normalize blocks to start from (0, 0)
+        min_x = min(b[0] for b in blocks)
+        min_y = min(b[1] for b in blocks)
+        normalized_blocks = [(bx - min_x, by - min_y) for bx, by in blocks]
+
+        # Get shape dimensions
+        max_x = max(b[0] for b in normalized_blocks)
+        max_y = max(b[1] for b in normalized_blocks)
+        shape_width = max_x + 1
+
+        # Random column that keeps shape fully inside grid
+        if shape_width > self.board.width:
+            return  # Shape too wide
+        start_col = self.rng.randint(0, self.board.width - shape_width)
+
+        # Find the lowest position where this piece can rest, using the column height map
+        spawn_row = self.board.landing_row(normalized_blocks, start_col)
+
+        # Check if spawn position is valid
+        if spawn_row < 0:
+            return  # No space to spawn
+
+        # Calculate screen position (center of shape)
+        center_x = max_x / 2.0
+        center_y = max_y / 2.0
+        spawn_x = (start_col + center_x) * BLOCK_SIZE + BLOCK_SIZE / 2 + GRID_OFFSET_X
+        spawn_y = (spawn_row + center_y) * BLOCK_SIZE + BLOCK_SIZE / 2 + GRID_OFFSET_Y
+
+        # Create tetromino and mark grid
+        grid_positions = [(start_col + bx, spawn_row + by) for bx, by in normalized_blocks]
+
+        piece_id = self.next_piece_id
+        self.next_piece_id += 1
+        self.board.place(piece_id, grid_positions)
+
+        tetromino = Tetromino(
+            x=spawn_x,
+            y=spawn_y,
+            shape_key=shape_key,
+            blocks=normalized_blocks,  # Use normalized blocks
+            color=shape_data['color'],
+            grid_positions=grid_positions,
+            piece_id=piece_id
+        )
+
+        self.tetrominoes.append(tetromino)
+        self.pieces_by_id[piece_id] = tetromino
+        self.grab_index.insert(piece_id, self.grab_box(tetromino))
+
+    def grab_box(self, tetromino: Tetromino):
+        """Expanded grab area of a piece as (min_x, min_y, max_x, max_y)"""
+        return grab_box(tetromino.x, tetromino.y, tetromino.blocks)
+
+    def grab_piece(self, claw: Optional[Claw] = None):
+        """Try to grab a tetromino at claw position (player one's claw by default)"""
+        claw = claw or self.claw
+        if claw.grabbed_piece:
+            return
+
+        # Only pieces whose expanded grab area covers the claw are candidates;
+        # the earliest spawned one wins, as with a scan in spawn order. A grabbed
+        # piece leaves the index at once, so no other claw can take it.
+        candidates = self.grab_index.query_point(claw.x, claw.y)
+        if not candidates:
+            return
+
+        tetromino = self.pieces_by_id[candidates[0]]
+        claw.grabbed_piece = tetromino
+        self.events.append(Event('grabbed', tetromino.x, tetromino.y, tetromino.color, claw.player))
+
+        # Start delivery sequence: lift vertically to top
+        CLAW_MACHINE.fire(claw, ClawEvent.GRAB, self)
+
+        # Clear grid, remembering what was resting on the piece
+        supported = self.board.supported_by(tetromino.piece_id)
+        self.board.remove(tetromino.piece_id)
+        self.grab_index.remove(tetromino.piece_id)
+
+        # 应用重力，让上方的方块下落
+        self.apply_gravity(supported)
+
+    def apply_gravity(self, piece_ids=None):
+        """应用重力 - 让悬空的方块下落
+
+        Only the given pieces and those resting on them are re-evaluated
+        (every piece on the board if none are given); each one drops to its
+        final row in a single step.
+        """
+        if piece_ids is None:
+            piece_ids = list(self.board.pieces)
+
+        for piece_id, rows in self.board.settle(piece_ids).items():
+            tetromino = self.pieces_by_id[piece_id]
+            tetromino.grid_positions = list(self.board.pieces[piece_id])
+            tetromino.y += rows * BLOCK_SIZE
+            self.grab_index.update(piece_id, self.grab_box(tetromino))
+
+    def check_can_fall(self, tetromino):
+        """检查方块是否可以下落"""
+        # 检查每一列最下面的块下方是否有障碍（位运算）
+        return self.board.can_fall(tetromino.piece_id)
+
+    def deliver_piece(self, claw: Optional[Claw] = None):
+        """Release a claw's grabbed piece over the EXIT box"""
+        piece = (claw or self.claw).grabbed_piece
+        if not piece:
+            return
+
+        # Start the falling animation
+        piece.falling = True
+        piece.fall_speed = 0
+        piece.target_y = self.exit_y
+
+    def update_falling_piece(self, claw: Optional[Claw] = None):
+        """Update the falling animation of a claw's released piece"""
+        claw = claw or self.claw
+        piece = claw.grabbed_piece
+        if not (piece and piece.falling):
+            return
+
+        # Gravity acceleration (px per tick²)
+        piece.fall_speed += 0.5
+        piece.y += piece.fall_speed
+
+        # Check if reached EXIT box
+        if piece.y < piece.target_y:
+            return
+        piece.y = piece.target_y
+        self.events.append(Event('delivered', piece.x, piece.y, piece.color, claw.player))
+
+        # Complete delivery
+        self.tetrominoes.remove(piece)
+        del self.pieces_by_id[piece.piece_id]
+        claw.grabbed_piece = None
+        self.score += 100
+        self.player_scores[claw.player] += 100
+
+        # Level mode piece collection
+        if self.mode == GameMode.LEVELS:
+            self.pieces_collected += 1
+            if self.pieces_collected >= self.level_goal:
+                if self.current_level < 10:
+                    self.mode = GameMode.LEVEL_COMPLETE
+                    self.events.append(Event('level_complete'))
+                else:
+                    self.mode = GameMode.GAME_OVER
+                    if self.score > self.high_scores['levels'][self.current_level - 1]:
+                        self.high_scores['levels'][self.current_level - 1] = self.score
+                    self.events.append(Event('game_over'))
+
+        # Reset claw
+        CLAW_MACHINE.fire(claw, ClawEvent.DELIVERED, self)
+
+    def apply_inputs(self, inputs: Inputs, claw: Optional[Claw] = None):
+        """Move a claw's target from held direction keys"""
+        claw = claw or self.claw
+        if claw.auto_moving:
+            return
+        if inputs.up:
+            claw.target_y -= 3.75
+        if inputs.down:
+            claw.target_y += 3.75
+        if inputs.left:
+            claw.target_x -= 3.75
+        if inputs.right:
+            claw.target_x += 3.75
+
+        # Clamp to bounds (within grid area)
+        claw.target_x = max(50 + GRID_OFFSET_X,
+                            min(GRID_WIDTH * BLOCK_SIZE - 50 + GRID_OFFSET_X,
+                                claw.target_x))
+        claw.target_y = max(120 + GRID_OFFSET_Y,
+                            min(GRID_HEIGHT * BLOCK_SIZE - 60 + GRID_OFFSET_Y,
+                                claw.target_y))
+
+    def game_over(self):
+        """End the run, recording the high score for the current mode"""
+        if self.mode == GameMode.ENDLESS:
+            if self.score > self.high_scores['endless']:
+                self.high_scores['endless'] = self.score
+        elif self.mode == GameMode.TIME_ATTACK:
+            if self.score > self.high_scores['time_attack']:
+                self.high_scores['time_attack'] = self.score
+        self.mode = GameMode.GAME_OVER
+        self.events.append(Event('game_over'))
+
+    def update(self, dt: float = TICK_MS):
+        """Advance the rules by one tick; timers count down dt milliseconds"""
+        if not self.playing:
+            return
+
+        # Spawn timer
+        self.spawn_timer += dt
+        if self.spawn_timer >= self.spawn_interval:
+            self.spawn_tetromino()
+            self.spawn_timer = 0
+
+        # 检测方块是否超过红线
+        # 被抓住的方块已从棋盘移除，不参与检测
+        if self.board.any_above(DANGER_LINE_ROW):
+            self.game_over()
+            return
+
+        # Move the claws; arriving at a delivery target advances the sequence
+        CLAW_MACHINE.step_all(self.claws, self)
+
+        for claw in self.claws:
+            # Grabbed piece follows the claw until it is released
+            piece = claw.grabbed_piece
+            if piece and not piece.falling:
+                piece.x = claw.x
+                piece.y = claw.y + 40
+
+            # Update falling piece animation
+            self.update_falling_piece(claw)
+
+        # Time Attack / VS mode timer
+        if self.mode in TIMED_MODES:
+            self.time_remaining -= dt
+            if self.time_remaining <= 0:
+                self.time_remaining = 0
+                self.game_over()
+
+    def step(self, inputs: Union[Inputs, Sequence[Inputs]], dt: float = TICK_MS) -> List[Event]:
+        """Advance one tick: apply inputs, then the rules. Returns the events raised.
+
+        inputs is one Inputs, or one per claw in VS mode. Movement and falling
+        speeds are per tick, so outcomes only depend on the sequence of steps,
+        never on how fast they are rendered.
+        """
+        self.events = []
+        if self.playing:
+            if isinstance(inputs, Inputs):
+                inputs = (inputs,)
+            claws = self.claws
+            # Grabs are resolved one claw at a time, so two claws reaching for the
+            # same piece in one tick can't both take it; first pick rotates every
+            # tick so neither player always wins the tie
+            count = len(claws)
+            first = self.ticks % count
+            for i in range(count):
+                index = (first + i) % count
+                claw = claws[index]
+                if inputs[index].grab and not claw.auto_moving:
+                    self.grab_piece(claw)
+            for claw, claw_inputs in zip(claws, inputs):
+                self.apply_inputs(claw_inputs, claw)
+        self.update(dt)
+        self.ticks += 1
+        return self.events
@@ -0,0 +1,274 @@
+"""
+Tetris Claw - snapshots
+Compact save / restore of a Simulation's whole state, for rollback netcode
+in VS play and for bots that try moves out before making them.
+
+A Snapshot is one flat array of doubles (every number in the state is an
+int below 2**53 or a float, so all of them fit exactly) plus the RNG state.
+Taking one walks the pieces and claws once; restoring rebuilds the board,
+grab index and piece table from it and reuses the Tetromino and Claw
+objects already in the simulation where ids match, so a rollback of a few
+ticks allocates little. The RNG state is only drawn from on spawns, so the
+simulation caches it and snapshots taken between spawns share one tuple.
+The board layer and grab index are derived data and are not stored.
+
+Layout of Snapshot.values:
+    header   HEADER_FIELDS values (mode, score, timers, level state, counts, high scores)
+    scores   one per player
+    claws    CLAW_FIELDS per claw
+    pieces   PIECE_FIELDS per tetromino, in Simulation.tetrominoes order
+    board    ids of the pieces on the board, in Board.pieces order
+
+to_bytes() / from_bytes() give the same data as little-endian bytes, to
+send to the other players or keep in a ring buffer off the heap.
+
+    python snapshot.py     # round-trip check and timings
+"""
+
+import math
+import random
+import struct
+import sys
+import time
+from array import array
+from typing import List
+
+from simulation import SHAPES, ClawState, GameMode, Inputs, Simulation, Tetromino, new_claw
+
+MAGIC = b'TCSS'
+VERSION = 1
+BYTES_HEADER = struct.Struct('<4sBBHI')  # magic, version, rng version, rng words, values
+
+MODES = list(GameMode)
+SHAPE_KEYS = list(SHAPES)
+CLAW_STATES = list(ClawState)
+LEVEL_COUNT = 10
+
+HEADER_FIELDS = 13 + 2 + LEVEL_COUNT
+CLAW_FIELDS = 6    # x, y, target_x, target_y, state, grabbed piece id (0 if none)
+PIECE_CELLS = 4
+PIECE_FIELDS = 7 + 2 * PIECE_CELLS  # id, shape, x, y, falling, fall_speed, target_y, cells
+
+# Normalized blocks per shape, as spawn_tetromino stores them; shared by restored pieces
+BLOCKS = {}
+for _key, _shape in SHAPES.items():
+    _min_x = min(b[0] for b in _shape['blocks'])
+    _min_y = min(b[1] for b in _shape['blocks'])
+    BLOCKS[_key] = [(bx - _min_x, by - _min_y) for bx, by in _shape['blocks']]
+    assert len(BLOCKS[_key]) == PIECE_CELLS
+
+
+class Snapshot:
+    __slots__ = ('values', 'rng')
+
+    def __init__(self, values: array, rng: tuple):
+        self.values = values  # array('d'), laid out as described above
+        self.rng = rng        # random.Random.getstate() tuple
+
+    def __eq__(self, other):
+        return isinstance(other, Snapshot) and self.values == other.values and self.rng == other.rng
+
+    def to_bytes(self) -> bytes:
+        version, words, gauss = self.rng
+        words = array('I', words)
+        if sys.byteorder != 'little':
+            words.byteswap()
+        values = array('d', self.values)
+        values.append(math.nan if gauss is None else gauss)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return (BYTES_HEADER.pack(MAGIC, VERSION, version, len(words), len(values))
+                + words.tobytes() + values.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Snapshot':
+        magic, version, rng_version, word_count, value_count = BYTES_HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a Tetris Claw snapshot (or an unsupported version)")
+        offset = BYTES_HEADER.size
+        words = array('I')
+        words.frombytes(data[offset:offset + 4 * word_count])
+        offset += 4 * word_count
+        values = array('d')
+        values.frombytes(data[offset:offset + 8 * value_count])
+        if len(words) != word_count or len(values) != value_count:
+            raise ValueError("Truncated snapshot")
+        if sys.byteorder != 'little':
+            words.byteswap()
+            values.byteswap()
+        gauss = values.pop()
+        return cls(values, (rng_version, tuple(words), None if math.isnan(gauss) else gauss))
+
+
+def take(sim: Simulation) -> Snapshot:
+    """Snapshot of everything step() reads or writes"""
+    high = sim.high_scores
+    values = [
+        MODES.index(sim.mode), sim.score, sim.spawn_timer, sim.spawn_interval, sim.time_remaining,
+        sim.current_level, sim.level_goal, sim.pieces_collected, sim.next_piece_id, sim.ticks,
+        sim.players, len(sim.tetrominoes), len(sim.board.pieces),
+        high['endless'], high['time_attack'], *high['levels'],
+    ]
+    values += sim.player_scores
+    for claw in sim.claws:
+        piece = claw.grabbed_piece
+        values += (claw.x, claw.y, claw.target_x, claw.target_y, claw.state,
+                   piece.piece_id if piece else 0)
+    index = SHAPE_KEYS.index
+    for t in sim.tetrominoes:
+        values += (t.piece_id, index(t.shape_key), t.x, t.y, t.falling, t.fall_speed, t.target_y)
+        for cell in t.grid_positions:
+            values += cell
+    values += sim.board.pieces
+    return Snapshot(array('d', values), sim.rng_state())
+
+
+def restore(sim: Simulation, snapshot: Snapshot):
+    """Put sim back in the state the snapshot was taken in"""
+    v = snapshot.values
+    (mode, score, spawn_timer, spawn_interval, time_remaining, level, goal, collected,
+     next_id, ticks, players, piece_count, board_count) = v[:13]
+    sim.mode = MODES[int(mode)]
+    sim.score = int(score)
+    sim.spawn_timer = spawn_timer
+    sim.spawn_interval = spawn_interval
+    sim.time_remaining = time_remaining
+    sim.current_level = int(level)
+    sim.level_goal = int(goal)
+    sim.pieces_collected = int(collected)
+    sim.next_piece_id = int(next_id)
+    sim.ticks = int(ticks)
+    players = int(players)
+    sim.players = players
+    sim.high_scores['endless'] = int(v[13])
+    sim.high_scores['time_attack'] = int(v[14])
+    sim.high_scores['levels'] = [int(s) for s in v[15:HEADER_FIELDS]]
+    pos = HEADER_FIELDS
+    sim.player_scores = [int(s) for s in v[pos:pos + players]]
+    pos += players
+    claws_at = pos
+    pos += players * CLAW_FIELDS
+
+    # Pieces, reusing the objects of pieces that are still around
+    old = sim.pieces_by_id
+    pieces = {}
+    tetrominoes = []
+    moved = set()  # Pieces whose object is new or whose position changed
+    for _ in range(int(piece_count)):
+        piece_id = int(v[pos])
+        key = SHAPE_KEYS[int(v[pos + 1])]
+        x = v[pos + 2]
+        y = v[pos + 3]
+        t = old.get(piece_id)
+        # A piece's cells only ever shift down together, so its first cell stands for all of them
+        if (t is None or t.shape_key != key or t.x != x or t.y != y
+                or t.grid_positions[0] != (v[pos + 7], v[pos + 8])):
+            c = v[pos + 7:pos + PIECE_FIELDS]
+            cells = [(int(c[0]), int(c[1])), (int(c[2]), int(c[3])), (int(c[4]), int(c[5])), (int(c[6]), int(c[7]))]
+            if t is None or t.shape_key != key:
+                t = Tetromino(x, y, key, BLOCKS[key], SHAPES[key]['color'], cells, piece_id)
+            else:
+                t.x = x
+                t.y = y
+                t.grid_positions = cells
+            moved.add(piece_id)
+        t.falling = v[pos + 4] != 0
+        t.fall_speed = v[pos + 5]
+        t.target_y = v[pos + 6]
+        pos += PIECE_FIELDS
+        pieces[piece_id] = t
+        tetrominoes.append(t)
+    sim.tetrominoes = tetrominoes
+    sim.pieces_by_id = pieces
+
+    # Board and grab index are derived from the pieces on the board. A short
+    # rollback usually finds them as they were, so only what differs is redone
+    board_ids = [int(piece_id) for piece_id in v[pos:pos + int(board_count)]]
+    board = sim.board
+    if list(board.pieces) != board_ids or not moved.isdisjoint(board_ids):
+        board.clear()
+        for piece_id in board_ids:
+            board.place(piece_id, pieces[piece_id].grid_positions)
+    index = sim.grab_index
+    for piece_id in [piece_id for piece_id in index.boxes if piece_id not in board.pieces]:
+        index.remove(piece_id)
+    for piece_id in board_ids:
+        if piece_id in moved or piece_id not in index.boxes:
+            index.update(piece_id, sim.grab_box(pieces[piece_id]))
+
+    claws = sim.claws
+    if len(claws) != players:
+        claws = sim.claws = [new_claw(i, players) for i in range(players)]
+    pos = claws_at
+    for claw in claws:
+        x, y, target_x, target_y, state, grabbed = v[pos:pos + CLAW_FIELDS]
+        pos += CLAW_FIELDS
+        claw.x = x
+        claw.y = y
+        claw.target_x = target_x
+        claw.target_y = target_y
+        claw.state = CLAW_STATES[int(state)]
+        claw.grabbed_piece = pieces[int(grabbed)] if grabbed else None
+
+    sim.set_rng_state(snapshot.rng)
+    sim.events = []
+
+
+class RandomPlayer:
+    """Holds random direction keys for a while and grabs often: enough to exercise grabs and deliveries"""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.keys = Inputs()
+
+    def inputs(self) -> Inputs:
+        rng = self.rng
+        if rng.random() < 1 / 30:
+            self.keys = Inputs(up=rng.random() < 0.5, down=rng.random() < 0.5,
+                               left=rng.random() < 0.5, right=rng.random() < 0.5)
+        keys = self.keys
+        return Inputs(keys.up, keys.down, keys.left, keys.right, grab=rng.random() < 0.2)
+
+
+def main(argv: List[str]) -> int:
+    """Check that restoring a snapshot replays the same game, and time take / restore"""
+    mismatches = 0
+    take_s = restore_s = 0.0
+    takes = restores = 0
+    for seed in range(1, 11):
+        mode = (GameMode.ENDLESS, GameMode.LEVELS, GameMode.VS_MODE)[seed % 3]
+        sim = Simulation(seed)
+        sim.reset(mode, seed, players=3)
+        sim.spawn_interval = 800
+        players = [RandomPlayer(seed * 10 + i) for i in range(sim.players)]
+        inputs: List[List[Inputs]] = []
+        snapshots = []
+        while sim.playing and sim.ticks < 3000:
+            start = time.perf_counter()
+            snapshots.append(take(sim))
+            take_s += time.perf_counter() - start
+            tick = [player.inputs() for player in players]
+            inputs.append(tick)
+            sim.step(tick)
+        takes += len(snapshots)
+        final = take(sim)
+
+        # Roll back to a few points and re-simulate: the game must end up identical
+        for at in range(0, len(snapshots), max(1, len(snapshots) // 7)):
+            snapshot = Snapshot.from_bytes(snapshots[at].to_bytes())
+            start = time.perf_counter()
+            restore(sim, snapshot)
+            restore_s += time.perf_counter() - start
+            restores += 1
+            for tick in inputs[at:]:
+                sim.step(tick)
+            mismatches += take(sim) != final
+        print(f"seed {seed} {mode.name:<8} ticks={len(snapshots)} pieces={len(sim.tetrominoes)} "
+              f"size={len(final.to_bytes())} B")
+    print(f"take {take_s / takes * 1e6:.1f} us, restore {restore_s / restores * 1e6:.1f} us, "
+          f"mismatches {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+Tetris Claw - solver
+Beam search over grab sequences, for the in-game hint, attract-mode demos
+and checking how hard a spawn interval is.
+
+A search state is a copy of the bitboard plus the time, the claw position
+and how many of the upcoming spawns have landed. Expanding a state grabs one
+reachable piece with grab_piece / apply_gravity semantics (remove it, settle
+what rested on it), then advances the clock by the claw's travel and
+delivery time, spawning the pieces the game's RNG will produce in that time.
+Upcoming spawns are read ahead from a copy of the RNG, so they match the
+real game exactly. A state dies as soon as a spawn crosses the danger line.
+
+States are Zobrist-hashed (one random key per piece at each position,
+updated incrementally as pieces are removed, fall and spawn), so orders of
+grabs that lead to the same board collapse into one entry of a bounded
+transposition table instead of being searched again.
+
+    python solver.py --spawn-interval 3500 2500 1500 --episodes 5
+"""
+
+import argparse
+import math
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from board import Board
+from simulation import (BLOCK_SIZE, DANGER_LINE_ROW, EXIT_BOX_HEIGHT, EXIT_BOX_WIDTH, EXIT_BOX_X,
+                        EXIT_BOX_Y, GRID_HEIGHT, GRID_OFFSET_X, GRID_OFFSET_Y, GRID_WIDTH, SHAPES,
+                        TICK_MS, Claw, GameMode, Inputs, Simulation, grab_box)
+from snapshot import restore, take
+
+# Where the claw can be steered (the clamp in Simulation.apply_inputs)
+CLAW_MIN_X = 50 + GRID_OFFSET_X
+CLAW_MAX_X = GRID_WIDTH * BLOCK_SIZE - 50 + GRID_OFFSET_X
+CLAW_MIN_Y = 120 + GRID_OFFSET_Y
+CLAW_MAX_Y = GRID_HEIGHT * BLOCK_SIZE - 60 + GRID_OFFSET_Y
+LIFT_Y = GRID_OFFSET_Y + 50  # Height the claw lifts a grabbed piece to
+EXIT_X = EXIT_BOX_X + EXIT_BOX_WIDTH // 2  # Where deliveries are released and land
+EXIT_Y = EXIT_BOX_Y + EXIT_BOX_HEIGHT // 2
+
+STEER_SPEED = 3.75  # px per tick the player moves the claw's target
+GRAB_MARGIN = 4     # px a grab point keeps inside its box and outside the boxes of earlier pieces
+SETTLE_TICKS = 4    # Ticks the claw needs to ease onto a point after its target gets there
+
+# Evaluation weights
+DELIVERY_VALUE = 1000
+TICK_COST = 1       # Faster deliveries leave more time before the stack reaches the line
+STACK_COST = 10     # Per occupied row summed over columns
+PEAK_COST = 40      # Per row of the tallest column
+DEAD_VALUE = -10 ** 9
+
+
+def clamp(value: float, low: float, high: float) -> float:
+    return low if value < low else high if value > high else value
+
+
+def piece_box(cells: Sequence[Tuple[int, int]]) -> Tuple[float, float, float, float]:
+    """Grab area of a piece from its board cells, as Simulation.grab_box computes it"""
+    min_x = min(x for x, _ in cells)
+    min_y = min(y for _, y in cells)
+    blocks = [(x - min_x, y - min_y) for x, y in cells]
+    max_bx = max(bx for bx, _ in blocks)
+    max_by = max(by for _, by in blocks)
+    x = (min_x + max_bx / 2) * BLOCK_SIZE + BLOCK_SIZE / 2 + GRID_OFFSET_X
+    y = (min_y + max_by / 2) * BLOCK_SIZE + BLOCK_SIZE / 2 + GRID_OFFSET_Y
+    return grab_box(x, y, blocks)
+
+
+def grab_point(boxes: Dict[int, Tuple[float, float, float, float]], piece_id: int,
+               claw_x: float, claw_y: float) -> Optional[Tuple[float, float]]:
+    """Point nearest the claw where grabbing takes piece_id, or None if there is none.
+
+    boxes maps every piece on the board to its grab box. A grab takes the
+    lowest id whose box covers the claw, so the point must be inside this
+    piece's box, outside the boxes of all earlier pieces, and within the
+    claw's bounds.
+    """
+    min_x, min_y, max_x, max_y = boxes[piece_id]
+    low_x = max(min_x + GRAB_MARGIN, CLAW_MIN_X)
+    high_x = min(max_x - GRAB_MARGIN, CLAW_MAX_X)
+    low_y = max(min_y + GRAB_MARGIN, CLAW_MIN_Y)
+    high_y = min(max_y - GRAB_MARGIN, CLAW_MAX_Y)
+    if low_x > high_x or low_y > high_y:
+        return None
+
+    near_x = clamp(claw_x, low_x, high_x)
+    near_y = clamp(claw_y, low_y, high_y)
+    blockers = [box for other, box in boxes.items()
+                if other < piece_id and box[0] - GRAB_MARGIN < high_x and box[2] + GRAB_MARGIN > low_x
+                and box[1] - GRAB_MARGIN < high_y and box[3] + GRAB_MARGIN > low_y]
+    # The free part of the box is a rectangle minus rectangles, so if any
+    # point is free, one with coordinates taken from these edges is
+    for box in blockers:
+        if (box[0] - GRAB_MARGIN < near_x < box[2] + GRAB_MARGIN
+                and box[1] - GRAB_MARGIN < near_y < box[3] + GRAB_MARGIN):
+            break
+    else:
+        return near_x, near_y
+
+    xs = {near_x, low_x, high_x}
+    ys = {near_y, low_y, high_y}
+    for box in blockers:
+        xs.update((box[0] - GRAB_MARGIN, box[2] + GRAB_MARGIN))
+        ys.update((box[1] - GRAB_MARGIN, box[3] + GRAB_MARGIN))
+    xs = [x for x in xs if low_x <= x <= high_x]
+    ys = [y for y in ys if low_y <= y <= high_y]
+    points = sorted(((x, y) for x in xs for y in ys),
+                    key=lambda p: max(abs(p[0] - claw_x), abs(p[1] - claw_y)))
+    for x, y in points:
+        for box in blockers:
+            if (box[0] - GRAB_MARGIN < x < box[2] + GRAB_MARGIN
+                    and box[1] - GRAB_MARGIN < y < box[3] + GRAB_MARGIN):
+                break
+        else:
+            return x, y
+    return None
+
+
+def travel_ticks(claw_x: float, claw_y: float, x: float, y: float) -> int:
+    """Ticks to steer the claw from where it is onto (x, y)"""
+    # The target moves 3.75 px per tick on each axis from inside the claw bounds;
+    # the claw itself follows at 5 px per tick
+    steer = max(abs(x - clamp(claw_x, CLAW_MIN_X, CLAW_MAX_X)),
+                abs(y - clamp(claw_y, CLAW_MIN_Y, CLAW_MAX_Y))) / STEER_SPEED
+    chase = math.hypot(x - claw_x, y - claw_y) / 5
+    return math.ceil(max(steer, chase)) + SETTLE_TICKS
+
+
+class Zobrist:
+    """Random 64-bit keys for (piece id, anchor cell) pairs, drawn on first use"""
+
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.keys: Dict[Tuple, int] = {}
+
+    def __call__(self, *item) -> int:
+        key = self.keys.get(item)
+        if key is None:
+            key = self.keys[item] = self.rng.getrandbits(64)
+        return key
+
+
+class TranspositionTable:
+    """Best value seen per state key; the oldest entries are evicted once full"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.values: Dict[int, float] = {}
+        self.hits = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def visit(self, key: int, value: float) -> bool:
+        """Record a state; False if an equal or better state with this key was already seen"""
+        values = self.values
+        best = values.get(key)
+        if best is not None and best >= value:
+            self.hits += 1
+            return False
+        if best is None and len(values) >= self.capacity:
+            del values[next(iter(values))]
+        values[key] = value
+        return True
+
+    def clear(self):
+        self.values.clear()
+        self.hits = 0
+
+
+class SpawnSchedule:
+    """The pieces a simulation will spawn, and the ticks they spawn on, read ahead from a copy of its RNG"""
+
+    def __init__(self, sim: Simulation):
+        self.rng = random.Random()
+        self.rng.setstate(sim.rng.getstate())
+        self.keys = list(SHAPES.keys())
+        self.width = sim.board.width
+
+        # Same float accumulation as Simulation.update, so no spawn is a tick off
+        self.first_tick = self.ticks_until_spawn(sim.spawn_timer, sim.spawn_interval) - 1
+        self.interval_ticks = self.ticks_until_spawn(0, sim.spawn_interval)
+        self.spawns: List[Tuple[List[Tuple[int, int]], int]] = []  # (normalized blocks, column)
+
+    @staticmethod
+    def ticks_until_spawn(timer: float, interval: float) -> int:
+        ticks = 1
+        timer += TICK_MS
+        while timer < interval:
+            timer += TICK_MS
+            ticks += 1
+        return ticks
+
+    def tick(self, index: int) -> int:
+        return self.first_tick + index * self.interval_ticks
+
+    def due(self, tick: int) -> int:
+        """Number of spawns that run before tick"""
+        return max(0, -((self.first_tick - tick) // self.interval_ticks))
+
+    def spawn(self, index: int) -> Tuple[List[Tuple[int, int]], int]:
+        spawns = self.spawns
+        while len(spawns) <= index:
+            # The same draws, in the same order, as Simulation.spawn_tetromino
+            blocks = SHAPES[self.rng.choice(self.keys)]['blocks']
+            min_x = min(b[0] for b in blocks)
+            min_y = min(b[1] for b in blocks)
+            blocks = [(bx - min_x, by - min_y) for bx, by in blocks]
+            shape_width = max(b[0] for b in blocks) + 1
+            spawns.append((blocks, self.rng.randint(0, self.width - shape_width)))
+        return spawns[index]
+
+
+class Node:
+    """One search state"""
+    __slots__ = ('board', 'key', 'tick', 'spawn_index', 'next_id', 'claw_x', 'claw_y',
+                 'plan', 'deliveries', 'dead', 'value')
+
+    def __init__(self, board: Board, key: int, tick: int, spawn_index: int, next_id: int,
+                 claw_x: float, claw_y: float, plan: Tuple[int, ...], deliveries: int):
+        self.board = board
+        self.key = key
+        self.tick = tick
+        self.spawn_index = spawn_index
+        self.next_id = next_id
+        self.claw_x = claw_x
+        self.claw_y = claw_y
+        self.plan = plan
+        self.deliveries = deliveries
+        self.dead = False
+        self.value = 0.0
+
+
+class Plan:
+    """Result of a search: the grabs to make, in order, and what they achieve"""
+
+    def __init__(self, pieces: Tuple[int, ...], deliveries: int, ticks: int, survives: bool, states: int):
+        self.pieces = pieces        # Piece ids to grab
+        self.deliveries = deliveries
+        self.ticks = ticks          # Ticks until the last delivery lands
+        self.survives = survives    # False if the danger line is crossed on the way
+        self.states = states        # States generated by the search
+
+    def __repr__(self):
+        return (f"Plan(pieces={self.pieces}, deliveries={self.deliveries}, ticks={self.ticks}, "
+                f"survives={self.survives}, states={self.states})")
+
+
+class Solver:
+    def __init__(self, beam_width: int = 16, depth: int = 4, table_size: int = 1 << 16, seed: int = 0):
+        self.beam_width = beam_width
+        self.depth = depth
+        self.zobrist = Zobrist(seed)
+        self.table = TranspositionTable(table_size)
+        self.boxes: Dict[Tuple, Tuple[float, float, float, float]] = {}  # Grab boxes by piece cells
+        self.delivery_cache: Dict[Tuple[int, int], int] = {}
+        self.states = 0  # States generated over the solver's lifetime
+
+    def solve(self, sim: Simulation) -> Plan:
+        """Best sequence of grabs for player one's claw from the simulation's current state"""
+        schedule = SpawnSchedule(sim)
+        self.table.clear()
+        states = self.states
+
+        root = self.root(sim)
+        best = root
+        layer = [root]
+        for _ in range(self.depth):
+            children = []
+            for node in layer:
+                children.extend(self.expand(node, schedule))
+            if not children:
+                break
+            children.sort(key=lambda n: n.value, reverse=True)
+            layer = [node for node in children[:self.beam_width] if not node.dead]
+            if children[0].value > best.value or best is root:
+                best = children[0]
+            if not layer:
+                break
+
+        return Plan(best.plan, best.deliveries, best.tick, not best.dead, self.states - states)
+
+    def hint(self, sim: Simulation) -> Optional[int]:
+        """Id of the piece player one should grab next, or None"""
+        plan = self.solve(sim)
+        return plan.pieces[0] if plan.pieces else None
+
+    def root(self, sim: Simulation) -> Node:
+        board = sim.board.copy()
+        key = 0
+        for piece_id, cells in board.pieces.items():
+            key ^= self.zobrist(piece_id, cells[0])
+        claw = sim.claw
+        if claw.auto_moving:
+            # Mid-delivery: plan from the EXIT once it is done
+            tick = self.delivery_ticks(claw.x, claw.y)
+            claw_x, claw_y = EXIT_X, LIFT_Y
+        else:
+            tick = 0
+            claw_x, claw_y = claw.x, claw.y
+        node = Node(board, key, tick, 0, sim.next_piece_id, claw_x, claw_y, (), 0)
+        node.value = self.evaluate(node)
+        return node
+
+    def box(self, cells: List[Tuple[int, int]]) -> Tuple[float, float, float, float]:
+        key = tuple(cells)
+        box = self.boxes.get(key)
+        if box is None:
+            if len(self.boxes) > 1 << 16:
+                self.boxes.clear()
+            box = self.boxes[key] = piece_box(cells)
+        return box
+
+    def delivery_ticks(self, x: float, y: float) -> int:
+        """Ticks from a grab at (x, y) until the piece lands in the EXIT box"""
+        key = (round(x), round(y))
+        ticks = self.delivery_cache.get(key)
+        if ticks is None:
+            # The lift starts in the grab's own tick, and the piece starts falling
+            # in the tick the claw arrives over the EXIT
+            claw = Claw(x, y)
+            ticks = -2
+            for target in ((x, LIFT_Y), (EXIT_X, LIFT_Y)):
+                claw.move_to(*target)
+                ticks += 1
+                while not claw.update():
+                    ticks += 1
+            # Released piece falls from under the claw, speeding up 0.5 px per tick
+            distance = EXIT_Y - (LIFT_Y + 40)
+            ticks += math.ceil((math.sqrt(1 + 16 * max(distance, 0)) - 1) / 2)
+            ticks = self.delivery_cache[key] = ticks
+        return ticks
+
+    def expand(self, node: Node, schedule: SpawnSchedule) -> List[Node]:
+        """Every state reachable from node by grabbing one piece, skipping known transpositions"""
+        boxes = {piece_id: self.box(cells) for piece_id, cells in node.board.pieces.items()}
+        zobrist = self.zobrist
+        # Spawns that land while the claw travels are the same whichever piece it
+        # heads for (and never block it: later pieces lose grab ties), so each
+        # number of them is applied once and shared by every grab made after it
+        arrivals = {node.spawn_index: node}
+        children = []
+        for piece_id in sorted(boxes):
+            point = grab_point(boxes, piece_id, node.claw_x, node.claw_y)
+            if point is None:
+                continue
+            self.states += 1
+            tick = node.tick + travel_ticks(node.claw_x, node.claw_y, *point)
+            due = schedule.due(tick)
+            base = arrivals.get(due)
+            if base is None:
+                base = arrivals[due] = Node(node.board.copy(), node.key, node.tick, node.spawn_index,
+                                            node.next_id, node.claw_x, node.claw_y, node.plan, node.deliveries)
+                self.advance(base, tick, schedule)
+            child = Node(base.board, base.key, tick, base.spawn_index, base.next_id,
+                         EXIT_X, LIFT_Y, node.plan + (piece_id,), node.deliveries)
+            if base.dead:
+                child.dead = True
+                child.tick = base.tick
+            else:
+                child_board = child.board = base.board.copy()
+                supported = child_board.supported_by(piece_id)
+                child.key ^= zobrist(piece_id, child_board.remove(piece_id)[0])
+                for other, rows in child_board.settle(supported).items():
+                    x, y = child_board.pieces[other][0]
+                    child.key ^= zobrist(other, (x, y - rows)) ^ zobrist(other, (x, y))
+                self.advance(child, child.tick + self.delivery_ticks(*point), schedule)
+                if not child.dead:
+                    child.deliveries += 1
+            child.value = self.evaluate(child)
+            if child.dead or self.table.visit(child.key ^ zobrist('spawns', child.spawn_index), child.value):
+                children.append(child)
+        return children
+
+    def advance(self, node: Node, tick: int, schedule: SpawnSchedule):
+        """Move node's clock to tick, landing every spawn due before it"""
+        board = node.board
+        due = schedule.due(tick)
+        while node.spawn_index < due:
+            blocks, col = schedule.spawn(node.spawn_index)
+            node.spawn_index += 1
+            row = board.landing_row(blocks, col)
+            if row >= 0:
+                cells = [(col + bx, row + by) for bx, by in blocks]
+                board.place(node.next_id, cells)
+                node.key ^= self.zobrist(node.next_id, cells[0])
+                node.next_id += 1
+            if board.any_above(DANGER_LINE_ROW):
+                node.dead = True
+                node.tick = schedule.tick(node.spawn_index - 1)
+                return
+        node.tick = tick
+
+    def evaluate(self, node: Node) -> float:
+        if node.dead:
+            # Dying later is still better than dying sooner
+            return DEAD_VALUE + node.tick
+        tops = node.board.column_tops
+        height = node.board.height
+        stack = height * len(tops) - sum(tops)
+        peak = height - min(tops)
+        return node.deliveries * DELIVERY_VALUE - node.tick * TICK_COST - stack * STACK_COST - peak * PEAK_COST
+
+
+class SolverBot:
+    """Plays player one's claw from solver hints: steers onto the suggested piece and grabs it"""
+
+    def __init__(self, solver: Solver):
+        self.solver = solver
+        self.target: Optional[int] = None
+
+    def inputs(self, sim: Simulation) -> Inputs:
+        claw = sim.claw
+        if claw.auto_moving:
+            self.target = None
+            return Inputs()
+        if self.target not in sim.board.pieces:
+            self.target = self.solver.hint(sim)
+            if self.target is None:
+                return Inputs()
+
+        # Grab as soon as the claw is where a grab takes the target
+        candidates = sim.grab_index.query_point(claw.x, claw.y)
+        if candidates and candidates[0] == self.target:
+            return Inputs(grab=True)
+
+        point = grab_point(sim.grab_index.boxes, self.target, claw.target_x, claw.target_y)
+        if point is None:
+            self.target = None
+            return Inputs()
+        dx = point[0] - claw.target_x
+        dy = point[1] - claw.target_y
+        step = STEER_SPEED / 2
+        return Inputs(up=dy < -step, down=dy > step, left=dx < -step, right=dx > step)
+
+
+class HintWorker:
+    """Computes hints on a background thread, so a search never stalls a frame.
+
+    request() snapshots the simulation (tens of microseconds) and queues it;
+    the worker restores the snapshot into a simulation of its own and runs
+    the solver there. If several requests queue up while one is searched,
+    only the newest is searched. `result` holds the (key, piece id) of the
+    last finished search; the solver must not be used by anyone else.
+    """
+
+    def __init__(self, solver: Solver):
+        self.solver = solver
+        self.result: Optional[Tuple[object, Optional[int]]] = None
+        self.requested = None  # Key of the newest request
+        self.queue: "queue.Queue" = queue.Queue()
+        self.thread = threading.Thread(target=self._search_loop, name="hint-solver", daemon=True)
+        self.thread.start()
+
+    def request(self, key, sim: Simulation):
+        """Queue a hint for sim, identified by key; does nothing if key was the last request"""
+        if key == self.requested:
+            return
+        self.requested = key
+        self.queue.put((key, take(sim)))
+
+    def close(self):
+        """Stop the worker once the search in progress finishes"""
+        self.queue.put(None)
+        self.thread.join()
+
+    def _search_loop(self):
+        sim = Simulation()
+        while True:
+            jobs = [self.queue.get()]
+            while True:
+                try:
+                    jobs.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in jobs:
+                return
+            key, snapshot = jobs[-1]
+            restore(sim, snapshot)
+            self.result = (key, self.solver.hint(sim))
+
+
+def run_episode(seed: int, spawn_interval: int, solver: Solver, max_ticks: int) -> Tuple[int, int, bool]:
+    """Play one Endless game with SolverBot; returns (deliveries, ticks, reached max_ticks)"""
+    sim = Simulation(seed)
+    sim.reset(GameMode.ENDLESS, seed)
+    sim.spawn_interval = spawn_interval
+    bot = SolverBot(solver)
+    while sim.playing and sim.ticks < max_ticks:
+        sim.step(bot.inputs(sim))
+    return sim.score // 100, sim.ticks, sim.playing
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tetris Claw solver: how long does the best play survive?")
+    parser.add_argument('--spawn-interval', type=int, nargs='+', default=[3500, 2500, 1500],
+                        help="ms between spawns to try")
+    parser.add_argument('--episodes', type=int, default=5, help="seeded games per interval")
+    parser.add_argument('--max-ticks', type=int, default=36000, help="tick limit per game (36000 = 10 minutes)")
+    parser.add_argument('--beam', type=int, default=16, help="beam width")
+    parser.add_argument('--depth', type=int, default=4, help="grabs searched ahead")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    solver = Solver(args.beam, args.depth)
+    print(f"{'interval':>8} {'deliveries':>12} {'minutes':>8} {'survived':>9}")
+    for interval in args.spawn_interval:
+        results = [run_episode(args.seed + i, interval, solver, args.max_ticks) for i in range(args.episodes)]
+        deliveries = sum(r[0] for r in results) / len(results)
+        minutes = sum(r[1] for r in results) / len(results) / 60 / 60
+        survived = sum(r[2] for r in results)
+        print(f"{interval:>8} {deliveries:>12.1f} {minutes:>8.1f} {survived:>5}/{len(results)}")
+
+    # Raw search speed, on a busy board
+    sim = Simulation(args.seed)
+    sim.reset(GameMode.ENDLESS, args.seed)
+    sim.spawn_interval = 300
+    while sim.playing and len(sim.board.pieces) < 12:
+        sim.step(Inputs())
+    states = solver.states
+    start = time.perf_counter()
+    for _ in range(20):
+        solver.solve(sim)
+    elapsed = time.perf_counter() - start
+    print(f"search: {(solver.states - states) / elapsed:,.0f} states/s "
+          f"({elapsed / 20 * 1000:.1f} ms per solve, {len(sim.board.pieces)} pieces)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
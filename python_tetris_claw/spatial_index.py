@@ -0,0 +1,60 @@
+"""
+Tetris Claw - spatial index
+Uniform-grid bucket index of axis-aligned boxes, used for claw hit-testing.
+
+Each box is registered in every bucket it overlaps, so a point query only
+looks at the handful of boxes sharing the point's bucket instead of every
+piece on the board.
+"""
+
+import math
+from typing import Dict, List, Set, Tuple
+
+Box = Tuple[float, float, float, float]  # min_x, min_y, max_x, max_y (inclusive)
+
+
+class SpatialHash:
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.buckets: Dict[Tuple[int, int], Set[int]] = {}
+        self.boxes: Dict[int, Box] = {}
+
+    def clear(self):
+        self.buckets.clear()
+        self.boxes.clear()
+
+    def _bucket_keys(self, box: Box):
+        min_x, min_y, max_x, max_y = box
+        for bx in range(math.floor(min_x / self.cell_size), math.floor(max_x / self.cell_size) + 1):
+            for by in range(math.floor(min_y / self.cell_size), math.floor(max_y / self.cell_size) + 1):
+                yield bx, by
+
+    def insert(self, item_id: int, box: Box):
+        self.boxes[item_id] = box
+        for key in self._bucket_keys(box):
+            self.buckets.setdefault(key, set()).add(item_id)
+
+    def remove(self, item_id: int):
+        box = self.boxes.pop(item_id, None)
+        if box is None:
+            return
+        for key in self._bucket_keys(box):
+            bucket = self.buckets[key]
+            bucket.discard(item_id)
+            if not bucket:
+                del self.buckets[key]
+
+    def update(self, item_id: int, box: Box):
+        self.remove(item_id)
+        self.insert(item_id, box)
+
+    def query_point(self, x: float, y: float) -> List[int]:
+        """Ids of all boxes containing the point, in ascending id order"""
+        key = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+        hits = []
+        for item_id in self.buckets.get(key, ()):
+            min_x, min_y, max_x, max_y = self.boxes[item_id]
+            if min_x <= x <= max_x and min_y <= y <= max_y:
+                hits.append(item_id)
+        hits.sort()
+        return hits
@@ -0,0 +1,16 @@
+"""The batched simulation must follow Simulation's rules exactly, board for board"""
+
+import pytest
+
+import batch_sim
+from simulation import GameMode
+
+
+@pytest.mark.parametrize('mode, boards, spawn_interval', [
+    (GameMode.ENDLESS, 8, 1500),
+    (GameMode.TIME_ATTACK, 8, 3500),  # Slow enough spawning that most boards time out
+    (GameMode.LEVELS, 8, 2000),       # Fast enough that some boards clear a level
+])
+def test_batch_matches_scalar(mode, boards, spawn_interval):
+    # check() prints the first differences it finds; pytest shows them on failure
+    assert batch_sim.check(boards, 30000, spawn_interval, [mode]) == 0
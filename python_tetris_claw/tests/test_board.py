@@ -0,0 +1,103 @@
+"""Board must agree with the list-of-rows grid it replaced, drop for drop"""
+
+import random
+
+import pytest
+
+from board import Board
+from simulation import GRID_HEIGHT, GRID_WIDTH, SHAPES
+
+
+class ReferenceGrid:
+    """The original grid: a 2D list scanned cell by cell, gravity one row at a time"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.grid = [[None] * width for _ in range(height)]
+        self.pieces = {}  # piece id -> list of cells, in spawn order
+
+    def landing_row(self, blocks, col):
+        row = self.height - (max(by for _, by in blocks) + 1)
+        for bx, by in blocks:
+            for y in range(self.height):
+                if self.grid[y][col + bx] is not None:
+                    row = min(row, y - by - 1)
+                    break
+        return row
+
+    def place(self, piece_id, cells):
+        for x, y in cells:
+            self.grid[y][x] = piece_id
+        self.pieces[piece_id] = list(cells)
+
+    def remove(self, piece_id):
+        for x, y in self.pieces.pop(piece_id):
+            self.grid[y][x] = None
+
+    def can_fall(self, piece_id):
+        cells = self.pieces[piece_id]
+        return all(y + 1 < self.height and self.grid[y + 1][x] in (None, piece_id) for x, y in cells)
+
+    def apply_gravity(self):
+        changed = True
+        while changed:
+            changed = False
+            for piece_id in list(self.pieces):
+                if self.can_fall(piece_id):
+                    cells = [(x, y + 1) for x, y in self.pieces[piece_id]]
+                    self.remove(piece_id)
+                    self.place(piece_id, cells)
+                    changed = True
+
+
+def normalized(blocks):
+    min_x = min(bx for bx, _ in blocks)
+    min_y = min(by for _, by in blocks)
+    return [(bx - min_x, by - min_y) for bx, by in blocks]
+
+
+def cells_of(board):
+    return {piece_id: sorted(cells) for piece_id, cells in board.pieces.items()}
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_drops_match_reference_grid(seed):
+    rng = random.Random(seed)
+    board = Board(GRID_WIDTH, GRID_HEIGHT)
+    grid = ReferenceGrid(GRID_WIDTH, GRID_HEIGHT)
+    shapes = [normalized(shape['blocks']) for shape in SHAPES.values()]
+    next_id = 1
+    for _ in range(300):
+        if board.pieces and rng.random() < 0.35:
+            # Grab a piece: everything that rested on it falls
+            piece_id = rng.choice(sorted(board.pieces))
+            supported = board.supported_by(piece_id)
+            board.remove(piece_id)
+            board.settle(supported)
+            grid.remove(piece_id)
+            grid.apply_gravity()
+        else:
+            blocks = rng.choice(shapes)
+            col = rng.randint(0, GRID_WIDTH - (max(bx for bx, _ in blocks) + 1))
+            row = board.landing_row(blocks, col)
+            assert row == grid.landing_row(blocks, col)
+            if row >= 0:
+                cells = [(col + bx, row + by) for bx, by in blocks]
+                board.place(next_id, cells)
+                grid.place(next_id, cells)
+                next_id += 1
+        assert cells_of(board) == {piece_id: sorted(cells) for piece_id, cells in grid.pieces.items()}
+        for y in range(GRID_HEIGHT):
+            for x in range(GRID_WIDTH):
+                assert board.piece_at(x, y) == grid.grid[y][x]
+                assert board.is_occupied(x, y) == (grid.grid[y][x] is not None)
+
+
+def test_copy_is_independent():
+    board = Board(GRID_WIDTH, GRID_HEIGHT)
+    board.place(1, [(0, GRID_HEIGHT - 1), (1, GRID_HEIGHT - 1)])
+    other = board.copy()
+    other.remove(1)
+    assert board.is_occupied(0, GRID_HEIGHT - 1)
+    assert not other.is_occupied(0, GRID_HEIGHT - 1)
@@ -0,0 +1,68 @@
+"""Checkpoints round-trip, and unreadable ones are set aside instead of crashing"""
+
+import array
+
+import pytest
+
+import checkpoint
+import main
+from checkpoint import Checkpoint
+from replay import Replay
+from simulation import GameMode, Inputs, Simulation
+from snapshot import Snapshot, take
+
+
+@pytest.fixture
+def saved():
+    sim = Simulation(4)
+    sim.reset(GameMode.LEVELS, 4)
+    replay = Replay(4, GameMode.LEVELS)
+    for tick in range(600):
+        inputs = Inputs(left=tick % 50 < 20, grab=tick % 37 == 0)
+        replay.record(inputs)
+        sim.step(inputs)
+    return Checkpoint(GameMode.LEVELS, 4, take(sim), replay)
+
+
+def test_round_trip(saved):
+    loaded = Checkpoint.from_bytes(saved.to_bytes())
+    assert (loaded.mode, loaded.seed, loaded.snapshot) == (saved.mode, saved.seed, saved.snapshot)
+    assert loaded.replay.to_bytes() == saved.replay.to_bytes()
+
+
+def test_missing_file(tmp_path):
+    assert checkpoint.load(str(tmp_path / 'none.tcc')) is None
+
+
+@pytest.mark.parametrize('damage', [
+    lambda data: data[:len(data) // 2],
+    lambda data: data[:10],
+    lambda data: b'',
+    lambda data: data[:-1] + bytes([data[-1] ^ 1]),
+    lambda data: data[:checkpoint.HEADER.size + 40] + b'\xff' + data[checkpoint.HEADER.size + 41:],
+    lambda data: b'XXXX' + data[4:],
+], ids=['half', 'header', 'empty', 'last-byte', 'snapshot-byte', 'magic'])
+def test_unreadable_file_is_set_aside(tmp_path, saved, damage):
+    path = tmp_path / 'checkpoint.tcc'
+    path.write_bytes(damage(saved.to_bytes()))
+    assert checkpoint.load(str(path)) is None
+    assert not path.exists()
+    assert (tmp_path / 'checkpoint.tcc.bad').exists()
+
+
+def test_resume_sets_aside_unusable_snapshot(tmp_path, saved):
+    # Parses and passes the checksum, but no mode has index 1e9
+    values = array.array('d', saved.snapshot.values)
+    values[0] = 1e9
+    saved.snapshot = Snapshot(values, saved.snapshot.rng)
+    path = tmp_path / 'checkpoint.tcc'
+    path.write_bytes(saved.to_bytes())
+
+    game = main.Game(seed=1)
+    try:
+        sim = game.sim
+        assert not game.resume(str(path))
+        assert game.sim is sim
+        assert (tmp_path / 'checkpoint.tcc.bad').exists()
+    finally:
+        game.hints.close()
@@ -0,0 +1,43 @@
+"""Dirty-rect repaints must leave the screen exactly as a full redraw would"""
+
+import random
+
+import pygame
+import pytest
+
+import main
+from simulation import GameMode, Inputs
+
+
+@pytest.fixture
+def game():
+    game = main.Game(seed=3, dirty_rects=True)
+    yield game
+    game.hints.close()
+
+
+@pytest.mark.parametrize('mode', [GameMode.ENDLESS, GameMode.VS_MODE])
+def test_dirty_frames_match_full_redraw(game, mode):
+    rng = random.Random(5)
+    game.show_hint = True
+    game.sim.reset(mode, players=3)
+    game.sim.spawn_interval = 600
+    full = pygame.Surface(game.screen.get_size())
+    for frame in range(300):
+        inputs = [Inputs(up=rng.random() < 0.3, down=rng.random() < 0.3, left=rng.random() < 0.3,
+                         right=rng.random() < 0.3, grab=rng.random() < 0.05) for _ in game.sim.claws]
+        game.update(inputs if mode == GameMode.VS_MODE else inputs[0], main.TICK_MS)
+        if frame % 90 == 0:
+            game.create_firework_effect(rng.uniform(0, 800), rng.uniform(0, 800), main.MORANDI_PINK)
+            game.create_shatter_effect(rng.uniform(0, 800), rng.uniform(0, 800), main.MORANDI_BLUE)
+        game.render_alpha = rng.random()
+        # Both draws see one scene, even if a hint lands in between
+        entries = main.Game.game_entries(game)
+        game.game_entries = lambda: entries
+        game.draw_game_dirty()
+
+        screen = game.screen
+        game.screen = full
+        game.draw_game()
+        game.screen = screen
+        assert pygame.image.tobytes(screen, 'RGB') == pygame.image.tobytes(full, 'RGB'), f'frame {frame}'
@@ -0,0 +1,59 @@
+"""Replays round-trip through their binary format and re-simulate the recorded game"""
+
+import zlib
+
+import pytest
+
+from replay import Replay, pack_inputs, play, unpack_inputs
+from simulation import GameMode, Inputs, Simulation
+from snapshot import take
+from solver import Solver, SolverBot
+
+
+def record(mode, seed, ticks):
+    """Let the solver play, recording the session the way Game does"""
+    sim = Simulation()
+    sim.reset(mode, seed)
+    replay = Replay(seed, mode)
+    bot = SolverBot(Solver(4, 2))
+    next_level = False
+    for _ in range(ticks):
+        if sim.mode == GameMode.LEVEL_COMPLETE:
+            sim.next_level()
+            next_level = True
+        if not sim.playing:
+            break
+        inputs = bot.inputs(sim)
+        replay.record(inputs, next_level)
+        next_level = False
+        sim.step(inputs)
+    replay.score = sim.score
+    return sim, replay
+
+
+def test_inputs_round_trip():
+    for bits in range(32):
+        assert pack_inputs(unpack_inputs(bits)) == bits
+
+
+@pytest.mark.parametrize('mode', [GameMode.ENDLESS, GameMode.TIME_ATTACK, GameMode.LEVELS])
+def test_saved_replay_reproduces_game(tmp_path, mode):
+    sim, replay = record(mode, 11, 4000)
+    assert sim.score > 0
+    path = str(tmp_path / 'game.tcr')
+    replay.save(path)
+    loaded = Replay.load(path)
+    assert (loaded.seed, loaded.mode, loaded.score, loaded.ticks) == (replay.seed, replay.mode, replay.score,
+                                                                      replay.ticks)
+    assert take(play(loaded)) == take(sim)
+
+
+def test_truncated_replay_is_rejected():
+    replay = Replay(3, GameMode.ENDLESS)
+    for tick in range(500):
+        replay.record(Inputs(left=tick % 7 == 0, grab=tick % 11 == 0))
+    data = replay.to_bytes()
+    with pytest.raises(zlib.error):
+        Replay.from_bytes(data[:-4])
+    with pytest.raises(ValueError):
+        Replay.from_bytes(b'TCCK' + data[4:])
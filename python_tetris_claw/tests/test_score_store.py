@@ -0,0 +1,49 @@
+"""ScoreStore keeps bests and top-K answers consistent with what was recorded"""
+
+import random
+
+from score_store import ScoreStore, Session
+
+
+def test_bests_and_top_survive_reopen(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    rng = random.Random(2)
+    sessions = [Session('endless', rng.randrange(5000)) for _ in range(300)]
+    sessions += [Session('levels', rng.randrange(900), level=rng.randint(1, 10)) for _ in range(300)]
+
+    store = ScoreStore(path)
+    try:
+        for session in sessions:
+            store.record(session)
+        # Bests count queued sessions straight away
+        assert store.best('endless') == max(s.score for s in sessions if s.mode == 'endless')
+        store.flush()
+        expected = sorted((s.score for s in sessions if s.mode == 'endless'), reverse=True)[:10]
+        assert [score for score, _, _ in store.top('endless')] == expected
+    finally:
+        store.close()
+
+    store = ScoreStore(path)
+    try:
+        for level in range(1, 11):
+            scores = sorted((s.score for s in sessions if s.mode == 'levels' and s.level == level), reverse=True)
+            assert store.best('levels', level) == (scores[0] if scores else 0)
+            assert [score for score, _, _ in store.top('levels', 5, level)] == scores[:5]
+        assert store.best('levels') == max(s.score for s in sessions if s.mode == 'levels')
+        assert store.best('time_attack') == 0
+    finally:
+        store.close()
+
+
+def test_close_writes_everything_queued(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    store = ScoreStore(path)
+    for score in range(2000):
+        store.record(Session('time_attack', score))
+    store.close()
+
+    store = ScoreStore(path)
+    try:
+        assert store.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 2000
+    finally:
+        store.close()
@@ -0,0 +1,45 @@
+"""SpatialHash point queries must match a brute-force scan of every box"""
+
+import random
+
+import pytest
+
+from spatial_index import SpatialHash
+
+
+def brute_force(boxes, x, y):
+    return sorted(item_id for item_id, (min_x, min_y, max_x, max_y) in boxes.items()
+                  if min_x <= x <= max_x and min_y <= y <= max_y)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_point_queries_match_brute_force(seed):
+    rng = random.Random(seed)
+    index = SpatialHash(40)
+    boxes = {}
+    for step in range(400):
+        item_id = rng.randrange(30)
+        if item_id in boxes and rng.random() < 0.3:
+            index.remove(item_id)
+            del boxes[item_id]
+        else:
+            x, y = rng.uniform(-50, 500), rng.uniform(-50, 500)
+            box = (x, y, x + rng.uniform(0, 150), y + rng.uniform(0, 150))
+            index.update(item_id, box)
+            boxes[item_id] = box
+        for _ in range(5):
+            x, y = rng.uniform(-60, 660), rng.uniform(-60, 660)
+            assert index.query_point(x, y) == brute_force(boxes, x, y)
+        # Box edges are inclusive, including edges on bucket boundaries
+        if boxes:
+            min_x, min_y, max_x, max_y = boxes[rng.choice(list(boxes))]
+            for x, y in ((min_x, min_y), (max_x, max_y), (min_x, max_y)):
+                assert index.query_point(x, y) == brute_force(boxes, x, y)
+
+
+def test_remove_drops_empty_buckets():
+    index = SpatialHash(10)
+    index.insert(1, (0, 0, 35, 35))
+    index.remove(1)
+    index.remove(1)  # Removing an unknown id is a no-op
+    assert index.buckets == {} and index.boxes == {}